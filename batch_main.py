@@ -0,0 +1,25 @@
+from src.utils import log
+from src.input_data import InputData
+from src.batch_runner import BatchRunner
+import sys
+import time
+import logging
+
+# 用法: python batch_main.py <场景文件夹 | 场景清单.csv | 含场景工作表的工作簿> [输出文件]
+if __name__ == "__main__":
+    exe_folder = "./"
+    logger = log.setup_log(log_dir=exe_folder)
+
+    st = time.time()
+    # 公共数据只解析一次，场景工作簿中缺失的工作表沿用公共数据
+    input_data = InputData(exe_folder=exe_folder)
+    input_data.read_data()
+
+    batch_runner = BatchRunner(
+        base_input_data=input_data,
+        scenario_path=sys.argv[1],
+        output_file=sys.argv[2] if len(sys.argv) > 2 else None
+    )
+    batch_runner.run()
+    batch_runner.write_to_excel()
+    logging.info("total time: {}s".format(time.time() - st))
@@ -0,0 +1,29 @@
+from src.utils import log
+from src.benchmark import BenchmarkRunner
+import os
+import sys
+import time
+import logging
+
+# 用法: python benchmark_main.py [输出文件夹] [基线文件]
+# 基线文件不存在时将本次结果保存为基线；存在时比较，有回退则以非零状态退出
+if __name__ == "__main__":
+    output_folder = sys.argv[1] if len(sys.argv) > 1 else "./benchmark/"
+    if not output_folder.endswith("/"):
+        output_folder += "/"
+    logger = log.setup_log(log_dir=output_folder)
+
+    st = time.time()
+    benchmark_runner = BenchmarkRunner(output_folder=output_folder)
+    benchmark_runner.run()
+    benchmark_runner.write_results()
+
+    regression_lt = []
+    if len(sys.argv) > 2:
+        baseline_file = sys.argv[2]
+        if os.path.exists(baseline_file):
+            regression_lt = benchmark_runner.compare_with_baseline(baseline_file=baseline_file)
+        else:
+            benchmark_runner.write_results(file_path=baseline_file)
+    logging.info("total time: {}s".format(time.time() - st))
+    sys.exit(1 if regression_lt else 0)
@@ -1,31 +1,81 @@
-from src.utils import log
+from src.utils import log, timing, field
 from src.input_data import InputData
-from src.model import Model
-from src.initial_sol import InitialSolution
+from src.engine import create_model
+from src.lp_model import LinearFractionalModel
+from src.multi_start import MultiStartModel
 from src.result_storage import ResultStorage
+from src.infeasibility import InfeasibilityDiagnosis
+from src.alternatives import AlternativeGenerator
+import os
+import sys
 import time
 import logging
 
 # 按装订区域中的绿色按钮以运行脚本。
+# 用法: python main.py [--no-cache] [输入工作簿 | 每个工作表一个 CSV / Parquet / JSON 行文件的文件夹]，默认为 ./混矿管理.xlsx
+# --no-cache 不读取也不写入工作簿旁的解析缓存
 if __name__ == "__main__":
     exe_folder = "./"
     logger = log.setup_log(log_dir=exe_folder)
 
     st = time.time()
-    input_data = InputData(exe_folder=exe_folder)
+    args = [arg for arg in sys.argv[1:] if arg != "--no-cache"]
+    use_cache = "--no-cache" not in sys.argv[1:]
+    if args:
+        input_path = os.path.normpath(args[0])
+        input_data = InputData(
+            exe_folder=os.path.dirname(input_path) + os.sep if os.path.dirname(input_path) else exe_folder,
+            file_name=os.path.basename(input_path),
+            use_cache=use_cache
+        )
+    else:
+        input_data = InputData(exe_folder=exe_folder, use_cache=use_cache)
     input_data.read_data()
+    if input_data.run_report:
+        timing.enable()
+    if input_data.cprofile:
+        timing.start_profile()
 
-    initial_run = InitialSolution(input_data=input_data)
-    initial_x_ratio_sol = initial_run.run_model()
+    diagnosis = InfeasibilityDiagnosis(input_data=input_data)
+    if input_data.diagnose_infeasibility and not diagnosis.is_feasible():
+        # 约束本身不可行时不求解，输出冲突约束集与最小放宽量
+        diagnosis.run()
+        diagnosis.write_to_excel()
+        logging.info("total time: {}s".format(time.time() - st))
+        sys.exit(1)
 
-    model = Model(input_data=input_data, initial_x=initial_x_ratio_sol)
+    stage_st = time.time()
+    model = create_model(input_data=input_data)
     result, multi_results = model.run_model()
+    timing.add_task(task_name="solve", time_taken=time.time() - stage_st)
+    stage_st = time.time()
+    dual_values = model.get_dual_values(result_x=result.x)
+    timing.add_task(task_name="dual values", time_taken=time.time() - stage_st)
+    # 多起点求解的互不相同的局部最优解，备选方案写入 多个结果 时单独写出
+    local_optima = multi_results if isinstance(model, MultiStartModel) else None
+    if input_data.alternative_num > 1:
+        # 吨度价最低且彼此配比相差不小于 alternative_distance 的备选方案
+        stage_st = time.time()
+        multi_results = AlternativeGenerator(input_data=input_data).run(
+            best_result=result, is_global_optimum=isinstance(model, LinearFractionalModel)
+        )
+        timing.add_task(task_name="alternatives", time_taken=time.time() - stage_st)
 
     result_storage = ResultStorage(
         input_data=input_data,
         keys=model.keys,
         result=result,
-        multi_results=multi_results
+        multi_results=multi_results,
+        dual_values=dual_values
     )
     result_storage.write_to_excel()
+    result_storage.write_dual_values_to_excel()
+    result_storage.write_multi_results_to_excel()
+    if local_optima is not None and local_optima is not multi_results:
+        result_storage.write_multi_results_to_excel(multi_results=local_optima, sheet_name=field.LOCAL_OPTIMA_SHEET)
+    timing.add_task(task_name="total", time_taken=time.time() - st)
+    if input_data.cprofile:
+        timing.stop_profile(output_folder=exe_folder)
+    if input_data.run_report:
+        timing.out_report(output_folder=exe_folder)
     logging.info("total time: {}s".format(time.time() - st))
@@ -0,0 +1,26 @@
+from src.utils import log
+from src.service import OptimizationService
+import asyncio
+import sys
+
+# 用法: python service_main.py [端口]
+# 给出端口时监听本地 TCP 端口，否则从标准输入逐行读取任务、向标准输出逐行写出结果
+if __name__ == "__main__":
+    exe_folder = "./"
+    logger = log.setup_log(log_dir=exe_folder)
+
+    service = OptimizationService()
+
+    async def serve():
+        await service.start()
+        if len(sys.argv) > 1:
+            await service.serve_tcp(port=int(sys.argv[1]))
+        else:
+            await service.serve_stdin()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
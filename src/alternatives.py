@@ -0,0 +1,143 @@
+import logging
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import milp, LinearConstraint, Bounds
+
+from .input_data import InputData
+from .milp_model import MixedIntegerModel
+from .utils import functions
+
+
+class AlternativeGenerator:
+    """
+    依次求吨度价最低、且与已有方案配比向量的 L1 距离均不小于 min_distance 的方案，共 alternative_num 个。
+    在 MixedIntegerModel 的混合整数规划上，对每个已有方案 x^j 增加多样性割：
+        y - x^j t = p - q, p <= M b, q <= M (1 - b), sum(p + q) >= d t
+    其中 b 为 0-1 变量，p + q 即 t |x - x^j|。每次只在上一次的模型上追加一组割重新求解
+    """
+
+    def __init__(self, input_data: InputData, alternative_num: int = None, min_distance: float = None):
+        self.input_data = input_data
+        self.alternative_num = alternative_num if alternative_num is not None else input_data.alternative_num
+        self.min_distance = min_distance if min_distance is not None else input_data.alternative_distance
+        self.milp_model = MixedIntegerModel(input_data=input_data)
+        self.milp_model.keys = list(input_data.material_name_lt)
+
+    def generate_diversity_cut(self, x_prev, var_num, t_max):
+        """
+        对方案 x_prev 生成多样性割，返回新增变量的上下限、整数标记及约束 (列数 var_num + 3n)
+        """
+        n = len(x_prev)
+        # |y_i - x_i t| <= max(ub_i, x_i) * t_max
+        big_m = np.maximum(self.input_data.material_bounds_arr[:, 1], x_prev) * t_max
+        eye = sparse.identity(n, format="csr")
+        zero = sparse.csr_matrix((n, n))
+
+        def row_block(y_t_part, p_part, q_part, b_part):
+            # 已有变量 [y, t, z, 之前的割变量] 之后依次为 p, q, b
+            left = sparse.hstack([y_t_part, sparse.csr_matrix((y_t_part.shape[0], var_num - n - 1))])
+            return sparse.hstack([left, p_part, q_part, b_part], format="csr")
+
+        constraints = [
+            # y - x^j t - p + q = 0
+            LinearConstraint(
+                row_block(sparse.hstack([eye, sparse.csr_matrix(-x_prev.reshape(-1, 1))]), -eye, eye, zero), 0, 0
+            ),
+            # p - M b <= 0
+            LinearConstraint(
+                row_block(sparse.csr_matrix((n, n + 1)), eye, zero, sparse.diags(-big_m)), -np.inf, 0
+            ),
+            # q + M b <= M
+            LinearConstraint(
+                row_block(sparse.csr_matrix((n, n + 1)), zero, eye, sparse.diags(big_m)), -np.inf, big_m
+            ),
+            # sum(p + q) - d t >= 0
+            LinearConstraint(
+                row_block(
+                    sparse.csr_matrix(np.append(np.zeros(n), -self.min_distance)),
+                    sparse.csr_matrix(np.ones((1, n))),
+                    sparse.csr_matrix(np.ones((1, n))),
+                    sparse.csr_matrix((1, n))
+                ),
+                0, np.inf
+            ),
+        ]
+        lb = np.zeros(3 * n)
+        ub = np.concatenate([big_m, big_m, np.ones(n)])
+        integrality = np.concatenate([np.zeros(2 * n), np.ones(n)])
+        return lb, ub, integrality, constraints
+
+    @staticmethod
+    def extend_constraint(constraint: LinearConstraint, col_num):
+        # 追加割变量后，已有约束补零列
+        A = sparse.csr_matrix(constraint.A)
+        A = sparse.hstack([A, sparse.csr_matrix((A.shape[0], col_num - A.shape[1]))], format="csr")
+        return LinearConstraint(A, constraint.lb, constraint.ub)
+
+    @staticmethod
+    def is_worse(result, other_result, tolerance=1e-6):
+        # result 比 other_result 差 (不可行或吨度价更高)
+        if not other_result.success:
+            return False
+        return not result.success or result.fun > other_result.fun + tolerance * max(1.0, abs(other_result.fun))
+
+    def run(self, best_result=None, is_global_optimum=False):
+        """
+        best_result 为已求得的方案 (OptimizeResult)。多样性割以全局最优方案为起点：
+        is_global_optimum 为 True (线性规划或混合整数规划引擎求得) 时直接使用 best_result，
+        否则先求混合整数规划的最优方案，best_result 更差 (如 SLSQP 停在局部解) 时改用后者。
+        返回 [(配比, 吨度价), ...]，按吨度价从低到高
+        """
+        st = time.time()
+        n = len(self.input_data.material_name_lt)
+        if best_result is None or not (is_global_optimum and best_result.success):
+            milp_result = self.milp_model.solve_milp()
+            if best_result is None or self.is_worse(best_result, milp_result):
+                if best_result is not None:
+                    logging.warning("best result objective {} is worse than the milp optimum {}, alternatives "
+                                    "start from the milp optimum".format(best_result.fun, milp_result.fun))
+                best_result = milp_result
+        results = [(np.asarray(best_result.x, dtype=float).copy(), float(best_result.fun))]
+        if not best_result.success:
+            return results
+
+        c, constraints, integrality, variable_bounds = self.milp_model.generate_milp()
+        _, t_max = self.milp_model.get_t_bounds()
+        lb, ub = variable_bounds.lb, variable_bounds.ub
+        time_limit = self.input_data.time_limit
+
+        while len(results) < self.alternative_num:
+            remaining_time = time_limit - (time.time() - st)
+            if remaining_time <= 0:
+                logging.warning("alternative search stopped by time limit, {} found".format(len(results)))
+                break
+
+            cut_lb, cut_ub, cut_integrality, cut_constraints = self.generate_diversity_cut(
+                x_prev=results[-1][0], var_num=len(c), t_max=t_max
+            )
+            c = np.concatenate([c, np.zeros(3 * n)])
+            lb = np.concatenate([lb, cut_lb])
+            ub = np.concatenate([ub, cut_ub])
+            integrality = np.concatenate([integrality, cut_integrality])
+            constraints = [self.extend_constraint(con, len(c)) for con in constraints] + cut_constraints
+
+            with functions.redirect_stdout_to_stderr():
+                res = milp(
+                    c, constraints=constraints, integrality=integrality, bounds=Bounds(lb, ub),
+                    options={"time_limit": float(remaining_time)}
+                )
+            if res.x is None:
+                logging.info("no more alternative blends: {}".format(res.message))
+                break
+            x = res.x[:n] / res.x[n]
+            results.append((x, float(res.fun)))
+            logging.info("alternative {} objective: {}, distance to best: {}".format(
+                len(results) - 1, res.fun, np.abs(x - results[0][0]).sum()
+            ))
+
+        # 达到时间上限的解不一定最优，按吨度价重新排序
+        results.sort(key=lambda item: item[1])
+        logging.info("alternative generation time: {}s".format(time.time() - st))
+        return results
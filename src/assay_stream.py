@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+import logging
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from .input_data import InputData
+from .solver_session import SolverSession
+from .utils import enums, field, header
+
+
+class AssayStream:
+    """
+    跟踪化验结果文件 (LIMS 导出的 CSV 或 JSON 行) 的新增内容，逐条就地更新原料化验值：
+    1. 每条记录为一种原料的若干成分，CSV 首行为表头 (存货, 成分名...)，JSON 行为 {"存货": ..., 成分名: 值}
+    2. 记录只涉及当前配比之外的原料且其缩减成本仍非负时，当前方案仍最优，不重新求解；否则热启动重解
+    3. 每条记录输出一条配矿推荐 (是否重解、吨度价、配比) 及从读到记录到给出推荐的延迟，追加写入 output_file
+    """
+
+    def __init__(
+            self,
+            input_data: InputData,
+            assay_file: str,
+            output_file: str = None,
+            poll_interval: float = 0.5
+    ):
+        self.input_data = input_data
+        self.assay_file = assay_file
+        self.output_file = output_file or "{}{}".format(input_data.exe_folder, field.ASSAY_STREAM_RESULT_FILENAME)
+        self.poll_interval = poll_interval
+        self.session = SolverSession(input_data=input_data)
+        self.is_csv = assay_file.lower().endswith(".csv")
+        # 已读取的位置与 CSV 表头
+        self.offset = 0
+        self.csv_columns: List[str] = []
+        self.recommendation_lt: List[Dict] = []
+
+    # region 读取
+    def read_new_lines(self):
+        # 只返回完整的行，未写完的最后一行留到下次读取
+        if not os.path.exists(self.assay_file):
+            return []
+        with open(self.assay_file, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        return data[:end].decode("utf-8-sig").splitlines()
+
+    def parse_line(self, line: str):
+        if not line.strip():
+            return None
+        if not self.is_csv:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logging.warning("invalid assay line skipped: {}, {}".format(line, e))
+                return None
+            if not isinstance(record, dict):
+                logging.warning("invalid assay line skipped: {}".format(line))
+                return None
+            return record
+        try:
+            values = next(csv.reader(io.StringIO(line)))
+        except csv.Error as e:
+            logging.warning("invalid assay line skipped: {}, {}".format(line, e))
+            return None
+        if not self.csv_columns:
+            self.csv_columns = [value.strip() for value in values]
+            return None
+        return dict(zip(self.csv_columns, values))
+
+    def parse_record(self, record: Dict):
+        """
+        返回 (原料名, {成分: 化验值})，未知原料、化验值无法解析或没有可识别的成分时返回 None
+        """
+        material_name = record.get(header.MaterialHeader.material_name)
+        if not isinstance(material_name, str) or material_name not in self.input_data.material_index:
+            logging.warning("assay for unknown material skipped: {}".format(material_name))
+            return None
+        content_dict = dict()
+        for cc_name in enums.CHEMICAL_COMPONENT_LT:
+            value = record.get(cc_name)
+            if value is None or value == "":
+                continue
+            try:
+                content = float(value)
+            except (TypeError, ValueError):
+                content = np.nan
+            if not np.isfinite(content):
+                # 一条记录中有无法解析的化验值时整条跳过，不部分更新
+                logging.warning("invalid assay record skipped: {}, {} = {}".format(record, cc_name, value))
+                return None
+            content_dict[cc_name] = content
+        if not content_dict:
+            return None
+        return material_name, content_dict
+
+    # endregion
+
+    def process_record(self, record: Dict, st: float = None):
+        st = st or time.perf_counter()
+        parsed = self.parse_record(record)
+        if parsed is None:
+            return None
+        material_name, content_dict = parsed
+        self.session.update_assay({material_name: content_dict})
+        result, resolved = self.session.resolve_if_needed()
+
+        x = np.asarray(result.x)
+        used = np.flatnonzero(x > 1e-9)
+        recommendation = {
+            "material_name": material_name,
+            "assay": content_dict,
+            "resolved": resolved,
+            "success": bool(result.success),
+            "objective": float(result.fun),
+            "ratio": {self.session.keys[i]: float(x[i]) for i in used},
+            "latency": time.perf_counter() - st,
+        }
+        logging.info("assay update of {}: resolved: {}, objective: {}, latency: {}s".format(
+            material_name, resolved, recommendation["objective"], recommendation["latency"]
+        ))
+        self.recommendation_lt.append(recommendation)
+        with open(self.output_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(recommendation, ensure_ascii=False) + "\n")
+        return recommendation
+
+    def poll(self):
+        recommendation_lt = []
+        for line in self.read_new_lines():
+            st = time.perf_counter()
+            record = self.parse_line(line)
+            if record is None:
+                continue
+            recommendation = self.process_record(record=record, st=st)
+            if recommendation is not None:
+                recommendation_lt.append(recommendation)
+        return recommendation_lt
+
+    def run(self, idle_timeout: float = None, from_start: bool = False):
+        """
+        先完整求解一次，再持续跟踪文件；from_start 为 False 时跳过文件中已有的记录 (CSV 表头仍会读取)，
+        idle_timeout 秒内没有新记录时结束，为 None 时一直运行
+        """
+        self.session.solve()
+        if not from_start and os.path.exists(self.assay_file):
+            lines = self.read_new_lines()
+            if self.is_csv and lines:
+                self.parse_line(lines[0])
+
+        last_time = time.time()
+        while idle_timeout is None or time.time() - last_time < idle_timeout:
+            if self.poll():
+                last_time = time.time()
+            else:
+                time.sleep(self.poll_interval)
+
+        if self.recommendation_lt:
+            latency_arr = np.array([r["latency"] for r in self.recommendation_lt])
+            logging.info("{} assay updates, {} resolved, latency mean: {}s, max: {}s".format(
+                len(latency_arr), sum(r["resolved"] for r in self.recommendation_lt),
+                latency_arr.mean(), latency_arr.max()
+            ))
+        return self.recommendation_lt
@@ -0,0 +1,227 @@
+import copy
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from .input_data import InputData
+from .engine import create_model
+from .utils import field, header
+
+# 子进程中的公共输入数据，由 _init_worker 在进程启动时设置一次
+_base_input_data = None
+
+
+class Scenario:
+    def __init__(self, scenario_name: str, file_path: str, sheet_suffix: str = ""):
+        self.scenario_name = scenario_name
+        self.file_path = file_path
+        # 场景工作表名为 "<标准工作表名><sheet_suffix>"，为空时直接使用标准工作表名
+        self.sheet_suffix = sheet_suffix
+
+    def __str__(self):
+        return "{} {}{}".format(self.scenario_name, self.file_path, self.sheet_suffix)
+
+
+def load_scenario_input_data(base_input_data: InputData, scenario: Scenario) -> InputData:
+    """
+    在公共输入数据的基础上，用场景工作簿中存在的工作表覆盖对应数据，缺失的工作表沿用公共数据
+    """
+    input_data = copy.deepcopy(base_input_data)
+    input_data.exe_folder = os.path.dirname(scenario.file_path) + os.sep
+    input_data.file_name = os.path.basename(scenario.file_path)
+
+    time_param_sheet = field.TIME_PARAM_SHEET + scenario.sheet_suffix
+    chemical_compound_sheet = field.CHEMICAL_COMPOUND_SHEET + scenario.sheet_suffix
+    material_sheet = field.MATERIAL_SHEET + scenario.sheet_suffix
+    # 一次读取场景中存在的工作表
+    sheet_df_dict = input_data.read_workbook(
+        sheet_names=[time_param_sheet, chemical_compound_sheet, material_sheet]
+    )
+
+    if time_param_sheet in sheet_df_dict:
+        input_data.load_time_param(sheet_name=time_param_sheet)
+    if chemical_compound_sheet in sheet_df_dict:
+        input_data.load_chemical_compound_dict(sheet_name=chemical_compound_sheet)
+    if material_sheet in sheet_df_dict:
+        input_data.load_material_dict(sheet_name=material_sheet)
+    input_data.build_matrix()
+    input_data.sheet_df_dict = dict()
+    return input_data
+
+
+def _init_worker(base_input_data: InputData):
+    global _base_input_data
+    _base_input_data = base_input_data
+
+
+def _solve_scenario(scenario: Scenario):
+    st = time.time()
+    try:
+        input_data = load_scenario_input_data(base_input_data=_base_input_data, scenario=scenario)
+        model = create_model(input_data=input_data)
+        result, _ = model.run_model()
+        violations = model.get_violations(result_x=result.x)
+        return {
+            "scenario_name": scenario.scenario_name,
+            "success": bool(result.success),
+            "objective": float(result.fun),
+            "violation_num": len(violations),
+            "message": str(result.message),
+            "ratio": dict(zip(model.keys, result.x)),
+            "elapsed_time": time.time() - st,
+        }
+    except Exception as e:
+        logging.exception("scenario {} failed".format(scenario.scenario_name))
+        return {
+            "scenario_name": scenario.scenario_name,
+            "success": False,
+            "objective": None,
+            "violation_num": None,
+            "message": "{}: {}".format(type(e).__name__, e),
+            "ratio": dict(),
+            "elapsed_time": time.time() - st,
+        }
+
+
+class BatchRunner:
+    def __init__(
+            self,
+            base_input_data: InputData,
+            scenario_path: str,
+            output_file: str = None,
+            max_workers: int = None
+    ):
+        self.base_input_data = base_input_data
+        self.scenario_path = scenario_path
+        self.output_file = output_file or "{}{}".format(base_input_data.exe_folder, field.BATCH_RESULT_FILENAME)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.scenario_lt: List[Scenario] = []
+        self.results = []
+
+    # region 场景识别
+    def generate_scenarios_from_folder(self):
+        scenarios = []
+        output_path = os.path.abspath(self.output_file)
+        for file_path in sorted(glob.glob(os.path.join(self.scenario_path, "*.xlsx"))):
+            file_name = os.path.basename(file_path)
+            # 跳过 Excel 临时文件与批量结果文件
+            if file_name.startswith("~$") or os.path.abspath(file_path) == output_path:
+                continue
+            scenarios.append(Scenario(scenario_name=os.path.splitext(file_name)[0], file_path=file_path))
+        return scenarios
+
+    def generate_scenarios_from_manifest(self):
+        smh = header.ScenarioManifestHeader
+        manifest_df = pd.read_csv(self.scenario_path).dropna(subset=[smh.scenario_name, smh.file_path])
+        manifest_folder = os.path.dirname(os.path.abspath(self.scenario_path))
+
+        if smh.sheet_suffix in manifest_df:
+            sheet_suffix_lt = manifest_df[smh.sheet_suffix].tolist()
+        else:
+            sheet_suffix_lt = [np.nan] * len(manifest_df)
+        scenarios = []
+        for scenario_name, file_path, sheet_suffix in zip(
+                manifest_df[smh.scenario_name], manifest_df[smh.file_path], sheet_suffix_lt
+        ):
+            if not os.path.isabs(file_path):
+                file_path = os.path.join(manifest_folder, file_path)
+            scenarios.append(Scenario(
+                scenario_name=str(scenario_name),
+                file_path=file_path,
+                sheet_suffix="" if pd.isna(sheet_suffix) else "{}{}".format(field.SCENARIO_SHEET_SEP, sheet_suffix)
+            ))
+        return scenarios
+
+    def generate_scenarios_from_workbook(self):
+        wb = openpyxl.load_workbook(self.scenario_path, read_only=True)
+        sheet_names = wb.sheetnames
+        wb.close()
+
+        suffix_lt = []
+        for sheet_name in sheet_names:
+            for standard_sheet in [field.MATERIAL_SHEET, field.CHEMICAL_COMPOUND_SHEET, field.TIME_PARAM_SHEET]:
+                prefix = standard_sheet + field.SCENARIO_SHEET_SEP
+                if sheet_name.startswith(prefix) and sheet_name[len(prefix):] not in suffix_lt:
+                    suffix_lt.append(sheet_name[len(prefix):])
+        return [
+            Scenario(
+                scenario_name=suffix,
+                file_path=self.scenario_path,
+                sheet_suffix="{}{}".format(field.SCENARIO_SHEET_SEP, suffix)
+            )
+            for suffix in suffix_lt
+        ]
+
+    def generate_scenarios(self):
+        if os.path.isdir(self.scenario_path):
+            scenarios = self.generate_scenarios_from_folder()
+        elif self.scenario_path.lower().endswith(".csv"):
+            scenarios = self.generate_scenarios_from_manifest()
+        else:
+            scenarios = self.generate_scenarios_from_workbook()
+        # 场景名用作结果配比表的列名，不能重复
+        scenario_name_lt = [scenario.scenario_name for scenario in scenarios]
+        duplicate_name_lt = sorted({name for name in scenario_name_lt if scenario_name_lt.count(name) > 1})
+        if duplicate_name_lt:
+            raise ValueError("duplicate scenario names in {}: {}".format(self.scenario_path, duplicate_name_lt))
+        logging.info("{} scenarios found in {}".format(len(scenarios), self.scenario_path))
+        return scenarios
+
+    # endregion
+
+    def run(self):
+        st = time.time()
+        self.scenario_lt = self.generate_scenarios()
+
+        results = [None] * len(self.scenario_lt)
+        with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.base_input_data,)
+        ) as executor:
+            future_dict = {
+                executor.submit(_solve_scenario, scenario): i for i, scenario in enumerate(self.scenario_lt)
+            }
+            for future in as_completed(future_dict):
+                result = future.result()
+                results[future_dict[future]] = result
+                logging.info("scenario {} finished, objective: {}, message: {}".format(
+                    result["scenario_name"], result["objective"], result["message"]
+                ))
+        # 按场景顺序输出
+        self.results = results
+        logging.info("batch of {} scenarios finished in {}s".format(len(self.results), time.time() - st))
+        return self.results
+
+    def write_to_excel(self):
+        brh = header.BatchResultHeader
+
+        summary_df = pd.DataFrame(
+            [
+                {
+                    brh.scenario_name: result["scenario_name"],
+                    brh.success: result["success"],
+                    brh.objective: result["objective"],
+                    brh.violation_num: result["violation_num"],
+                    brh.elapsed_time: result["elapsed_time"],
+                    brh.message: result["message"],
+                }
+                for result in self.results
+            ],
+            columns=[brh.scenario_name, brh.success, brh.objective, brh.violation_num, brh.elapsed_time, brh.message]
+        )
+        # 各场景的原料集合可能不同，按原料名对齐
+        ratio_df = pd.DataFrame({result["scenario_name"]: pd.Series(result["ratio"]) for result in self.results})
+        ratio_df.index.name = brh.material_name
+
+        with pd.ExcelWriter(self.output_file, engine='openpyxl') as writer:
+            summary_df.to_excel(writer, sheet_name=field.BATCH_SUMMARY_SHEET, index=False)
+            ratio_df.to_excel(writer, sheet_name=field.BATCH_RATIO_SHEET)
+        logging.info("batch results written to {}".format(self.output_file))
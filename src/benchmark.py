@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .input_data import InputData
+from .initial_sol import InitialSolution
+from .lp_model import LinearFractionalModel
+from .model import Model
+from .engine import create_model
+from .result_storage import ResultStorage
+from .utils import enums, field, header
+
+# 合成原料化验值的取值范围，参考 dataset 中的数据
+ASSAY_RANGE_DICT = {
+    enums.ChemicalCompoundName.TFe: (38, 68),
+    enums.ChemicalCompoundName.CaO: (0, 12),
+    enums.ChemicalCompoundName.SiO2: (0.5, 12),
+    enums.ChemicalCompoundName.MgO: (0, 4),
+    enums.ChemicalCompoundName.Al2O3: (0.2, 6),
+    enums.ChemicalCompoundName.P: (0.01, 0.2),
+    enums.ChemicalCompoundName.S: (0, 0.5),
+    enums.ChemicalCompoundName.V2O5: (0, 0.002),
+    enums.ChemicalCompoundName.Cr: (0, 0.1),
+    enums.ChemicalCompoundName.TiO2: (0, 1),
+    enums.ChemicalCompoundName.Zn: (0, 0.1),
+    enums.ChemicalCompoundName.Ni: (0, 0.05),
+    enums.ChemicalCompoundName.MnO: (0, 0.5),
+    enums.ChemicalCompoundName.K2O: (0, 0.1),
+    enums.ChemicalCompoundName.Na2O: (0, 0.1),
+    enums.ChemicalCompoundName.Pb: (0, 0.01),
+    enums.ChemicalCompoundName.CuO: (0, 0.05),
+    enums.ChemicalCompoundName.H2O: (4, 12),
+    enums.ChemicalCompoundName.FeO: (0, 10),
+    enums.ChemicalCompoundName.burning_loss: (-2, 6),
+}
+# 只设上限的杂质成分
+IMPURITY_LT = [
+    enums.ChemicalCompoundName.SiO2,
+    enums.ChemicalCompoundName.Al2O3,
+    enums.ChemicalCompoundName.P,
+    enums.ChemicalCompoundName.S,
+    enums.ChemicalCompoundName.H2O,
+]
+
+# 默认测试集：SLSQP 每次迭代为稠密 O(n^2)，只在小规模上运行；线性规划为稀疏格式，测到两万种原料
+DEFAULT_CASE_LT = [
+    {"material_num": material_num, "spec_type": spec_type, "solver_engine": solver_engine, "seed": 0}
+    for material_num in (10, 100, 1000, 5000, 20000)
+    for spec_type in (enums.SpecType.TIGHT, enums.SpecType.LOOSE)
+    for solver_engine in (enums.SolverEngine.LP, enums.SolverEngine.SLSQP)
+    if solver_engine == enums.SolverEngine.LP or material_num <= 100
+]
+
+
+def generate_instance(material_num: int, spec_type: str, seed: int, file_path: str):
+    """
+    生成一个可行的合成配矿工作簿：先随机取一个参考配比，再以参考配比的成分值为中心设置产品成分上下限，
+    tight 为窄区间，loose 为宽区间
+    """
+    mh = header.MaterialHeader
+    cch = header.ChemicalCompoundHeader
+    tph = header.TimeParamHeader
+    cc_lt = enums.CHEMICAL_COMPONENT_LT
+    rng = np.random.default_rng(seed)
+
+    low_arr = np.array([ASSAY_RANGE_DICT[cc_name][0] for cc_name in cc_lt])
+    high_arr = np.array([ASSAY_RANGE_DICT[cc_name][1] for cc_name in cc_lt])
+    assay_matrix = rng.uniform(low_arr, high_arr, size=(material_num, len(cc_lt)))
+    tfe_arr = assay_matrix[:, cc_lt.index(enums.ChemicalCompoundName.TFe)]
+    moisture_arr = assay_matrix[:, cc_lt.index(enums.ChemicalCompoundName.H2O)]
+    # 湿基价大致随品位上升
+    wet_price_arr = np.round(14 * tfe_arr * rng.uniform(0.8, 1.2, material_num) - 100, 1)
+
+    # 参考配比取自最多 8 种原料
+    x0 = np.zeros(material_num)
+    used = rng.choice(material_num, size=min(material_num, 8), replace=False)
+    x0[used] = 100 * rng.dirichlet(np.ones(len(used)))
+    up_bound_arr = np.full(material_num, 100.0)
+    capped = rng.random(material_num) < 0.2
+    up_bound_arr[capped] = np.maximum(np.round(rng.uniform(5, 60, capped.sum()), 1), np.ceil(x0[capped]) + 1)
+    up_bound_arr = np.minimum(up_bound_arr, 100)
+
+    wet_x0 = x0 / (1 - moisture_arr / 100)
+    value_arr = x0 @ assay_matrix / 100
+    value_arr[cc_lt.index(enums.ChemicalCompoundName.H2O)] = wet_x0 @ moisture_arr / wet_x0.sum()
+    margin = 0.02 if spec_type == enums.SpecType.TIGHT else 0.2
+    spec_rows = []
+    for j, cc_name in enumerate(cc_lt):
+        if cc_name == enums.ChemicalCompoundName.TFe:
+            spec_rows.append((cc_name, round(value_arr[j] * (1 - margin), 3), 100))
+        elif cc_name in IMPURITY_LT:
+            spec_rows.append((cc_name, 0, round(value_arr[j] * (1 + margin) + 1e-3, 4)))
+        else:
+            spec_rows.append((cc_name, 0, 100))
+
+    material_df = pd.DataFrame({
+        mh.material_name: ["存货{}".format(i + 1) for i in range(material_num)],
+        mh.wet_price: wet_price_arr,
+        mh.dry_price: np.nan,
+        mh.low_bound: 0.0,
+        mh.ratio: np.nan,
+        mh.up_bound: up_bound_arr,
+    })
+    material_df = pd.concat([material_df, pd.DataFrame(np.round(assay_matrix, 4), columns=cc_lt)], axis=1)
+    spec_df = pd.DataFrame(spec_rows, columns=[cch.chemical_compound_name, cch.low_bound, cch.up_bound])
+    time_param_df = pd.DataFrame({tph.param_name: [tph.time_limit], tph.param_value: [30]})
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        material_df.to_excel(writer, sheet_name=field.MATERIAL_SHEET, index=False)
+        spec_df.to_excel(writer, sheet_name=field.CHEMICAL_COMPOUND_SHEET, index=False)
+        time_param_df.to_excel(writer, sheet_name=field.TIME_PARAM_SHEET, index=False)
+
+
+class BenchmarkRunner:
+    """
+    对合成算例逐个计时：读取、InitialSolution.run_model (SLSQP 引擎)、模型求解、ResultStorage 写回，
+    并以线性规划的全局最优为参考计算目标差距。结果写为 JSON，可与基线比较发现性能或质量回退
+    """
+
+    def __init__(
+            self,
+            output_folder: str,
+            case_lt: List[Dict] = None,
+            time_tolerance: float = 0.5,
+            min_time_diff: float = 0.1,
+            gap_tolerance: float = 1e-4
+    ):
+        self.output_folder = output_folder
+        self.case_lt = case_lt or DEFAULT_CASE_LT
+        # 耗时超过基线 (1 + time_tolerance) 倍且多出 min_time_diff 秒时视为回退
+        self.time_tolerance = time_tolerance
+        self.min_time_diff = min_time_diff
+        self.gap_tolerance = gap_tolerance
+        self.record_lt: List[Dict] = []
+
+    @staticmethod
+    def get_case_name(case: Dict):
+        return "{}_{}_{}_{}".format(case["material_num"], case["spec_type"], case["solver_engine"], case["seed"])
+
+    def run_case(self, case: Dict):
+        case_name = self.get_case_name(case)
+        file_name = "{}.xlsx".format(case_name)
+        generate_instance(
+            material_num=case["material_num"],
+            spec_type=case["spec_type"],
+            seed=case["seed"],
+            file_path=self.output_folder + file_name
+        )
+        record = dict(case, case_name=case_name)
+
+        st = time.time()
+        input_data = InputData(exe_folder=self.output_folder, file_name=file_name, use_cache=False)
+        input_data.read_data()
+        input_data.solver_engine = case["solver_engine"]
+        record["load_time"] = time.time() - st
+
+        st = time.time()
+        reference_model = LinearFractionalModel(input_data=input_data)
+        reference_result, _ = reference_model.run_model()
+        record["reference_time"] = time.time() - st
+        record["reference_objective"] = float(reference_result.fun)
+
+        st = time.time()
+        if case["solver_engine"] == enums.SolverEngine.SLSQP:
+            initial_x = InitialSolution(input_data=input_data).run_model()
+            record["initial_solution_time"] = time.time() - st
+            st = time.time()
+            model = Model(input_data=input_data, initial_x=initial_x)
+        else:
+            record["initial_solution_time"] = 0.0
+            model = create_model(input_data=input_data)
+        result, multi_results = model.run_model()
+        record["model_time"] = time.time() - st
+        # 线性规划分别记录建模与求解耗时及约束矩阵非零元个数
+        record["lp_build_time"] = reference_model.build_time
+        record["lp_solve_time"] = reference_model.solve_time
+        record["lp_nonzero_num"] = int(reference_model.A_ub.nnz + reference_model.A_eq.nnz)
+        record["objective"] = float(result.fun)
+        record["success"] = bool(result.success)
+        record["violation_num"] = len(model.get_violations(result_x=result.x))
+        record["gap"] = (record["objective"] - record["reference_objective"]) / abs(record["reference_objective"])
+
+        st = time.time()
+        ResultStorage(
+            input_data=input_data, keys=model.keys, result=result, multi_results=multi_results
+        ).write_to_excel()
+        record["write_time"] = time.time() - st
+        logging.info("benchmark {}: {}".format(case_name, record))
+        return record
+
+    def run(self):
+        os.makedirs(self.output_folder, exist_ok=True)
+        self.record_lt = [self.run_case(case) for case in self.case_lt]
+        return self.record_lt
+
+    def write_results(self, file_path: str = None):
+        file_path = file_path or self.output_folder + field.BENCHMARK_RESULT_FILENAME
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.record_lt, f, ensure_ascii=False, indent=2)
+        logging.info("benchmark results written to {}".format(file_path))
+
+    def compare_with_baseline(self, baseline_file: str):
+        """
+        与基线结果逐个算例比较，返回回退说明列表，为空表示没有回退
+        """
+        with open(baseline_file, 'r', encoding='utf-8') as f:
+            baseline_dict = {record["case_name"]: record for record in json.load(f)}
+
+        regression_lt = []
+        for record in self.record_lt:
+            baseline = baseline_dict.get(record["case_name"])
+            if baseline is None:
+                continue
+            if baseline["success"] and not record["success"]:
+                regression_lt.append("{}: solve no longer succeeds".format(record["case_name"]))
+            if record["gap"] > baseline["gap"] + self.gap_tolerance:
+                regression_lt.append("{}: gap {} > baseline {}".format(
+                    record["case_name"], record["gap"], baseline["gap"]
+                ))
+            for time_key in ("load_time", "initial_solution_time", "model_time", "write_time"):
+                if (
+                        record[time_key] > baseline[time_key] * (1 + self.time_tolerance)
+                        and record[time_key] - baseline[time_key] > self.min_time_diff
+                ):
+                    regression_lt.append("{}: {} {}s > baseline {}s".format(
+                        record["case_name"], time_key, record[time_key], baseline[time_key]
+                    ))
+        for regression in regression_lt:
+            logging.error("regression: {}".format(regression))
+        return regression_lt
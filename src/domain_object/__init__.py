@@ -1,3 +1,3 @@
 from .material import Material
 from .chemical_compound import ChemicalCompound
-
+from .material_table import MaterialTable
@@ -2,6 +2,8 @@ from typing import Tuple
 
 
 class ChemicalCompound:
+    __slots__ = ("chemical_compound_name", "ratio_bounds")
+
     def __init__(
             self,
             chemical_compound_name: str,
@@ -1,25 +1,70 @@
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
 from ..utils import enums
 
 
 class Material:
-    def __init__(
-            self,
-            material_name: str,
-            wet_price: float,
-            low_bound: float,
-            up_bound: float,
-    ):
-        self.material_name: str = material_name
-        self.wet_price: float = wet_price
-        self.chemical_compound_content: Dict[str, float] = dict()
+    """
+    MaterialTable 第 index 行的视图，不单独保存数据，读写均作用于表中的数组
+    """
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index: int):
+        self.table = table
+        self.index: int = index
+
+    @property
+    def material_name(self) -> str:
+        return self.table.material_name_lt[self.index]
+
+    @property
+    def wet_price(self) -> float:
+        return self.table.wet_price_arr.item(self.index)
+
+    @wet_price.setter
+    def wet_price(self, wet_price: float):
+        # 同步更新缓存的干基价
+        self.table.wet_price_arr[self.index] = wet_price
+        self.table.dry_price_arr[self.index] = wet_price / self.table.dry_factor_arr[self.index]
+
+    @property
+    def dry_factor(self) -> float:
+        return self.table.dry_factor_arr.item(self.index)
 
-        # 约束
-        self.ratio_bounds: Tuple[float, float] = (low_bound, up_bound)
+    @property
+    def dry_price(self) -> float:
+        return self.table.dry_price_arr.item(self.index)
+
+    @property
+    def chemical_compound_content(self) -> Dict[str, float]:
+        # 只读副本，逐个成分读取时用 get_content
+        return dict(zip(enums.CHEMICAL_COMPONENT_LT, self.table.assay_matrix[self.index].tolist()))
+
+    def get_content(self, chemical_compound_name: str) -> float:
+        return self.table.assay_matrix.item(self.index, self.table.assay_index[chemical_compound_name])
+
+    # 约束
+    @property
+    def ratio_bounds(self) -> Tuple[float, float]:
+        low_bound, up_bound = self.table.material_bounds_arr[self.index]
+        return float(low_bound), float(up_bound)
+
+    @ratio_bounds.setter
+    def ratio_bounds(self, ratio_bounds: Tuple[float, float]):
+        self.table.material_bounds_arr[self.index] = ratio_bounds
 
     @property
-    def dry_price(self):
-        return self.wet_price / (1 - self.chemical_compound_content.get(enums.ChemicalCompoundName.H2O, 0) / 100)
+    def min_usage_ratio(self) -> float:
+        # 使用时的最小配比 (不用时为 0)
+        return self.table.min_usage_arr.item(self.index)
+
+    @property
+    def force_usage(self) -> Optional[bool]:
+        # True 必须使用，False 禁止使用，None 由模型决定
+        force_usage = self.table.force_usage_arr[self.index]
+        return None if np.isnan(force_usage) else bool(force_usage)
 
     def __str__(self):
         return "{} {} {} ({} {})".format(
@@ -29,4 +74,3 @@ class Material:
             self.ratio_bounds[0],
             self.ratio_bounds[1]
         )
-
@@ -0,0 +1,75 @@
+from typing import List
+
+import numpy as np
+
+from ..utils import enums
+from .material import Material
+
+
+class MaterialTable:
+    """
+    原料的列式存储：每个字段为一个 NumPy 数组，行顺序与 material_name_lt 一致。
+    干基系数 1 - H2O / 100 与干基价缓存为数组，修改湿基价时同步更新；
+    修改化验值用 InputData.update_assay，就地同步水分、干基系数、干基价等派生数组，不需要重新 build_matrix。
+    按原料名取值返回轻量的 Material 视图，用法与 Dict[str, Material] 相同
+    """
+
+    def __init__(
+            self,
+            material_name_lt: List[str],
+            wet_price_arr,
+            material_bounds_arr,
+            min_usage_arr,
+            force_usage_arr,
+            assay_matrix
+    ):
+        self.material_name_lt: List[str] = list(material_name_lt)
+        self.material_index = {name: i for i, name in enumerate(self.material_name_lt)}
+        self.wet_price_arr = wet_price_arr
+        self.material_bounds_arr = material_bounds_arr
+        self.min_usage_arr = min_usage_arr
+        # 1 必须使用，0 禁止使用，nan 由模型决定
+        self.force_usage_arr = force_usage_arr
+        # 原料 × enums.CHEMICAL_COMPONENT_LT
+        self.assay_matrix = assay_matrix
+        self.assay_index = {cc_name: j for j, cc_name in enumerate(enums.CHEMICAL_COMPONENT_LT)}
+        self.moisture_arr = np.zeros(0)
+        self.dry_factor_arr = np.zeros(0)
+        self.dry_price_arr = np.zeros(0)
+        self.refresh_derived()
+        # 视图在第一次按原料访问时创建一次
+        self.view_lt: List[Material] = []
+
+    def refresh_derived(self):
+        self.moisture_arr = self.assay_matrix[:, enums.CHEMICAL_COMPONENT_LT.index(enums.ChemicalCompoundName.H2O)]
+        self.dry_factor_arr = 1 - self.moisture_arr / 100
+        self.dry_price_arr = self.wet_price_arr / self.dry_factor_arr
+
+    # region 字典接口
+    def get_views(self):
+        if len(self.view_lt) != len(self.material_name_lt):
+            self.view_lt = [Material(table=self, index=i) for i in range(len(self.material_name_lt))]
+        return self.view_lt
+
+    def __len__(self):
+        return len(self.material_name_lt)
+
+    def __iter__(self):
+        return iter(self.material_name_lt)
+
+    def __contains__(self, material_name):
+        return material_name in self.material_index
+
+    def __getitem__(self, material_name: str) -> Material:
+        return self.get_views()[self.material_index[material_name]]
+
+    def keys(self):
+        return list(self.material_name_lt)
+
+    def values(self):
+        return list(self.get_views())
+
+    def items(self):
+        return list(zip(self.material_name_lt, self.get_views()))
+
+    # endregion
@@ -0,0 +1,22 @@
+from .input_data import InputData
+from .model import Model
+from .lp_model import LinearFractionalModel
+from .milp_model import MixedIntegerModel
+from .multi_start import MultiStartModel
+from .initial_sol import InitialSolution
+from .utils import enums
+
+
+def create_model(input_data: InputData) -> Model:
+    # 按 input_data.solver_engine 创建求解模型
+    if input_data.solver_engine == enums.SolverEngine.SLSQP:
+        initial_run = InitialSolution(input_data=input_data)
+        initial_x_ratio_sol = initial_run.run_model()
+        return Model(input_data=input_data, initial_x=initial_x_ratio_sol)
+    elif input_data.solver_engine == enums.SolverEngine.MULTI_START:
+        return MultiStartModel(input_data=input_data)
+    elif input_data.solver_engine == enums.SolverEngine.MILP or input_data.has_integer_rules():
+        # 有最大原料数、最小用量或强制使用规则时线性规划无法表达，改用混合整数规划
+        return MixedIntegerModel(input_data=input_data)
+    else:
+        return LinearFractionalModel(input_data=input_data)
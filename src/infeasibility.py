@@ -0,0 +1,207 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+from .input_data import InputData
+from .io_backend import generate_run_id
+from .utils import enums, field, header
+
+
+class InfeasibilityDiagnosis:
+    """
+    配比约束不可行时的诊断：
+    1. 用弹性过滤 + 删除过滤求一个不可约冲突约束集 (IIS)，去掉其中任何一个约束后其余约束可行
+    2. 用线性规划求使约束可行的最小放宽量 (各上下限放宽量之和最小，即 L1 范数)
+    配比之和为 100 与配比非负视为硬约束，原料上下限与成分上下限为可放宽的候选约束
+    """
+
+    def __init__(self, input_data: InputData, tolerance: float = 1e-7):
+        self.input_data = input_data
+        self.tolerance = tolerance
+        # 候选约束 A x <= b，行信息依次为 (对象, enums.BoundType, 原值)
+        self.A = None
+        self.b = None
+        self.slack_scale = None
+        self.row_info_lt = []
+        self.conflict_row_lt = []
+        self.relaxation_dict = dict()
+
+    # region 约束定义
+    def generate_candidate_constraints(self):
+        bt = enums.BoundType
+        n = len(self.input_data.material_name_lt)
+        bounds_arr = self.input_data.material_bounds_arr
+
+        # 下限为 0、上限为 100 的原料约束被硬约束蕴含，不作为候选
+        low_index = np.flatnonzero(bounds_arr[:, 0] > 0)
+        up_index = np.flatnonzero(bounds_arr[:, 1] < 100)
+        A_low = -sparse.identity(n, format="csr")[low_index]
+        A_up = sparse.identity(n, format="csr")[up_index]
+
+        content = self.input_data.cc_content_matrix
+        cc_bounds_arr = self.input_data.cc_bounds_arr
+        weight = np.ones_like(content)
+        if self.input_data.h2o_index is not None:
+            weight[:, self.input_data.h2o_index] = 1 / self.input_data.dry_factor_arr
+        A_cc_low = (weight * (cc_bounds_arr[:, 0] - content)).T
+        A_cc_up = (weight * (content - cc_bounds_arr[:, 1])).T
+
+        self.A = sparse.vstack([A_low, A_up, sparse.csr_matrix(A_cc_low), sparse.csr_matrix(A_cc_up)], format="csr")
+        self.b = np.concatenate([-bounds_arr[low_index, 0], bounds_arr[up_index, 1], np.zeros(2 * len(cc_bounds_arr))])
+        # 成分约束行已乘以配比之和 100，松弛变量按相同比例缩放，使放宽量均以百分点计
+        self.slack_scale = np.concatenate([
+            np.ones(len(low_index) + len(up_index)), np.full(2 * len(cc_bounds_arr), 100.0)
+        ])
+
+        material_name_lt = self.input_data.material_name_lt
+        cc_name_lt = self.input_data.chemical_compound_name_lt
+        self.row_info_lt = (
+                [(material_name_lt[i], bt.MATERIAL_LOW_BOUND, bounds_arr[i, 0]) for i in low_index]
+                + [(material_name_lt[i], bt.MATERIAL_UP_BOUND, bounds_arr[i, 1]) for i in up_index]
+                + [(cc_name, bt.CC_LOW_BOUND, cc_bounds_arr[j, 0]) for j, cc_name in enumerate(cc_name_lt)]
+                + [(cc_name, bt.CC_UP_BOUND, cc_bounds_arr[j, 1]) for j, cc_name in enumerate(cc_name_lt)]
+        )
+
+    # endregion
+
+    # region 求解
+    def solve_elastic(self, elastic_mask, active_mask=None):
+        """
+        active_mask 中的候选约束生效，其中 elastic_mask 为 True 的约束带非负松弛变量，目标为松弛变量之和最小
+        """
+        if active_mask is None:
+            active_mask = np.ones(len(self.b), dtype=bool)
+        n = len(self.input_data.material_name_lt)
+        A = self.A[active_mask]
+        k = A.shape[0]
+        A_ub = sparse.hstack([A, -sparse.diags(self.slack_scale[active_mask])], format="csr")
+        A_eq = sparse.csr_matrix(np.append(np.ones(n), np.zeros(k)))
+        c = np.append(np.zeros(n), elastic_mask[active_mask].astype(float))
+        bounds = [(0, None)] * n + [(0, None) if e else (0, 0) for e in elastic_mask[active_mask]]
+        return linprog(c, A_ub=A_ub, b_ub=self.b[active_mask], A_eq=A_eq, b_eq=[100], bounds=bounds, method='highs')
+
+    def is_feasible(self, active_mask=None):
+        if self.A is None:
+            self.generate_candidate_constraints()
+        res = self.solve_elastic(elastic_mask=np.zeros(len(self.b), dtype=bool), active_mask=active_mask)
+        return res.status == 0
+
+    def get_conflict_rows(self):
+        # 弹性过滤：不断把需要放宽的约束变为硬约束，直到硬约束集合本身不可行
+        hard_mask = np.zeros(len(self.b), dtype=bool)
+        while True:
+            res = self.solve_elastic(elastic_mask=~hard_mask)
+            if res.status != 0:
+                break
+            slack = res.x[len(self.input_data.material_name_lt):]
+            violated = (slack > self.tolerance) & ~hard_mask
+            if not violated.any():
+                return []
+            hard_mask |= violated
+
+        # 删除过滤：逐个去掉约束，去掉后仍不可行则该约束不在 IIS 中
+        for k in np.flatnonzero(hard_mask):
+            hard_mask[k] = False
+            if self.is_feasible(active_mask=hard_mask):
+                hard_mask[k] = True
+        return np.flatnonzero(hard_mask).tolist()
+
+    def get_minimum_relaxation(self):
+        bt = enums.BoundType
+        n = len(self.input_data.material_name_lt)
+        res = self.solve_elastic(elastic_mask=np.ones(len(self.b), dtype=bool))
+        if res.status != 0:
+            logging.error("minimum relaxation not found, message: {}".format(res.message))
+            return dict()
+
+        x = res.x[:n]
+        slack = res.x[n:]
+        relaxation_dict = dict()
+        for k in np.flatnonzero(slack > self.tolerance):
+            object_name, bound_type, bound_value = self.row_info_lt[k]
+            relaxation = slack[k]
+            if bound_type in (bt.CC_LOW_BOUND, bt.CC_UP_BOUND) and object_name == enums.ChemicalCompoundName.H2O:
+                # 水分约束行按湿基量加权，换算回百分点
+                relaxation = slack[k] * 100 / (x @ (1 / self.input_data.dry_factor_arr))
+            relaxed_bound_value = (
+                bound_value - relaxation
+                if bound_type in (bt.MATERIAL_LOW_BOUND, bt.CC_LOW_BOUND) else bound_value + relaxation
+            )
+            relaxation_dict[k] = (relaxed_bound_value, relaxation)
+        return relaxation_dict
+
+    def run(self):
+        st = time.time()
+        self.generate_candidate_constraints()
+        self.conflict_row_lt = self.get_conflict_rows()
+        self.relaxation_dict = self.get_minimum_relaxation()
+
+        if self.conflict_row_lt:
+            logging.error("约束不可行，冲突约束集:")
+            for k in self.conflict_row_lt:
+                logging.error("{} {} {}".format(*self.row_info_lt[k]))
+            logging.error("最小放宽:")
+            for k, (relaxed_bound_value, relaxation) in self.relaxation_dict.items():
+                object_name, bound_type, bound_value = self.row_info_lt[k]
+                logging.error("{} {} {} -> {}".format(object_name, bound_type, bound_value, relaxed_bound_value))
+        logging.info("infeasibility diagnosis time: {}s".format(time.time() - st))
+        return self.conflict_row_lt, self.relaxation_dict
+
+    # endregion
+
+    def generate_result_df(self):
+        ih = header.InfeasibilityHeader
+        conflict_df = pd.DataFrame(
+            [self.row_info_lt[k] for k in self.conflict_row_lt],
+            columns=[ih.object_name, ih.bound_type, ih.bound_value]
+        )
+        relaxation_df = pd.DataFrame(
+            [
+                self.row_info_lt[k] + (relaxed_bound_value, relaxation)
+                for k, (relaxed_bound_value, relaxation) in self.relaxation_dict.items()
+            ],
+            columns=[ih.object_name, ih.bound_type, ih.bound_value, ih.relaxed_bound_value, ih.relaxation]
+        )
+        return conflict_df, relaxation_df
+
+    def write_to_excel(self):
+        ih = header.InfeasibilityHeader
+        conflict_df, relaxation_df = self.generate_result_df()
+        io_backend = self.input_data.get_io_backend()
+        if io_backend.append_results:
+            # 非 Excel 格式：两张表上下合并为一张，以记录类型区分，按运行编号追加
+            result_df = pd.concat([
+                conflict_df.assign(**{header.RunResultHeader.record_type: ih.conflict_set}),
+                relaxation_df.assign(**{header.RunResultHeader.record_type: ih.minimum_relaxation}),
+            ], ignore_index=True)
+            result_df.insert(0, header.RunResultHeader.run_id, generate_run_id())
+            io_backend.append_sheet(field.INFEASIBILITY_SHEET, result_df)
+            return
+
+        file_name = f"{self.input_data.exe_folder}{self.input_data.file_name}"
+        try:
+            cache_key_current = self.input_data.is_cache_key_current()
+            with pd.ExcelWriter(file_name, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
+                if field.INFEASIBILITY_SHEET in writer.book.sheetnames:
+                    writer.book.remove(writer.book[field.INFEASIBILITY_SHEET])
+                # 冲突约束集在上，空一行后是最小放宽
+                pd.DataFrame([[ih.conflict_set]]).to_excel(
+                    writer, sheet_name=field.INFEASIBILITY_SHEET, index=False, header=False, startrow=0
+                )
+                conflict_df.to_excel(writer, sheet_name=field.INFEASIBILITY_SHEET, index=False, startrow=1)
+                relaxation_startrow = len(conflict_df) + 3
+                pd.DataFrame([[ih.minimum_relaxation]]).to_excel(
+                    writer, sheet_name=field.INFEASIBILITY_SHEET, index=False, header=False,
+                    startrow=relaxation_startrow
+                )
+                relaxation_df.to_excel(
+                    writer, sheet_name=field.INFEASIBILITY_SHEET, index=False, startrow=relaxation_startrow + 1
+                )
+            if cache_key_current:
+                self.input_data.refresh_cache_key()
+        except Exception as e:
+            logging.error(f"写入 Excel 失败: {e}")
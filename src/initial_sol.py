@@ -1,5 +1,6 @@
 from .model import Model
 from .input_data import InputData
+from scipy import sparse
 from scipy.optimize import minimize, basinhopping, linprog
 import numpy as np
 import logging
@@ -9,28 +10,20 @@ class InitialSolution(Model):
         super().__init__(input_data=input_data, initial_x=dict())
 
 
-    def generate_initial_x(self):
+    def generate_initial_x(self, c=None):
         n = len(self.input_data.material_dict)
-        material_name_lt = [m for m in self.input_data.material_dict]
-
-        # 定义目标函数（这里不需要优化，所以设置为0）
-        c = [0] * n
-
-        # 定义不等式约束
-        A = []
-        b = []
-        for i, m in enumerate(material_name_lt):
-            material = self.input_data.material_dict[m]
-            A.append([-1 if j == i else 0 for j in range(n)])  # v_i >= v_min
-            A.append([1 if j == i else 0 for j in range(n)])  # v_i <= v_max
-            b.append(-material.ratio_bounds[0])
-            b.append(material.ratio_bounds[1])
-            # 定义等式约束
-        A_eq = [[1] * n]
+        material_name_lt = self.input_data.material_name_lt
+
+        # 定义目标函数（这里不需要优化，所以设置为0）；传入随机 c 时得到多面体的一个随机顶点
+        if c is None:
+            c = [0] * n
+
+        # 原料上下限作为变量边界，只有配比之和一个等式约束
+        A_eq = sparse.csr_matrix(np.ones((1, n)))
         b_eq = [100]
 
         # 求解
-        res = linprog(c, A_ub=A, b_ub=b, A_eq=A_eq, b_eq=b_eq, method='highs')
+        res = linprog(c, A_eq=A_eq, b_eq=b_eq, bounds=self.input_data.material_bounds_arr, method='highs')
 
         if res.success:
             return dict(zip(material_name_lt,res.x))
@@ -39,42 +32,55 @@ class InitialSolution(Model):
 
 
     def generate_constraints(self):
-        self.constraints.extend(self.generate_material_ratio_bounds_constraint())
+        self.bounds = self.generate_material_ratio_bounds()
         self.constraints.extend(self.generate_material_ratio_sum_limit_constraint())
 
 
     def get_objective(self, initial_guess_x):
-        x_ratio_var = dict(zip(self.keys, initial_guess_x))
-        p_material_plan_var = self.generate_p_material_plan_var(x_ratio_var=x_ratio_var)
+        p_material_plan_var = self.generate_p_material_plan_var(x_ratio_var=initial_guess_x)
         pr_material_plan_ratio_var = self.generate_pr_material_plan_ratio_var(p_material_plan_var=p_material_plan_var)
         p_chemical_compound_plan_var = self.generate_p_chemical_compound_plan_var(
-            x_ratio_var=x_ratio_var,
+            x_ratio_var=initial_guess_x,
             pr_material_plan_ratio_var=pr_material_plan_ratio_var
         )
 
-        penalty = 0
-        for cc_name, cc in self.input_data.chemical_compound_dict.items():
-            if p_chemical_compound_plan_var[cc_name] < cc.ratio_bounds[0]:
-                penalty += (cc.ratio_bounds[0] - p_chemical_compound_plan_var[cc_name]) ** 2
-            elif p_chemical_compound_plan_var[cc_name] > cc.ratio_bounds[1]:
-                penalty += (cc.ratio_bounds[1] - p_chemical_compound_plan_var[cc_name]) ** 2
+        lower_gap = np.maximum(self.input_data.cc_bounds_arr[:, 0] - p_chemical_compound_plan_var, 0)
+        upper_gap = np.maximum(p_chemical_compound_plan_var - self.input_data.cc_bounds_arr[:, 1], 0)
+        penalty = np.sum(lower_gap ** 2) + np.sum(upper_gap ** 2)
         return penalty
 
+    def get_objective_jac(self, initial_guess_x):
+        p_material_plan_var = self.generate_p_material_plan_var(x_ratio_var=initial_guess_x)
+        pr_material_plan_ratio_var = self.generate_pr_material_plan_ratio_var(p_material_plan_var=p_material_plan_var)
+        p_chemical_compound_plan_var = self.generate_p_chemical_compound_plan_var(
+            x_ratio_var=initial_guess_x,
+            pr_material_plan_ratio_var=pr_material_plan_ratio_var
+        )
+        jac = self.generate_p_chemical_compound_plan_jac(
+            x_ratio_var=initial_guess_x,
+            p_chemical_compound_plan_var=p_chemical_compound_plan_var
+        )
+
+        lower_gap = np.maximum(self.input_data.cc_bounds_arr[:, 0] - p_chemical_compound_plan_var, 0)
+        upper_gap = np.maximum(p_chemical_compound_plan_var - self.input_data.cc_bounds_arr[:, 1], 0)
+        return 2 * (upper_gap - lower_gap) @ jac
+
     def run_model(self):
         x_ratio_var = self.generate_initial_x()
         self.initial_x = x_ratio_var
-        initial_x = []
-        for key, val in x_ratio_var.items():
-            self.keys.append(key)
-            initial_x.append(val)
-        initial_guess = np.array(initial_x)
+        self.keys = list(self.input_data.material_name_lt)
+        initial_guess = np.array([x_ratio_var[key] for key in self.keys], dtype=float)
 
         self.generate_constraints()
+        if self.input_data.check_gradient:
+            self.check_gradients(x=initial_guess)
 
         result = minimize(
             self.get_objective,
             initial_guess,
+            jac=self.get_objective_jac,
             constraints=self.constraints,
+            bounds=self.bounds,
             method="SLSQP",
             tol=1e-2,
         )
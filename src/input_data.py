@@ -1,99 +1,402 @@
+import json
+import numpy as np
+import os
 import pandas as pd
+import time
 import logging
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 from .utils import enums
 from . import domain_object as do
 from .utils import field as fd
 from .utils import header
+from .utils import functions
+from .utils import timing
+from .io_backend import IOBackend, create_io_backend
 
 
 class InputData:
     def __init__(
             self,
-            exe_folder: str
+            exe_folder: str,
+            file_name: str = fd.ROCK_FILENAME,
+            use_cache: bool = True
     ):
         self.exe_folder = exe_folder
+        # Excel 工作簿，或每个工作表一个 CSV / Parquet / JSON 行文件的文件夹，见 io_backend
+        self.file_name = file_name
+        # 是否使用工作簿旁的解析缓存 (只对 Excel 生效)，也可由 时间参数 表的 使用缓存 关闭
+        self.use_cache = use_cache
+        # 读取时输入工作表内容的缓存键，写回结果时据此判断输入是否已被修改
+        self.cache_key: Optional[str] = None
         self.time_limit = 30
+        self.solver_engine = enums.SolverEngine.LP
+        # 求解前用有限差分校验解析梯度
+        self.check_gradient = False
+        # 多起点求解的初始点数量
+        self.multi_start_num = 32
+        # 约束不可行时输出冲突约束集与最小放宽量
+        self.diagnose_infeasibility = True
+        # 同时使用的原料数量上限，None 为不限制
+        self.max_material_num: Optional[int] = None
+        # 输出的方案数量 (含最优方案)，及方案之间配比向量的最小 L1 距离 (百分点)，默认只输出最优方案
+        self.alternative_num = 1
+        self.alternative_distance = 5.0
+        # 输出 run_report.json (阶段耗时、调用计数) 与 cProfile 结果 profile.prof
+        self.run_report = False
+        self.cprofile = False
         # 基本信息
-        self.material_dict: Dict[str, do.Material] = dict()
+        # 列式存储的原料表，按原料名取值得到 do.Material 视图
+        self.material_dict = do.MaterialTable(
+            material_name_lt=[],
+            wet_price_arr=np.zeros(0),
+            material_bounds_arr=np.zeros((0, 2)),
+            min_usage_arr=np.zeros(0),
+            force_usage_arr=np.zeros(0),
+            assay_matrix=np.zeros((0, len(enums.CHEMICAL_COMPONENT_LT)))
+        )
         self.chemical_compound_dict: Dict[str, do.ChemicalCompound] = dict()
 
-    def read_time_param_df(self):
-        time_param_df = pd.read_excel(
-            '{}{}'.format(self.exe_folder, fd.ROCK_FILENAME)
-            , sheet_name=fd.TIME_PARAM_SHEET
-        )
+        # 矩阵表示，行顺序与 material_dict 一致，列顺序与 chemical_compound_dict 一致
+        self.material_name_lt: List[str] = []
+        self.chemical_compound_name_lt: List[str] = []
+        self.material_index: Dict[str, int] = dict()
+        self.chemical_compound_index: Dict[str, int] = dict()
+        self.wet_price_arr = np.zeros(0)
+        self.dry_price_arr = np.zeros(0)
+        self.moisture_arr = np.zeros(0)
+        self.dry_factor_arr = np.zeros(0)
+        self.tfe_arr = np.zeros(0)
+        # 原料 × enums.CHEMICAL_COMPONENT_LT 的全部化验值
+        self.assay_matrix = np.zeros((0, len(enums.CHEMICAL_COMPONENT_LT)))
+        self.material_bounds_arr = np.zeros((0, 2))
+        self.min_usage_arr = np.zeros(0)
+        # 1 必须使用，0 禁止使用，nan 由模型决定
+        self.force_usage_arr = np.zeros(0)
+        self.cc_content_matrix = np.zeros((0, 0))
+        self.cc_bounds_arr = np.zeros((0, 2))
+        self.h2o_index: Optional[int] = None
+
+        # read_workbook 读取的工作表缓存，加载完成后清空
+        self.sheet_df_dict: Dict[str, pd.DataFrame] = dict()
+        self.load_time = 0
+
+    def get_io_backend(self) -> IOBackend:
+        return create_io_backend('{}{}'.format(self.exe_folder, self.file_name))
+
+    def is_cache_enabled(self):
+        return self.use_cache and self.get_io_backend().supports_cache
+
+    @timing.record_time_decorator(task_name="read input")
+    def read_workbook(self, sheet_names: List[str] = None):
+        """
+        读取 sheet_names 中存在的所有工作表 (Excel 工作簿只打开一次)，缓存到 self.sheet_df_dict
+        """
+        if sheet_names is None:
+            sheet_names = fd.INPUT_SHEET_NAMES
+
+        sheet_df_dict = self.get_io_backend().read_sheets(sheet_names=sheet_names)
+        self.sheet_df_dict = sheet_df_dict
+        return sheet_df_dict
+
+    def get_sheet_df(self, sheet_name: str):
+        if sheet_name not in self.sheet_df_dict:
+            self.read_workbook(sheet_names=[sheet_name])
+        if sheet_name not in self.sheet_df_dict:
+            raise ValueError("Worksheet named '{}' not found".format(sheet_name))
+        return self.sheet_df_dict[sheet_name]
+
+    def read_time_param_df(self, sheet_name: str = fd.TIME_PARAM_SHEET):
+        time_param_df = self.get_sheet_df(sheet_name=sheet_name)
         return time_param_df
 
-    def load_time_param(self):
+    def load_time_param(self, sheet_name: str = fd.TIME_PARAM_SHEET):
         tph = header.TimeParamHeader
 
-        time_param_df = self.read_time_param_df()
-        for _, row in time_param_df.iterrows():
-            if row[tph.param_name] == tph.time_limit:
-                self.time_limit = row[tph.param_value]
-                logging.info('time limit reset to {}'.format(self.time_limit))
+        time_param_df = self.read_time_param_df(sheet_name=sheet_name)
+        param_dict = dict(zip(time_param_df[tph.param_name], time_param_df[tph.param_value]))
+        if tph.time_limit in param_dict:
+            self.time_limit = param_dict[tph.time_limit]
+            logging.info('time limit reset to {}'.format(self.time_limit))
+        if tph.solver_engine in param_dict:
+            self.solver_engine = str(param_dict[tph.solver_engine]).strip().lower()
+            logging.info('solver engine reset to {}'.format(self.solver_engine))
+        if tph.check_gradient in param_dict:
+            self.check_gradient = bool(param_dict[tph.check_gradient])
+            logging.info('check gradient reset to {}'.format(self.check_gradient))
+        if tph.multi_start_num in param_dict:
+            self.multi_start_num = int(param_dict[tph.multi_start_num])
+            logging.info('multi start num reset to {}'.format(self.multi_start_num))
+        if tph.diagnose_infeasibility in param_dict:
+            self.diagnose_infeasibility = bool(param_dict[tph.diagnose_infeasibility])
+            logging.info('diagnose infeasibility reset to {}'.format(self.diagnose_infeasibility))
+        if tph.max_material_num in param_dict and not pd.isna(param_dict[tph.max_material_num]):
+            self.max_material_num = int(param_dict[tph.max_material_num])
+            logging.info('max material num reset to {}'.format(self.max_material_num))
+        if tph.alternative_num in param_dict:
+            self.alternative_num = int(param_dict[tph.alternative_num])
+            logging.info('alternative num reset to {}'.format(self.alternative_num))
+        if tph.alternative_distance in param_dict:
+            self.alternative_distance = float(param_dict[tph.alternative_distance])
+            logging.info('alternative distance reset to {}'.format(self.alternative_distance))
+        if tph.run_report in param_dict:
+            self.run_report = bool(param_dict[tph.run_report])
+            logging.info('run report reset to {}'.format(self.run_report))
+        if tph.cprofile in param_dict:
+            self.cprofile = bool(param_dict[tph.cprofile])
+            logging.info('cprofile reset to {}'.format(self.cprofile))
+        if tph.use_cache in param_dict:
+            # 只能关闭缓存，构造参数或命令行已关闭时不再打开
+            self.use_cache = self.use_cache and bool(param_dict[tph.use_cache])
+            logging.info('use cache reset to {}'.format(self.use_cache))
 
-    def read_chemical_compound_df(self):
+    def read_chemical_compound_df(self, sheet_name: str = fd.CHEMICAL_COMPOUND_SHEET):
         cch = header.ChemicalCompoundHeader
-        chemical_compound_df = pd.read_excel(
-            '{}{}'.format(self.exe_folder, fd.ROCK_FILENAME)
-            , sheet_name=fd.CHEMICAL_COMPOUND_SHEET
-        )
+        chemical_compound_df = self.get_sheet_df(sheet_name=sheet_name)
         chemical_compound_df = chemical_compound_df.dropna(subset=[cch.chemical_compound_name])
         return chemical_compound_df
 
-    def load_chemical_compound_dict(self):
+    def load_chemical_compound_dict(self, sheet_name: str = fd.CHEMICAL_COMPOUND_SHEET):
         cch = header.ChemicalCompoundHeader
-        chemical_compound_df = self.read_chemical_compound_df()
-
-        chemical_compound_dict = dict()
-        for _, row in chemical_compound_df.iterrows():
-            if row[cch.chemical_compound_name] not in enums.CHEMICAL_COMPONENT_LT:
-                continue
-            chemical_compound = do.ChemicalCompound(
-                chemical_compound_name=row[cch.chemical_compound_name],
-                low_bound=row[cch.low_bound],
-                up_bound=row[cch.up_bound]
+        chemical_compound_df = self.read_chemical_compound_df(sheet_name=sheet_name)
+        chemical_compound_df = chemical_compound_df[
+            chemical_compound_df[cch.chemical_compound_name].isin(enums.CHEMICAL_COMPONENT_LT)
+        ]
+
+        chemical_compound_dict = {
+            cc_name: do.ChemicalCompound(
+                chemical_compound_name=cc_name,
+                low_bound=low_bound,
+                up_bound=up_bound
+            )
+            for cc_name, low_bound, up_bound in zip(
+                chemical_compound_df[cch.chemical_compound_name],
+                chemical_compound_df[cch.low_bound].astype(float),
+                chemical_compound_df[cch.up_bound].astype(float)
             )
-            chemical_compound_dict[row[cch.chemical_compound_name]] = chemical_compound
+        }
         self.chemical_compound_dict = chemical_compound_dict
         logging.info("{}".format(len(chemical_compound_dict)))
 
-    def read_material_df(self):
+    def read_material_df(self, sheet_name: str = fd.MATERIAL_SHEET):
         mh = header.MaterialHeader
-        material_df = pd.read_excel(
-            '{}{}'.format(self.exe_folder, fd.ROCK_FILENAME)
-            , sheet_name=fd.MATERIAL_SHEET
-        )
+        material_df = self.get_sheet_df(sheet_name=sheet_name)
         material_df = material_df.dropna(
             subset=[mh.material_name]
-        )
+        ).copy()
         material_df[mh.low_bound] = material_df[mh.low_bound].fillna(0)
         material_df[mh.up_bound] = material_df[mh.up_bound].fillna(100)
+        if mh.min_usage_ratio not in material_df:
+            material_df[mh.min_usage_ratio] = 0
+        material_df[mh.min_usage_ratio] = material_df[mh.min_usage_ratio].fillna(0)
+        if mh.force_usage not in material_df:
+            material_df[mh.force_usage] = np.nan
         return material_df
 
-    def load_material_dict(self):
+    def load_material_dict(self, sheet_name: str = fd.MATERIAL_SHEET):
         mh = header.MaterialHeader
 
-        material_df = self.read_material_df()
+        material_df = self.read_material_df(sheet_name=sheet_name)
+        # 同名原料只保留最后一行
+        material_df = material_df.drop_duplicates(subset=[mh.material_name], keep="last")
 
-        material_dict = dict()
-        for _, row in material_df.iterrows():
-            material = do.Material(
-                material_name=row[mh.material_name],
-                wet_price=row[mh.wet_price],
-                low_bound=row[mh.low_bound],
-                up_bound=row[mh.up_bound],
-            )
-            for chemical_compound_name in enums.CHEMICAL_COMPONENT_LT:
-                material.chemical_compound_content[chemical_compound_name] = row[chemical_compound_name]
-            material_dict[material.material_name] = material
+        # to_numpy 可能返回 DataFrame 的只读视图，复制为可就地修改的数组
+        material_dict = do.MaterialTable(
+            material_name_lt=material_df[mh.material_name].tolist(),
+            wet_price_arr=np.array(material_df[mh.wet_price], dtype=float),
+            material_bounds_arr=np.array(material_df[[mh.low_bound, mh.up_bound]], dtype=float),
+            min_usage_arr=np.array(material_df[mh.min_usage_ratio], dtype=float),
+            force_usage_arr=np.array(material_df[mh.force_usage], dtype=float),
+            assay_matrix=np.array(material_df[enums.CHEMICAL_COMPONENT_LT], dtype=float),
+        )
 
         self.material_dict = material_dict
         logging.info("{}".format(len(material_dict)))
 
+    def build_matrix(self):
+        """
+        由 material_dict 与 chemical_compound_dict 生成模型计算所用的矩阵与向量，
+        修改了原料价格、成分或上下限后需要重新调用
+        """
+        self.material_name_lt = list(self.material_dict)
+        self.chemical_compound_name_lt = list(self.chemical_compound_dict)
+
+        # 与原料表共用数组，通过 Material 视图或 update_* 的修改两边同时可见
+        material_table = self.material_dict
+        self.wet_price_arr = material_table.wet_price_arr
+        self.material_bounds_arr = material_table.material_bounds_arr
+        self.min_usage_arr = material_table.min_usage_arr
+        self.force_usage_arr = material_table.force_usage_arr
+        self.assay_matrix = material_table.assay_matrix
+        material_table.refresh_derived()
+        self.cc_bounds_arr = np.array(
+            [cc.ratio_bounds for cc in self.chemical_compound_dict.values()], dtype=float
+        ).reshape(-1, 2)
+        self.build_derived_matrix()
+
+    def build_derived_matrix(self):
+        # 由原料价格、上下限与化验矩阵计算派生向量
+        cch = enums.ChemicalCompoundName
+        self.material_index = {name: i for i, name in enumerate(self.material_name_lt)}
+        self.chemical_compound_index = {name: j for j, name in enumerate(self.chemical_compound_name_lt)}
+
+        # 干基系数与干基价由原料表计算并缓存
+        self.moisture_arr = self.material_dict.moisture_arr
+        self.dry_factor_arr = self.material_dict.dry_factor_arr
+        self.dry_price_arr = self.material_dict.dry_price_arr
+        self.tfe_arr = self.assay_matrix[:, enums.CHEMICAL_COMPONENT_LT.index(cch.TFe)]
+        self.cc_content_matrix = self.assay_matrix[
+            :, [enums.CHEMICAL_COMPONENT_LT.index(cc_name) for cc_name in self.chemical_compound_name_lt]
+        ]
+        self.h2o_index = self.chemical_compound_index.get(cch.H2O)
+
+    def build_domain_objects(self):
+        # 由矩阵重建 material_dict 与 chemical_compound_dict，原料表直接使用这些数组
+        self.material_dict = do.MaterialTable(
+            material_name_lt=self.material_name_lt,
+            wet_price_arr=self.wet_price_arr,
+            material_bounds_arr=self.material_bounds_arr,
+            min_usage_arr=self.min_usage_arr,
+            force_usage_arr=self.force_usage_arr,
+            assay_matrix=self.assay_matrix
+        )
+        self.chemical_compound_dict = {
+            cc_name: do.ChemicalCompound(
+                chemical_compound_name=cc_name,
+                low_bound=float(self.cc_bounds_arr[j, 0]),
+                up_bound=float(self.cc_bounds_arr[j, 1])
+            )
+            for j, cc_name in enumerate(self.chemical_compound_name_lt)
+        }
+
+    def has_integer_rules(self):
+        # 是否设置了只能用混合整数模型表达的规则
+        return (
+                self.max_material_num is not None
+                or bool(np.any(self.min_usage_arr > 0))
+                or bool(np.any(~np.isnan(self.force_usage_arr)))
+        )
+
+    # region 增量修改
+    def update_wet_price(self, material_name: str, wet_price: float):
+        # 原料表与矩阵共用数组，视图同时更新湿基价与缓存的干基价，不需要重新 build_matrix
+        self.material_dict[material_name].wet_price = wet_price
+
+    def update_material_ratio_bounds(self, material_name: str, low_bound: float, up_bound: float):
+        self.material_dict[material_name].ratio_bounds = (low_bound, up_bound)
+
+    def update_assay(self, material_name: str, chemical_compound_name: str, value: float):
+        # 就地修改化验值并逐项同步派生量 (深拷贝或跨进程传递后派生向量不再是化验矩阵的视图)
+        i = self.material_index[material_name]
+        self.assay_matrix[i, enums.CHEMICAL_COMPONENT_LT.index(chemical_compound_name)] = value
+        if chemical_compound_name == enums.ChemicalCompoundName.TFe:
+            self.tfe_arr[i] = value
+        if chemical_compound_name == enums.ChemicalCompoundName.H2O:
+            self.moisture_arr[i] = value
+            self.dry_factor_arr[i] = 1 - value / 100
+            self.dry_price_arr[i] = self.wet_price_arr[i] / self.dry_factor_arr[i]
+        j = self.chemical_compound_index.get(chemical_compound_name)
+        if j is not None:
+            self.cc_content_matrix[i, j] = value
+
+    def update_chemical_compound_bounds(self, chemical_compound_name: str, low_bound: float, up_bound: float):
+        j = self.chemical_compound_index[chemical_compound_name]
+        self.chemical_compound_dict[chemical_compound_name].ratio_bounds = (low_bound, up_bound)
+        self.cc_bounds_arr[j] = (low_bound, up_bound)
+
+    # endregion
+
+    # region 缓存
+    def get_cache_folder(self):
+        return '{}.{}.cache{}'.format(self.exe_folder, self.file_name, os.sep)
+
+    def get_cache_key(self):
+        # 缓存键为输入工作表 (及共享字符串表) 内容的 SHA-256 与缓存格式版本，只改动结果表的格式等不影响缓存键
+        return '{}-{}'.format(fd.CACHE_VERSION, functions.get_sheet_hash(
+            '{}{}'.format(self.exe_folder, self.file_name), fd.INPUT_SHEET_NAMES
+        ))
+
+    def is_cache_key_current(self):
+        # 输入工作表自读取后未被修改
+        return self.cache_key is not None and self.get_cache_key() == self.cache_key
+
+    def load_cache(self):
+        """
+        缓存键与当前工作簿一致时以内存映射方式读取缓存，返回是否命中
+        """
+        cache_folder = self.get_cache_folder()
+        meta_file = cache_folder + fd.CACHE_META_FILENAME
+        if not os.path.exists(meta_file):
+            return False
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('key') != self.cache_key:
+            logging.info('input cache is out of date: {}'.format(cache_folder))
+            return False
+
+        for param_name in fd.CACHE_PARAM_NAMES:
+            setattr(self, param_name, meta[param_name])
+        self.material_name_lt = meta['material_name_lt']
+        self.chemical_compound_name_lt = meta['chemical_compound_name_lt']
+        for array_name in fd.CACHE_ARRAY_NAMES:
+            # 写时复制，可在内存中修改而不影响缓存文件
+            setattr(self, array_name, np.load('{}{}.npy'.format(cache_folder, array_name), mmap_mode='c'))
+        self.build_domain_objects()
+        self.build_derived_matrix()
+        logging.info('input loaded from cache: {}'.format(cache_folder))
+        return True
+
+    def save_cache(self):
+        cache_folder = self.get_cache_folder()
+        os.makedirs(cache_folder, exist_ok=True)
+        for array_name in fd.CACHE_ARRAY_NAMES:
+            np.save('{}{}.npy'.format(cache_folder, array_name), getattr(self, array_name))
+        meta = {
+            'key': self.cache_key,
+            'material_name_lt': self.material_name_lt,
+            'chemical_compound_name_lt': self.chemical_compound_name_lt,
+        }
+        for param_name in fd.CACHE_PARAM_NAMES:
+            value = getattr(self, param_name)
+            meta[param_name] = value.item() if isinstance(value, np.generic) else value
+        # meta 文件最后写入，存在即代表缓存完整
+        with open(cache_folder + fd.CACHE_META_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def refresh_cache_key(self):
+        """
+        结果写回工作簿后更新缓存键使缓存继续有效。写入前应先用 is_cache_key_current 确认读取后输入未被修改，
+        否则不调用本方法，缓存键保持旧值，下次运行重新解析
+        """
+        if not self.is_cache_enabled():
+            return
+        meta_file = self.get_cache_folder() + fd.CACHE_META_FILENAME
+        if not os.path.exists(meta_file):
+            return
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.cache_key = self.get_cache_key()
+        meta['key'] = self.cache_key
+        with open(meta_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    # endregion
+
     def read_data(self):
-        self.load_time_param()
-        self.load_chemical_compound_dict()
-        self.load_material_dict()
+        st = time.time()
+        use_cache = self.is_cache_enabled()
+        if use_cache:
+            # 在读取之前计算缓存键，读取期间的修改使缓存在下次运行时失效
+            self.cache_key = self.get_cache_key()
+        if not (use_cache and self.load_cache()):
+            self.read_workbook()
+            self.load_time_param()
+            self.load_chemical_compound_dict()
+            self.load_material_dict()
+            self.build_matrix()
+            self.sheet_df_dict = dict()
+            # 时间参数表可能关闭了缓存
+            if use_cache and self.use_cache:
+                self.save_cache()
+        self.load_time = time.time() - st
+        timing.add_task(task_name="read data", time_taken=self.load_time)
+        logging.info("load time: {}s".format(self.load_time))
@@ -0,0 +1,203 @@
+import glob
+import os
+import time
+import uuid
+from typing import Dict, List
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from .utils import field, functions
+
+
+class IOBackend:
+    """
+    按工作表读写输入与结果，工作表名与表头和 Excel 工作簿相同 (配矿模型、产品成分、时间参数、多个结果 等)。
+    Excel 在工作簿中就地更新结果；列式格式不改写输入文件，结果按运行编号追加
+    """
+    # 是否使用解析缓存 (只有 Excel 的解析开销值得缓存)
+    supports_cache = False
+    # 结果是否追加到单独的结果表，而不是写回输入表
+    append_results = True
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read_sheets(self, sheet_names: List[str]) -> Dict[str, pd.DataFrame]:
+        raise NotImplementedError
+
+    def update_column(self, sheet_name: str, key_column: str, value_column: str, value_dict: Dict):
+        raise NotImplementedError
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def append_sheet(self, sheet_name: str, df: pd.DataFrame):
+        raise NotImplementedError
+
+
+class ExcelBackend(IOBackend):
+    supports_cache = True
+    append_results = False
+
+    def read_sheets(self, sheet_names: List[str]):
+        # 以只读方式打开工作簿一次，读取存在的工作表
+        wb = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        sheet_df_dict = dict()
+        for sheet_name in sheet_names:
+            if sheet_name not in wb.sheetnames:
+                continue
+            rows = wb[sheet_name].iter_rows(values_only=True)
+            columns = next(rows, ())
+            df = pd.DataFrame(list(rows), columns=columns)
+            # 空单元格读入为 None，转换为数值列中的 NaN
+            sheet_df_dict[sheet_name] = df.infer_objects().fillna(value=np.nan)
+        wb.close()
+        return sheet_df_dict
+
+    def update_column(self, sheet_name: str, key_column: str, value_column: str, value_dict: Dict):
+        # 只改写一列，其余单元格与格式保持不变
+        wb = openpyxl.load_workbook(self.path)
+        sheet = wb[sheet_name]
+        sheet_header_dict = functions.get_header_dict(sheet=sheet)
+        key_index = sheet_header_dict[key_column]
+        value_index = sheet_header_dict[value_column]
+        for row_index in range(2, sheet.max_row + 1):
+            key = sheet.cell(row=row_index, column=key_index).value
+            if key in value_dict:
+                sheet.cell(row=row_index, column=value_index, value=value_dict[key])
+        wb.save(self.path)
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame):
+        with pd.ExcelWriter(self.path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+    def append_sheet(self, sheet_name: str, df: pd.DataFrame):
+        with pd.ExcelWriter(self.path, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
+            startrow = writer.book[sheet_name].max_row if sheet_name in writer.book.sheetnames else 0
+            df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=startrow, header=startrow == 0)
+
+
+class FolderBackend(IOBackend):
+    """
+    文件夹中每个工作表一个文件：<文件夹>/<工作表名><extension>
+    """
+    extension = ""
+
+    def get_sheet_path(self, sheet_name: str):
+        return os.path.join(self.path, sheet_name + self.extension)
+
+    def read_sheet(self, sheet_path: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def read_sheets(self, sheet_names: List[str]):
+        sheet_df_dict = dict()
+        for sheet_name in sheet_names:
+            sheet_path = self.get_sheet_path(sheet_name)
+            if os.path.exists(sheet_path):
+                sheet_df_dict[sheet_name] = self.read_sheet(sheet_path).fillna(value=np.nan)
+        return sheet_df_dict
+
+    def update_column(self, sheet_name: str, key_column: str, value_column: str, value_dict: Dict):
+        df = self.read_sheets([sheet_name])[sheet_name]
+        df[value_column] = df[key_column].map(value_dict)
+        self.write_sheet(sheet_name, df)
+
+
+class CsvBackend(FolderBackend):
+    extension = ".csv"
+
+    def read_sheet(self, sheet_path: str):
+        return pd.read_csv(sheet_path, encoding="utf-8-sig")
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame):
+        df.to_csv(self.get_sheet_path(sheet_name), index=False, encoding="utf-8-sig")
+
+    def append_sheet(self, sheet_name: str, df: pd.DataFrame):
+        sheet_path = self.get_sheet_path(sheet_name)
+        if os.path.exists(sheet_path):
+            df.to_csv(sheet_path, mode="a", index=False, header=False, encoding="utf-8")
+        else:
+            self.write_sheet(sheet_name, df)
+
+
+class JsonBackend(FolderBackend):
+    # 每行一条记录的 JSON，追加时直接写到文件末尾
+    extension = ".jsonl"
+
+    def read_sheet(self, sheet_path: str):
+        return pd.read_json(sheet_path, lines=True, dtype=False)
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame):
+        df.to_json(self.get_sheet_path(sheet_name), orient="records", lines=True, force_ascii=False)
+
+    def append_sheet(self, sheet_name: str, df: pd.DataFrame):
+        with open(self.get_sheet_path(sheet_name), "a", encoding="utf-8") as f:
+            f.write(df.to_json(orient="records", lines=True, force_ascii=False))
+
+
+class ParquetBackend(FolderBackend):
+    """
+    需要安装 pyarrow 或 fastparquet。工作表可以是单个文件 <工作表名>.parquet，
+    也可以是文件夹 <工作表名>/，追加结果时在文件夹中写入新的分片
+    """
+    extension = ".parquet"
+
+    def read_sheet(self, sheet_path: str):
+        return pd.read_parquet(sheet_path)
+
+    def read_sheets(self, sheet_names: List[str]):
+        sheet_df_dict = super().read_sheets(sheet_names)
+        for sheet_name in sheet_names:
+            part_lt = sorted(glob.glob(os.path.join(self.path, sheet_name, "*.parquet")))
+            if sheet_name not in sheet_df_dict and part_lt:
+                sheet_df_dict[sheet_name] = pd.concat(
+                    [self.read_sheet(part) for part in part_lt], ignore_index=True
+                ).fillna(value=np.nan)
+        return sheet_df_dict
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame):
+        df.to_parquet(self.get_sheet_path(sheet_name), index=False)
+
+    def append_sheet(self, sheet_name: str, df: pd.DataFrame):
+        part_folder = os.path.join(self.path, sheet_name)
+        os.makedirs(part_folder, exist_ok=True)
+        df.to_parquet(os.path.join(part_folder, "{}.parquet".format(time.time_ns())), index=False)
+
+
+def generate_run_id():
+    # 时间便于阅读与排序，随机后缀保证同一秒内的多次运行编号不同
+    return "{}-{}".format(time.strftime("%Y%m%d-%H%M%S"), uuid.uuid4().hex[:8])
+
+
+BACKEND_LT = [CsvBackend, ParquetBackend, JsonBackend]
+BACKEND_DICT = {"csv": CsvBackend, "parquet": ParquetBackend, "json": JsonBackend}
+
+
+def create_io_backend(path: str) -> IOBackend:
+    """
+    路径为文件夹时按其中 配矿模型 文件的扩展名选择格式，配矿模型/ 为 parquet 分片文件夹时为 parquet 格式，
+    否则为 Excel 工作簿
+    """
+    if not os.path.isdir(path):
+        return ExcelBackend(path)
+    for backend_class in BACKEND_LT:
+        if os.path.exists(os.path.join(path, field.MATERIAL_SHEET + backend_class.extension)):
+            return backend_class(path)
+    if glob.glob(os.path.join(path, field.MATERIAL_SHEET, "*" + ParquetBackend.extension)):
+        return ParquetBackend(path)
+    raise ValueError("no {} sheet found in folder {}".format(field.MATERIAL_SHEET, path))
+
+
+def convert_input(source_path: str, target_folder: str, io_format: str):
+    """
+    把输入的三张工作表转换为 io_format (csv / parquet / json) 格式的文件夹
+    """
+    sheet_names = [field.TIME_PARAM_SHEET, field.CHEMICAL_COMPOUND_SHEET, field.MATERIAL_SHEET]
+    sheet_df_dict = create_io_backend(source_path).read_sheets(sheet_names=sheet_names)
+    os.makedirs(target_folder, exist_ok=True)
+    target_backend = BACKEND_DICT[io_format](target_folder)
+    for sheet_name, df in sheet_df_dict.items():
+        target_backend.write_sheet(sheet_name, df)
+    return target_backend
@@ -0,0 +1,252 @@
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog, OptimizeResult
+import logging
+import time
+from .model import Model
+from .input_data import InputData
+
+
+class LinearFractionalModel(Model):
+    """
+    吨度价 = 干基价 / TFe 是线性分式目标，成分上下限在乘以分母后均为线性约束。
+    通过 Charnes–Cooper 变换 y = t * x, t = 1 / (TFe · x) 将问题化为一个线性规划，用 HiGHS 求全局最优。
+    变量顺序为 [y_1, ..., y_n, t]。约束矩阵为 CSR 稀疏矩阵，非零元个数为 O(n · 成分数)，可求解上万种原料。
+    """
+
+    def __init__(self, input_data: InputData):
+        super().__init__(input_data=input_data, initial_x=dict())
+        # build_lp 生成的线性规划，可按行增量修改
+        self.c = None
+        self.A_ub = None
+        self.b_ub = None
+        self.A_eq = None
+        self.b_eq = None
+        self.lp_bounds = None
+        self.ub_names = []
+        self.eq_names = []
+        # 最近一次 linprog 的结果，包含对偶值
+        self.lp_res = None
+        self.build_time = 0
+        self.solve_time = 0
+
+    # region 线性规划定义
+    def generate_lp_objective(self):
+        return np.append(self.input_data.dry_price_arr, 0)
+
+    def generate_lp_eq_constraint(self):
+        n = len(self.input_data.material_name_lt)
+        # TFe · y = 1
+        row_tfe = np.append(self.input_data.tfe_arr, 0)
+        # sum(y) = 100 t
+        row_sum = np.append(np.ones(n), -100)
+        # 两行的所有列均显式存储，TFe 为 0 时也可就地修改
+        A_eq = sparse.csr_matrix(
+            (np.concatenate([row_tfe, row_sum]), np.tile(np.arange(n + 1), 2), [0, n + 1, 2 * (n + 1)]),
+            shape=(2, n + 1)
+        )
+        b_eq = np.array([1, 0])
+        names = ["tfe_normalization_constraint", "material_ratio_sum_limit_constraint"]
+        return A_eq, b_eq, names
+
+    def generate_lp_material_ratio_bounds_constraint(self):
+        n = len(self.input_data.material_name_lt)
+        bounds_arr = self.input_data.material_bounds_arr
+        # 第 2i 行 lb * t - y_i <= 0，第 2i+1 行 y_i - ub * t <= 0，每行两个非零元 (y_i, t)，
+        # 上下限为 0 时也显式存储，便于增量修改
+        row = np.repeat(np.arange(2 * n), 2)
+        col = np.column_stack([np.repeat(np.arange(n), 2), np.full(2 * n, n)]).ravel()
+        data = np.column_stack([-np.ones(n), bounds_arr[:, 0], np.ones(n), -bounds_arr[:, 1]]).ravel()
+        A_ub = sparse.csr_matrix((data, (row, col)), shape=(2 * n, n + 1))
+        names = []
+        for mat_name in self.input_data.material_name_lt:
+            names.append("material_{}_ratio_lower_bound_constraint".format(mat_name))
+            names.append("material_{}_ratio_upper_bound_constraint".format(mat_name))
+        return A_ub, names
+
+    def generate_lp_z_cc_bounds_constraint(self):
+        content = self.input_data.cc_content_matrix
+        bounds_arr = self.input_data.cc_bounds_arr
+        # 水分按湿基量加权，其余成分按干配加权
+        weight = np.ones_like(content)
+        if self.input_data.h2o_index is not None:
+            weight[:, self.input_data.h2o_index] = 1 / self.input_data.dry_factor_arr
+        # sum(w * y * (lb - c)) <= 0
+        A_lower = (weight * (bounds_arr[:, 0] - content)).T
+        # sum(w * y * (c - ub)) <= 0
+        A_upper = (weight * (content - bounds_arr[:, 1])).T
+        m = len(self.input_data.chemical_compound_name_lt)
+        n = content.shape[0]
+        A_dense = np.empty((2 * m, n))
+        A_dense[0::2] = A_lower
+        A_dense[1::2] = A_upper
+        # 每行 y_1..y_n 全部显式存储 (含 0)，t 列为空
+        A_ub = sparse.csr_matrix(
+            (A_dense.ravel(), np.tile(np.arange(n), 2 * m), np.arange(0, 2 * m * n + 1, n)), shape=(2 * m, n + 1)
+        )
+        names = []
+        for cc_name in self.input_data.chemical_compound_name_lt:
+            names.append("cc_{}_lower_bounds_constraint".format(cc_name))
+            names.append("cc_{}_upper_bounds_constraint".format(cc_name))
+        return A_ub, names
+
+    def generate_lp(self):
+        c = self.generate_lp_objective()
+        A_eq, b_eq, eq_names = self.generate_lp_eq_constraint()
+
+        material_rows, material_names = self.generate_lp_material_ratio_bounds_constraint()
+        cc_rows, cc_names = self.generate_lp_z_cc_bounds_constraint()
+        A_ub = sparse.vstack([material_rows, cc_rows], format="csr")
+        b_ub = np.zeros(A_ub.shape[0])
+        ub_names = material_names + cc_names
+
+        bounds = (0, None)
+        return c, A_ub, b_ub, A_eq, b_eq, bounds, ub_names, eq_names
+
+    # endregion
+
+    def build_lp(self):
+        st = time.time()
+        self.keys = list(self.input_data.material_name_lt)
+        (
+            self.c, self.A_ub, self.b_ub, self.A_eq, self.b_eq, self.lp_bounds, self.ub_names, self.eq_names
+        ) = self.generate_lp()
+        self.build_time = time.time() - st
+        logging.info("lp built: {} rows, {} nonzeros, time: {}s".format(
+            self.A_ub.shape[0] + self.A_eq.shape[0], self.A_ub.nnz + self.A_eq.nnz, self.build_time
+        ))
+
+    # region 增量修改
+    def get_ub_row_data(self, row: int):
+        # A_ub 第 row 行非零元的视图，列按升序排列
+        return self.A_ub.data[self.A_ub.indptr[row]:self.A_ub.indptr[row + 1]]
+
+    def update_lp_material_price(self, material_name: str):
+        # 价格变化只影响目标系数
+        i = self.input_data.material_index[material_name]
+        self.c[i] = self.input_data.dry_price_arr[i]
+
+    def update_lp_material_ratio_bounds(self, material_name: str):
+        # 原料上下限在 A_ub 的第 2i、2i+1 行，行内非零元依次为 y_i, t
+        i = self.input_data.material_index[material_name]
+        self.get_ub_row_data(2 * i)[1] = self.input_data.material_bounds_arr[i, 0]
+        self.get_ub_row_data(2 * i + 1)[1] = -self.input_data.material_bounds_arr[i, 1]
+
+    def update_lp_material_assay(self, material_name: str):
+        # 化验值变化只影响第 i 列：目标系数 (水分改变干基价)、TFe 归一化行与各成分行
+        i = self.input_data.material_index[material_name]
+        n = len(self.keys)
+        m = len(self.input_data.chemical_compound_name_lt)
+        self.c[i] = self.input_data.dry_price_arr[i]
+        self.A_eq.data[i] = self.input_data.tfe_arr[i]
+
+        content = self.input_data.cc_content_matrix[i]
+        bounds_arr = self.input_data.cc_bounds_arr
+        weight = np.ones(m)
+        if self.input_data.h2o_index is not None:
+            weight[self.input_data.h2o_index] = 1 / self.input_data.dry_factor_arr[i]
+        # 成分行在原料行之后，每行存储 y_1..y_n
+        cc_block = self.A_ub.data[self.A_ub.indptr[2 * n]:].reshape(2 * m, n)
+        cc_block[0::2, i] = weight * (bounds_arr[:, 0] - content)
+        cc_block[1::2, i] = weight * (content - bounds_arr[:, 1])
+
+    def update_lp_chemical_compound_bounds(self, chemical_compound_name: str):
+        # 成分上下限在原料行之后，第 2n+2j、2n+2j+1 行
+        j = self.input_data.chemical_compound_index[chemical_compound_name]
+        n = len(self.keys)
+        content = self.input_data.cc_content_matrix[:, j]
+        weight = 1 / self.input_data.dry_factor_arr if j == self.input_data.h2o_index else 1
+        self.get_ub_row_data(2 * n + 2 * j)[:] = weight * (self.input_data.cc_bounds_arr[j, 0] - content)
+        self.get_ub_row_data(2 * n + 2 * j + 1)[:] = weight * (content - self.input_data.cc_bounds_arr[j, 1])
+
+    # endregion
+
+    def solve_lp(self):
+        st = time.time()
+        res = linprog(
+            self.c, A_ub=self.A_ub, b_ub=self.b_ub, A_eq=self.A_eq, b_eq=self.b_eq, bounds=self.lp_bounds,
+            method='highs', options={"time_limit": float(self.input_data.time_limit)}
+        )
+        self.lp_res = res
+        self.solve_time = time.time() - st
+
+        if res.success:
+            t = res.x[-1]
+            x = res.x[:-1] / t
+            logging.info("Successful solution, message: {}".format(res.message))
+            logging.info("Objective: {}".format(res.fun))
+        else:
+            # 无可行解时没有有意义的 x，按等分配比输出以便定位问题
+            x = np.full(len(self.keys), 100 / len(self.keys))
+            logging.error("Unsuccessful solution, message: {}".format(res.message))
+
+        result = OptimizeResult(
+            x=x,
+            fun=res.fun if res.success else self.get_objective(x),
+            success=res.success,
+            status=res.status,
+            message=res.message,
+        )
+        return result
+
+    def run_model(self):
+        st = time.time()
+        self.build_lp()
+        result = self.solve_lp()
+
+        self.generate_constraints()
+        self.check_constraints(result_x=result.x)
+        logging.info("lp model solution objective: {}, time: {}s".format(result.fun, time.time() - st))
+        multi_results = [(result.x.copy(), result.fun)]
+        return result, multi_results
+
+    def get_reduced_cost(self, material_name: str):
+        """
+        用最近一次求解的对偶值计算 y_i 在当前系数下的缩减成本，y_i 不在基中且缩减成本非负时当前解仍最优
+        """
+        i = self.input_data.material_index[material_name]
+        n = len(self.keys)
+        ineq_marginal = self.lp_res.ineqlin.marginals
+        eq_marginal = self.lp_res.eqlin.marginals
+        cc_column = self.A_ub.data[self.A_ub.indptr[2 * n]:].reshape(-1, n)[:, i]
+        return (
+                self.c[i]
+                - (ineq_marginal[2 * i + 1] - ineq_marginal[2 * i])
+                - cc_column @ ineq_marginal[2 * n:]
+                - self.A_eq.data[[i, n + 1 + i]] @ eq_marginal
+        )
+
+    def get_dual_values(self, result_x, tolerance=1e-4):
+        """
+        由变换后线性规划的对偶值换算回原问题：
+        约束 a·y <= 0 中系数变化 da 使目标变化 -λ (da·y)，λ 为 HiGHS 给出的对偶值
+        """
+        if self.lp_res is None or not self.lp_res.success:
+            return super().get_dual_values(result_x=result_x, tolerance=tolerance)
+
+        n = len(self.keys)
+        m = len(self.input_data.chemical_compound_name_lt)
+        y = self.lp_res.x[:-1]
+        t = self.lp_res.x[-1]
+        ineq_marginal = self.lp_res.ineqlin.marginals
+        eq_marginal = self.lp_res.eqlin.marginals
+
+        weight = np.ones((n, m))
+        if self.input_data.h2o_index is not None:
+            weight[:, self.input_data.h2o_index] = 1 / self.input_data.dry_factor_arr
+        weighted_y = y @ weight
+        cc_marginal = ineq_marginal[2 * n:]
+        cc_shadow_price_dict = {
+            # 下限行系数 w(lb - c)，上限行系数 w(c - ub)
+            cc_name: (float(-cc_marginal[2 * j] * weighted_y[j]), float(cc_marginal[2 * j + 1] * weighted_y[j]))
+            for j, cc_name in enumerate(self.input_data.chemical_compound_name_lt)
+        }
+
+        # 缩减成本 = t * (c - 成分约束与等式约束的对偶价格)，换算为每个配比百分点的吨度价变化
+        reduced_cost = t * (
+                self.c[:n]
+                - self.A_ub[2 * n:, :n].T @ cc_marginal
+                - self.A_eq[:, :n].T @ eq_marginal
+        )
+        material_reduced_cost_dict = dict(zip(self.keys, reduced_cost.tolist()))
+        return cc_shadow_price_dict, material_reduced_cost_dict
@@ -0,0 +1,176 @@
+import copy
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import milp, LinearConstraint, Bounds, OptimizeResult
+
+from .lp_model import LinearFractionalModel
+from .input_data import InputData
+from .utils import enums, functions
+
+
+class MixedIntegerModel(LinearFractionalModel):
+    """
+    在 Charnes–Cooper 线性规划上为每种原料增加 0-1 变量 z_i 表示是否使用，用 HiGHS 求解混合整数线性规划：
+    1. 使用的原料数量不超过 max_material_num
+    2. 原料使用时配比不低于 min_usage_ratio (半连续变量)
+    3. force_usage 固定 z_i
+    变量顺序为 [y_1, ..., y_n, t, z_1, ..., z_n]。
+    t = 1 / (TFe · x) 的上界 t_max 用于将 y_i <= ub_i * t * z_i 等双线性约束线性化
+    """
+
+    def __init__(self, input_data: InputData, forced_min_ratio: float = 0.1):
+        super().__init__(input_data=input_data)
+        # 强制使用但未设最小用量的原料，配比至少为 forced_min_ratio
+        self.forced_min_ratio = forced_min_ratio
+        self.milp_res = None
+        # 固定原料组合后的线性规划，用于去除整数容差残余与计算对偶值
+        self.fixed_model: Optional[LinearFractionalModel] = None
+
+    # region 混合整数规划定义
+    def get_t_bounds(self):
+        # 配比之和为 100，TFe · x 介于 100 * min(TFe) 与 100 * max(TFe) 之间，且不低于 TFe 下限 * 100
+        tfe_arr = self.input_data.tfe_arr
+        tfe_min = tfe_arr.min()
+        tfe_index = self.input_data.chemical_compound_index.get(enums.ChemicalCompoundName.TFe)
+        if tfe_index is not None:
+            tfe_min = max(tfe_min, self.input_data.cc_bounds_arr[tfe_index, 0])
+        if tfe_min <= 0:
+            raise ValueError("TFe 下限与原料 TFe 含量均为 0，无法确定 t 的上界")
+        return 1 / (100 * tfe_arr.max()), 1 / (100 * tfe_min)
+
+    def generate_milp(self):
+        n = len(self.input_data.material_name_lt)
+        bounds_arr = self.input_data.material_bounds_arr
+        force_usage_arr = self.input_data.force_usage_arr
+        min_usage_arr = np.where(
+            force_usage_arr == 1,
+            np.maximum(self.input_data.min_usage_arr, self.forced_min_ratio),
+            self.input_data.min_usage_arr
+        )
+        t_min, t_max = self.get_t_bounds()
+
+        c, _, _, A_eq, b_eq, _, _, _ = self.generate_lp()
+        A_cc, _ = self.generate_lp_z_cc_bounds_constraint()
+        eye = sparse.identity(n, format="csr")
+        zero_t = sparse.csr_matrix((n, 1))
+        zero_z = sparse.csr_matrix((n, n))
+
+        blocks = [
+            # 成分上下限
+            (sparse.hstack([sparse.csr_matrix(A_cc), sparse.csr_matrix((A_cc.shape[0], n))]), -np.inf, 0),
+            # y_i - ub_i * t <= 0
+            (sparse.hstack([eye, sparse.csr_matrix(-bounds_arr[:, [1]]), zero_z]), -np.inf, 0),
+            # lb_i * t - y_i <= 0
+            (sparse.hstack([-eye, sparse.csr_matrix(bounds_arr[:, [0]]), zero_z]), -np.inf, 0),
+            # y_i - ub_i * t_max * z_i <= 0，不使用时 y_i = 0
+            (sparse.hstack([eye, zero_t, sparse.diags(-bounds_arr[:, 1] * t_max)]), -np.inf, 0),
+        ]
+        min_usage_index = np.flatnonzero(min_usage_arr > 0)
+        if len(min_usage_index):
+            # min_i * t - y_i + min_i * t_max * z_i <= min_i * t_max，使用时 x_i >= min_i
+            k = len(min_usage_index)
+            rhs = min_usage_arr[min_usage_index] * t_max
+            A = sparse.hstack([
+                -eye[min_usage_index],
+                sparse.csr_matrix(min_usage_arr[min_usage_index].reshape(-1, 1)),
+                sparse.csr_matrix((rhs, (np.arange(k), min_usage_index)), shape=(k, n)),
+            ])
+            blocks.append((A, -np.inf, rhs))
+        if self.input_data.max_material_num is not None:
+            # sum(z) <= K
+            A = sparse.csr_matrix(np.concatenate([np.zeros(n + 1), np.ones(n)]))
+            blocks.append((A, -np.inf, self.input_data.max_material_num))
+        # 等式约束
+        blocks.append((sparse.hstack([sparse.csr_matrix(A_eq), sparse.csr_matrix((A_eq.shape[0], n))]), b_eq, b_eq))
+
+        constraints = [LinearConstraint(A.tocsr(), lb, ub) for A, lb, ub in blocks]
+
+        z_lb = np.where(force_usage_arr == 1, 1, 0)
+        z_ub = np.where(force_usage_arr == 0, 0, 1)
+        variable_bounds = Bounds(
+            np.concatenate([np.zeros(n), [t_min], z_lb]),
+            np.concatenate([np.full(n, np.inf), [t_max], z_ub])
+        )
+        milp_c = np.concatenate([c, np.zeros(n)])
+        integrality = np.concatenate([np.zeros(n + 1), np.ones(n)])
+        return milp_c, constraints, integrality, variable_bounds
+
+    # endregion
+
+    def generate_fixed_input_data(self, used_arr):
+        # 固定原料是否使用：不用的原料上限为 0，使用的原料下限不低于最小用量
+        fixed_input_data = copy.copy(self.input_data)
+        bounds_arr = np.array(self.input_data.material_bounds_arr, dtype=float)
+        force_usage_arr = self.input_data.force_usage_arr
+        min_usage_arr = np.where(
+            force_usage_arr == 1,
+            np.maximum(self.input_data.min_usage_arr, self.forced_min_ratio),
+            self.input_data.min_usage_arr
+        )
+        bounds_arr[~used_arr] = 0
+        bounds_arr[used_arr, 0] = np.maximum(bounds_arr[used_arr, 0], min_usage_arr[used_arr])
+        fixed_input_data.material_bounds_arr = bounds_arr
+        return fixed_input_data
+
+    def solve_milp(self):
+        n = len(self.keys)
+        c, constraints, integrality, variable_bounds = self.generate_milp()
+        # HiGHS 的日志直接写到文件描述符 1，服务模式下会混入结果输出
+        with functions.redirect_stdout_to_stderr():
+            res = milp(
+                c,
+                constraints=constraints,
+                integrality=integrality,
+                bounds=variable_bounds,
+                options={"time_limit": float(self.input_data.time_limit)},
+            )
+        self.milp_res = res
+
+        # 达到时间上限时 HiGHS 仍可能给出可行解
+        if res.x is None:
+            x = np.full(n, 100 / n)
+            logging.error("Unsuccessful solution, message: {}".format(res.message))
+            return OptimizeResult(
+                x=x, fun=self.get_objective(x), success=False, status=res.status, message=res.message
+            )
+
+        success = res.status == 0
+        log = logging.info if success else logging.warning
+        log("{} solution, message: {}".format("Successful" if success else "Feasible", res.message))
+        logging.info("Objective: {}, mip gap: {}".format(res.fun, getattr(res, "mip_gap", None)))
+
+        # z 有整数容差，按取整后的原料组合重解线性规划，去掉不用原料的残余配比
+        used_arr = np.round(res.x[n + 1:]) > 0.5
+        self.fixed_model = LinearFractionalModel(input_data=self.generate_fixed_input_data(used_arr))
+        self.fixed_model.build_lp()
+        fixed_result = self.fixed_model.solve_lp()
+        if fixed_result.success:
+            x, fun = fixed_result.x, fixed_result.fun
+        else:
+            x, fun = res.x[:n] / res.x[n], res.fun
+        return OptimizeResult(x=x, fun=fun, success=success, status=res.status, message=res.message)
+
+    def run_model(self):
+        st = time.time()
+        self.keys = list(self.input_data.material_name_lt)
+        result = self.solve_milp()
+
+        self.generate_constraints()
+        self.check_constraints(result_x=result.x)
+        logging.info("milp model solution objective: {}, active materials: {}, time: {}s".format(
+            result.fun, int(np.sum(result.x > 1e-6)), time.time() - st
+        ))
+        multi_results = [(result.x.copy(), result.fun)]
+        return result, multi_results
+
+    def get_dual_values(self, result_x, tolerance=1e-4):
+        """
+        固定 0-1 变量后线性规划的对偶值，即该原料组合下的影子价格
+        """
+        if self.fixed_model is None:
+            return super().get_dual_values(result_x=result_x, tolerance=tolerance)
+        return self.fixed_model.get_dual_values(result_x=result_x, tolerance=tolerance)
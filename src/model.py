@@ -1,9 +1,8 @@
 import numpy as np
-from scipy.optimize import minimize, basinhopping
+from scipy.optimize import minimize, basinhopping, approx_fprime, nnls
 import logging
-import random
 import time
-from .utils import field, enums
+from .utils import timing
 from .input_data import InputData
 from typing import Dict
 
@@ -16,211 +15,266 @@ class Model:
     ):
         self.input_data = input_data
         self.constraints = []
+        self.bounds = []
         self.keys = []
         self.initial_x = initial_x
+        self.instrument()
+
+    def instrument(self):
+        # 开启运行报告时统计目标函数与各约束族的调用次数和耗时，需在 generate_constraints 之前调用
+        timing.instrument(self, [
+            "get_objective",
+            "get_objective_jac",
+            "fun_material_ratio_sum_limit_constraint",
+            "jac_material_ratio_sum_limit_constraint",
+            "fun_material_ratio_bounds_constraint",
+            "jac_material_ratio_bounds_constraint",
+            "fun_z_cc_bounds_constraint",
+            "jac_z_cc_bounds_constraint",
+        ])
 
     # region 变量定义
-    def generate_initial_x(self):
-        initial_x = {
-            material_name: material.initial_ratio
-            for material_name, material in self.input_data.material_dict.items()
-        }
-        return initial_x
-
     def generate_p_material_plan_var(self, x_ratio_var):
-        p_material_plan_var = {
-            material_name: x_value / (
-                    1 -
-                    self.input_data.material_dict[material_name].chemical_compound_content[
-                        enums.ChemicalCompoundName.H2O]
-                    / 100
-            )
-            for material_name, x_value in x_ratio_var.items()
-        }
+        p_material_plan_var = x_ratio_var / self.input_data.dry_factor_arr
         return p_material_plan_var
 
     @staticmethod
     def generate_pr_material_plan_ratio_var(p_material_plan_var):
-        total_p_material_plan = sum(p_material_plan_var.values())
-        pr_material_plan_ratio_var = {
-            material_name: p_value * 100 / total_p_material_plan
-            for material_name, p_value in p_material_plan_var.items()
-        }
+        pr_material_plan_ratio_var = p_material_plan_var * 100 / p_material_plan_var.sum()
         return pr_material_plan_ratio_var
 
     def generate_p_chemical_compound_plan_var(self, x_ratio_var, pr_material_plan_ratio_var):
-        p_chemical_compound_plan_var = {
-            chemical_compound_name: sum(
-                x_ratio_var[material_name] * material.chemical_compound_content[chemical_compound_name]
-                for material_name, material in self.input_data.material_dict.items()
-            ) / sum(
-                x_ratio_var[material_name]
-                for material_name, material in self.input_data.material_dict.items()
+        # 顺序与 input_data.chemical_compound_name_lt 一致
+        p_chemical_compound_plan_var = x_ratio_var @ self.input_data.cc_content_matrix / x_ratio_var.sum()
+        if self.input_data.h2o_index is not None:
+            p_chemical_compound_plan_var[self.input_data.h2o_index] = (
+                    pr_material_plan_ratio_var @ self.input_data.moisture_arr / pr_material_plan_ratio_var.sum()
             )
-            for chemical_compound_name, chemical_compound in self.input_data.chemical_compound_dict.items()
-            if chemical_compound_name != enums.ChemicalCompoundName.H2O
-        }
-        p_chemical_compound_plan_var[enums.ChemicalCompoundName.H2O] = sum(
-            pr_material_plan_ratio_var[material_name] * material.chemical_compound_content[
-                enums.ChemicalCompoundName.H2O]
-            for material_name, material in self.input_data.material_dict.items()
-        ) / sum(
-            pr_material_plan_ratio_var[material_name]
-            for material_name, material in self.input_data.material_dict.items()
-        )
         return p_chemical_compound_plan_var
 
     def generate_dry_price_var(self, x_ratio_var):
-        dry_price_var = sum(
-            x_ratio_var[material_name] * material.dry_price
-            for material_name, material in self.input_data.material_dict.items()
-        ) / sum(
-            x_ratio_var[material_name]
-            for material_name, material in self.input_data.material_dict.items()
-        )
+        dry_price_var = x_ratio_var @ self.input_data.dry_price_arr / x_ratio_var.sum()
         return dry_price_var
 
+    def generate_tfe_var(self, x_ratio_var):
+        tfe_var = x_ratio_var @ self.input_data.tfe_arr / x_ratio_var.sum()
+        return tfe_var
+
     @staticmethod
-    def generate_ton_price_var(dry_price_var, p_chemical_compound_plan_var):
-        ton_price_var = dry_price_var / p_chemical_compound_plan_var[enums.ChemicalCompoundName.TFe]
+    def generate_ton_price_var(dry_price_var, tfe_var):
+        ton_price_var = dry_price_var / tfe_var
         return ton_price_var
 
+    def generate_p_chemical_compound_plan_jac(self, x_ratio_var, p_chemical_compound_plan_var):
+        # d p_j / d x_i = (c_ij - p_j) / sum(x)，形状为 (成分数, 原料数)
+        jac = (self.input_data.cc_content_matrix - p_chemical_compound_plan_var).T / x_ratio_var.sum()
+        if self.input_data.h2o_index is not None:
+            # 水分按湿基量加权: d H2O / d x_i = (h_i - H2O) / (df_i * sum(x / df))
+            p_material_plan_var = self.generate_p_material_plan_var(x_ratio_var=x_ratio_var)
+            h2o_var = p_chemical_compound_plan_var[self.input_data.h2o_index]
+            jac[self.input_data.h2o_index] = (
+                    (self.input_data.moisture_arr - h2o_var)
+                    / (self.input_data.dry_factor_arr * p_material_plan_var.sum())
+            )
+        return jac
+
     # endregion
 
     # region 约束定义
     def generate_constraints(self):
-        self.constraints.extend(self.generate_material_ratio_bounds_constraint())
+        self.bounds = self.generate_material_ratio_bounds()
         self.constraints.extend(self.generate_material_ratio_sum_limit_constraint())
         self.constraints.extend(self.generate_z_cc_bounds_constraint())
 
     def fun_material_ratio_sum_limit_constraint(self, x):
-        x_ratio_var = dict(zip(self.keys, x))
-        return 100 - sum(
-            x_ratio_var[material_name]
-            for material_name in self.input_data.material_dict
-        )
+        return np.array([100 - x.sum()])
+
+    @staticmethod
+    def jac_material_ratio_sum_limit_constraint(x):
+        return -np.ones((1, len(x)))
 
     def generate_material_ratio_sum_limit_constraint(self):
         constraints = []
         constraint = {
             "type": "eq",
             "fun": self.fun_material_ratio_sum_limit_constraint,
+            "jac": self.jac_material_ratio_sum_limit_constraint,
             "name": "material_ratio_sum_limit_constraint",
+            "element_names": ["material_ratio_sum_limit_constraint"],
         }
         constraints.append(constraint)
         return constraints
 
-    def fun_material_ratio_bounds_constraint(
-            self, x, material_name: str, is_lower: bool
-    ):
-        x_ratio_var = dict(zip(self.keys, x))
-        if is_lower:
-            return (
-                    x_ratio_var[material_name]
-                    - self.input_data.material_dict[material_name].ratio_bounds[0]
-            )
-        else:
-            return (
-                    self.input_data.material_dict[material_name].ratio_bounds[1]
-                    - x_ratio_var[material_name]
-            )
+    def generate_material_ratio_bounds(self):
+        # 原料配比上下限直接作为变量边界传给求解器
+        return [(lb, ub) for lb, ub in self.input_data.material_bounds_arr]
+
+    def fun_material_ratio_bounds_constraint(self, x):
+        bounds_arr = self.input_data.material_bounds_arr
+        return np.concatenate([x - bounds_arr[:, 0], bounds_arr[:, 1] - x])
+
+    @staticmethod
+    def jac_material_ratio_bounds_constraint(x):
+        eye = np.eye(len(x))
+        return np.vstack([eye, -eye])
 
     def generate_material_ratio_bounds_constraint(self):
-        constraints = []
-        for mat_name, material in self.input_data.material_dict.items():
-            for lower in [True, False]:
-                bound_name = "lower" if lower else "upper"
-                constraint = {
-                    "type": "ineq",
-                    "fun": lambda x, material_name=mat_name, is_lower=lower: self.fun_material_ratio_bounds_constraint(
-                        x=x, material_name=material_name, is_lower=is_lower
-                    ),
-                    "name": "material_{}_ratio_{}_bound_constraint".format(
-                        mat_name, bound_name
-                    ),
-                }
-                constraints.append(constraint)
-        return constraints
+        # 仅用于约束检查，与 self.bounds 对应
+        element_names = [
+            "material_{}_ratio_{}_bound_constraint".format(mat_name, bound_name)
+            for bound_name in ["lower", "upper"]
+            for mat_name in self.input_data.material_name_lt
+        ]
+        constraint = {
+            "type": "ineq",
+            "fun": self.fun_material_ratio_bounds_constraint,
+            "jac": self.jac_material_ratio_bounds_constraint,
+            "name": "material_ratio_bounds_constraint",
+            "element_names": element_names,
+        }
+        return [constraint]
 
-    def fun_z_cc_bounds_constraint(
-            self, initial_guess_x, param: str, is_lower: bool
-    ):
-        x_ratio_var = dict(zip(self.keys, initial_guess_x))
-        p_material_plan_var = self.generate_p_material_plan_var(x_ratio_var=x_ratio_var)
+    def fun_z_cc_bounds_constraint(self, initial_guess_x):
+        p_material_plan_var = self.generate_p_material_plan_var(x_ratio_var=initial_guess_x)
         pr_material_plan_ratio_var = self.generate_pr_material_plan_ratio_var(p_material_plan_var=p_material_plan_var)
         p_chemical_compound_plan_var = self.generate_p_chemical_compound_plan_var(
-            x_ratio_var=x_ratio_var,
+            x_ratio_var=initial_guess_x,
             pr_material_plan_ratio_var=pr_material_plan_ratio_var
         )
 
-        cc = self.input_data.chemical_compound_dict[param]
-        if is_lower:
-            return p_chemical_compound_plan_var[param] - cc.ratio_bounds[0]
-        else:
-            return cc.ratio_bounds[1] - p_chemical_compound_plan_var[param]
+        bounds_arr = self.input_data.cc_bounds_arr
+        return np.concatenate([
+            p_chemical_compound_plan_var - bounds_arr[:, 0],
+            bounds_arr[:, 1] - p_chemical_compound_plan_var
+        ])
+
+    def jac_z_cc_bounds_constraint(self, initial_guess_x):
+        p_material_plan_var = self.generate_p_material_plan_var(x_ratio_var=initial_guess_x)
+        pr_material_plan_ratio_var = self.generate_pr_material_plan_ratio_var(p_material_plan_var=p_material_plan_var)
+        p_chemical_compound_plan_var = self.generate_p_chemical_compound_plan_var(
+            x_ratio_var=initial_guess_x,
+            pr_material_plan_ratio_var=pr_material_plan_ratio_var
+        )
+        jac = self.generate_p_chemical_compound_plan_jac(
+            x_ratio_var=initial_guess_x,
+            p_chemical_compound_plan_var=p_chemical_compound_plan_var
+        )
+        return np.vstack([jac, -jac])
 
     def generate_z_cc_bounds_constraint(self):
-        constraints = []
-        for cc_name in self.input_data.chemical_compound_dict:
-            for lower in [True, False]:
-                bound_name = "lower" if lower else "upper"
-                constraint = {
-                    "type": "ineq",
-                    "fun": lambda x, param=cc_name, is_lower=lower: self.fun_z_cc_bounds_constraint(
-                        initial_guess_x=x, param=param, is_lower=is_lower
-                    ),
-                    "name": "cc_{}_{}_bounds_constraint".format(
-                        cc_name, bound_name
-                    ),
-                }
-                constraints.append(constraint)
-        return constraints
+        element_names = [
+            "cc_{}_{}_bounds_constraint".format(cc_name, bound_name)
+            for bound_name in ["lower", "upper"]
+            for cc_name in self.input_data.chemical_compound_name_lt
+        ]
+        constraint = {
+            "type": "ineq",
+            "fun": self.fun_z_cc_bounds_constraint,
+            "jac": self.jac_z_cc_bounds_constraint,
+            "name": "cc_bounds_constraint",
+            "element_names": element_names,
+        }
+        return [constraint]
 
     # endregion
 
     # region 目标
     def get_objective(self, initial_guess_x):
-        x_ratio_var = dict(zip(self.keys, initial_guess_x))
-        p_material_plan_var = self.generate_p_material_plan_var(x_ratio_var=x_ratio_var)
-        pr_material_plan_ratio_var = self.generate_pr_material_plan_ratio_var(p_material_plan_var=p_material_plan_var)
-        dry_price_var = self.generate_dry_price_var(x_ratio_var=x_ratio_var)
-        p_chemical_compound_plan_var = self.generate_p_chemical_compound_plan_var(
-            x_ratio_var=x_ratio_var,
-            pr_material_plan_ratio_var=pr_material_plan_ratio_var
-        )
+        dry_price_var = self.generate_dry_price_var(x_ratio_var=initial_guess_x)
+        tfe_var = self.generate_tfe_var(x_ratio_var=initial_guess_x)
         ton_price_var = self.generate_ton_price_var(
             dry_price_var=dry_price_var,
-            p_chemical_compound_plan_var=p_chemical_compound_plan_var
+            tfe_var=tfe_var
         )
 
         return ton_price_var
 
+    def get_objective_jac(self, initial_guess_x):
+        # f = (x · dry_price) / (x · tfe)
+        dry_price_sum = initial_guess_x @ self.input_data.dry_price_arr
+        tfe_sum = initial_guess_x @ self.input_data.tfe_arr
+        return (self.input_data.dry_price_arr * tfe_sum - self.input_data.tfe_arr * dry_price_sum) / tfe_sum ** 2
+
     # endregion
+
+    # region 对偶值
+    def get_dual_values(self, result_x, tolerance=1e-4):
+        """
+        由 KKT 条件 ∇f = Σ μ ∇g + ν ∇h (μ >= 0) 在起作用约束上用非负最小二乘估计乘子，
+        返回每个成分上下限的影子价格 (吨度价对上下限的导数) 与每种原料的缩减成本 (吨度价对配比的导数)
+        """
+        n = len(self.keys)
+        m = len(self.input_data.chemical_compound_name_lt)
+        cc_value = self.fun_z_cc_bounds_constraint(result_x)
+        material_value = self.fun_material_ratio_bounds_constraint(result_x)
+        ineq_jac = np.vstack([self.jac_z_cc_bounds_constraint(result_x), self.jac_material_ratio_bounds_constraint(result_x)])
+        active = np.concatenate([cc_value, material_value]) <= tolerance
+        eq_jac = self.jac_material_ratio_sum_limit_constraint(result_x)
+
+        # 等式约束乘子无符号限制，拆成两个非负变量
+        A = np.hstack([ineq_jac[active].T, eq_jac.T, -eq_jac.T])
+        coef, _ = nnls(A, self.get_objective_jac(result_x))
+        multiplier = np.zeros(len(active))
+        multiplier[active] = coef[:active.sum()]
+
+        cc_multiplier = multiplier[:2 * m]
+        material_multiplier = multiplier[2 * m:]
+        cc_shadow_price_dict = {
+            cc_name: (float(cc_multiplier[j]), float(-cc_multiplier[m + j]))
+            for j, cc_name in enumerate(self.input_data.chemical_compound_name_lt)
+        }
+        material_reduced_cost_dict = {
+            material_name: float(material_multiplier[i] - material_multiplier[n + i])
+            for i, material_name in enumerate(self.keys)
+        }
+        return cc_shadow_price_dict, material_reduced_cost_dict
+
+    # endregion
+
+    def check_gradients(self, x, epsilon=1e-6, tolerance=1e-4):
+        """
+        将解析梯度与有限差分比较，返回各函数的最大绝对误差
+        """
+        st = time.time()
+        errors = {
+            "objective": np.max(np.abs(
+                self.get_objective_jac(x) - approx_fprime(x, self.get_objective, epsilon)
+            ))
+        }
+        for constraint in self.constraints + self.generate_material_ratio_bounds_constraint():
+            errors[constraint["name"]] = np.max(np.abs(
+                constraint["jac"](x) - approx_fprime(x, constraint["fun"], epsilon)
+            ))
+        timing.add_time("finite_difference", time.time() - st)
+
+        for name, error in errors.items():
+            if error > tolerance:
+                logging.error("gradient check failed for {}: max error {}".format(name, error))
+            else:
+                logging.info("gradient check passed for {}: max error {}".format(name, error))
+        return errors
+
     def run_model(self):
         x_ratio_var = self.initial_x
-        initial_x = []
-        for key, val in x_ratio_var.items():
-            self.keys.append(key)
-            initial_x.append(val)
-        initial_guess = np.array(initial_x)
+        self.keys = list(self.input_data.material_name_lt)
+        initial_guess = np.array([x_ratio_var[key] for key in self.keys], dtype=float)
 
         self.generate_constraints()
+        if self.input_data.check_gradient:
+            self.check_gradients(x=initial_guess)
 
         # 定义 accept_test 函数
         def accept_test(f_new, x_new, f_old, x_old):
             # 检查新解是否满足所有约束条件
-            for constraint in self.constraints:
-                if constraint['type'] == 'ineq' and constraint['fun'](x_new) < -1e-2:
-                    return False
-                if constraint['type'] == 'eq' and abs(constraint['fun'](x_new)) > 1e-2:
-                    return False
-            return True
-
-        random_results = []
+            return not self.get_violations(result_x=x_new, tolerance=1e-2)
+
         start_time = time.time()
 
         # 定义回调函数
         def callback(x, f, accepted):
+            timing.add_count("basinhopping_iteration")
+            if accepted:
+                timing.add_count("basinhopping_accepted")
             elapsed_time = time.time() - start_time
             if elapsed_time > self.input_data.time_limit:
                 return True  # 返回 True 表示停止优化
@@ -235,9 +289,6 @@ class Model:
                     callback.no_improvement_count += 1
                     if callback.no_improvement_count >= 30:
                         return True  # 返回 True 表示停止迭代
-            if random.random() < 0.3 and len(random_results) < 2:
-                # 添加新解到结果列表  # 保持列表中2个解
-                random_results.append((x.copy(), f))
 
             callback.iteration += 1
 
@@ -247,9 +298,11 @@ class Model:
             self.get_objective,
             initial_guess,
             minimizer_kwargs={
+                "jac": self.get_objective_jac,
                 "constraints": self.constraints,
+                "bounds": self.bounds,
                 "method": "SLSQP",
-                "options": {'disp': True},
+                "options": {'disp': False},
                 "tol": 1e-2
             },
             niter=1,
@@ -268,49 +321,32 @@ class Model:
 
         self.check_constraints(result_x=result.x)
         logging.info("model solution objective: {}".format(result.fun))
-        multi_results = [(result.x.copy(), result.fun)] + random_results
+        multi_results = [(result.x.copy(), result.fun)]
         return result, multi_results
 
-    def check_constraints(self, result_x, tolerance=0.001):
-        constraints = self.constraints
+    def get_violations(self, result_x, tolerance=0.001):
+        constraints = self.constraints + self.generate_material_ratio_bounds_constraint()
 
         violations = []
-        for i, constraint in enumerate(constraints):
+        for constraint in constraints:
             constraint_type = constraint["type"]
-            constraint_fun = constraint["fun"]
-            constraint_name = constraint["name"]
-            constraint_value = constraint_fun(result_x)
-
-            if isinstance(constraint_value, list) or isinstance(
-                    constraint_value, np.ndarray
-            ):
-                for j, value in enumerate(constraint_value):
-                    if constraint_type == "ineq" and value < -tolerance:
-                        violations.append(
-                            f"Constraint '{constraint_name}' (inequality) not satisfied: value = {value}"
-                        )
-                    elif constraint_type == "eq" and not np.isclose(
-                            value, 0, atol=tolerance
-                    ):
-                        violations.append(
-                            f"Constraint '{constraint_name}' (equality) not satisfied: value = {value}"
-                        )
+            constraint_value = np.atleast_1d(constraint["fun"](result_x))
+            if constraint_type == "ineq":
+                violated = np.flatnonzero(constraint_value < -tolerance)
             else:
-                if constraint_type == "ineq" and constraint_value < -tolerance:
-                    violations.append(
-                        f"Constraint '{constraint_name}' (inequality) not satisfied: value = {constraint_value}"
-                    )
-                elif constraint_type == "eq" and not np.isclose(
-                        constraint_value, 0, atol=tolerance
-                ):
-                    violations.append(
-                        f"Constraint {i + 1} (equality) not satisfied: value = {constraint_value}"
-                    )
-                    violations.append(
-                        f"Constraint '{constraint_name}' (equality) not satisfied: value = {constraint_value}"
-                    )
+                violated = np.flatnonzero(np.abs(constraint_value) > tolerance)
+            for j in violated:
+                violations.append((constraint["element_names"][j], constraint_type, constraint_value[j]))
+        return violations
+
+    def check_constraints(self, result_x, tolerance=0.001):
+        violations = self.get_violations(result_x=result_x, tolerance=tolerance)
 
         if violations:
             logging.error("以下约束条件未满足:")
-            for violation in violations:
-                logging.error(violation)
+            for constraint_name, constraint_type, value in violations:
+                type_name = "inequality" if constraint_type == "ineq" else "equality"
+                logging.error(
+                    f"Constraint '{constraint_name}' ({type_name}) not satisfied: value = {value}"
+                )
+        return violations
@@ -0,0 +1,262 @@
+import logging
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+from .input_data import InputData
+from .utils import field, header
+
+
+def generate_cc_rows(content, bounds_arr, dry_factor_arr, h2o_index=None):
+    """
+    一个批次的成分上下限行 sum(w * y * (lb - c)) <= 0 与 sum(w * y * (c - ub)) <= 0，
+    与 LinearFractionalModel.generate_lp_z_cc_bounds_constraint 相同，去掉上下限为 [0, 100] 的无效行
+    """
+    weight = np.ones_like(content)
+    if h2o_index is not None:
+        weight[:, h2o_index] = 1 / dry_factor_arr
+    A_lower = (weight * (bounds_arr[:, 0] - content)).T
+    A_upper = (weight * (content - bounds_arr[:, 1])).T
+    active_lower = bounds_arr[:, 0] > 0
+    active_upper = bounds_arr[:, 1] < 100
+    return sparse.csr_matrix(np.vstack([A_lower[active_lower], A_upper[active_upper]]))
+
+
+def generate_ratio_bound_rows(bounds_arr, tonnage_arr):
+    """
+    多个批次 (产量 tonnage_arr) 的原料配比上下限行：
+    lb_i T_b / 100 t - y_{b,i} <= 0 与 y_{b,i} - ub_i T_b / 100 t <= 0，返回 y 部分与 t 列
+    """
+    n = len(bounds_arr)
+    batch_num = len(tonnage_arr)
+    y_parts, t_parts = [], []
+    for col, sign in ((0, -1), (1, 1)):
+        index = np.flatnonzero(bounds_arr[:, 0] > 0) if sign < 0 else np.flatnonzero(bounds_arr[:, 1] < 100)
+        rows = np.arange(batch_num * len(index))
+        cols = (np.arange(batch_num).reshape(-1, 1) * n + index).ravel()
+        y_parts.append(
+            sparse.csr_matrix((np.full(len(rows), float(sign)), (rows, cols)), shape=(len(rows), batch_num * n))
+        )
+        t_parts.append(-sign * np.outer(tonnage_arr, bounds_arr[index, col]).reshape(-1, 1) / 100)
+    return sparse.vstack(y_parts, format="csr"), np.vstack(t_parts)
+
+
+class MultiPeriodPlanner:
+    """
+    多周期配矿计划：给定各堆存货的期初库存 (湿吨)、各周期到货 (湿吨) 与产量 (干吨)，
+    在整个计划期内使 总原料成本 / 总 TFe 量 (即计划期吨度价) 最低，同时每个周期满足原料配比与产品成分上下限。
+    与 LinearFractionalModel 相同，用 Charnes–Cooper 变换化为一个稀疏线性规划，变量为
+        [y_{d,i} (周期 × 原料用量), s_{d,k} (周期 × 有库存限制的原料期末库存), t]
+    库存表中没有的原料视为不限量。
+    滚动计划：apply_actuals 录入当前周期实际用量与到货后，只对剩余周期重新求解
+    """
+
+    def __init__(self, input_data: InputData):
+        self.input_data = input_data
+        self.period_lt: List = []
+        self.production_arr = np.zeros(0)
+        # 有库存限制的原料下标及其库存
+        self.limited_index = np.zeros(0, dtype=int)
+        self.inventory_arr = np.zeros(0)
+        # 周期 × 有库存限制的原料
+        self.delivery_matrix = np.zeros((0, 0))
+        # 第一个未执行的周期
+        self.start_period = 0
+        self.lp_res = None
+        self.usage_matrix = np.zeros((0, 0))
+        self.end_inventory_matrix = np.zeros((0, 0))
+
+    # region 数据
+    def load_plan_data(self):
+        ih = header.InventoryHeader
+        dh = header.DeliveryHeader
+        pph = header.ProductionPlanHeader
+        material_index = self.input_data.material_index
+
+        production_df = self.input_data.get_sheet_df(sheet_name=field.PRODUCTION_PLAN_SHEET)
+        self.period_lt = production_df[pph.period].tolist()
+        self.production_arr = production_df[pph.production].to_numpy(dtype=float)
+        period_index = {period: d for d, period in enumerate(self.period_lt)}
+
+        inventory_df = self.input_data.get_sheet_df(sheet_name=field.INVENTORY_SHEET)
+        inventory_df = inventory_df[inventory_df[ih.material_name].isin(material_index)]
+        self.limited_index = np.array([material_index[name] for name in inventory_df[ih.material_name]], dtype=int)
+        self.inventory_arr = inventory_df[ih.inventory].fillna(0).to_numpy(dtype=float)
+        limited_position = {i: k for k, i in enumerate(self.limited_index)}
+
+        self.delivery_matrix = np.zeros((len(self.period_lt), len(self.limited_index)))
+        try:
+            delivery_df = self.input_data.get_sheet_df(sheet_name=field.DELIVERY_SHEET)
+        except ValueError:
+            # 没有到货表时各周期无到货
+            delivery_df = None
+        if delivery_df is not None:
+            for period, material_name, delivery in zip(
+                    delivery_df[dh.period], delivery_df[dh.material_name], delivery_df[dh.delivery].astype(float)
+            ):
+                i = material_index.get(material_name)
+                if period in period_index and i in limited_position and not np.isnan(delivery):
+                    self.delivery_matrix[period_index[period], limited_position[i]] += delivery
+        self.start_period = 0
+        logging.info("plan data loaded: {} periods, {} limited materials".format(
+            len(self.period_lt), len(self.limited_index)
+        ))
+
+    # endregion
+
+    # region 线性规划定义
+    def generate_lp(self):
+        n = len(self.input_data.material_name_lt)
+        production_arr = self.production_arr[self.start_period:]
+        delivery_matrix = self.delivery_matrix[self.start_period:]
+        period_num = len(production_arr)
+        limited_num = len(self.limited_index)
+        y_num = period_num * n
+        s_num = period_num * limited_num
+        var_num = y_num + s_num + 1
+
+        c = np.zeros(var_num)
+        c[:y_num] = np.tile(self.input_data.dry_price_arr, period_num)
+
+        # 等式约束
+        # 1. TFe · y = 1
+        row_tfe = sparse.csr_matrix(
+            (np.tile(self.input_data.tfe_arr, period_num), (np.zeros(y_num, dtype=int), np.arange(y_num))),
+            shape=(1, var_num)
+        )
+        # 2. sum_i y_{d,i} - P_d t = 0
+        row_production = sparse.hstack([
+            sparse.kron(sparse.identity(period_num), np.ones((1, n))),
+            sparse.csr_matrix((period_num, s_num)),
+            sparse.csr_matrix(-production_arr.reshape(-1, 1)),
+        ])
+        # 3. s_{d,k} - s_{d-1,k} + y_{d,i_k} / dry_factor_{i_k} - (delivery_{d,k} + [d = 0] inventory_k) t = 0
+        y_select = sparse.csr_matrix(
+            (1 / self.input_data.dry_factor_arr[self.limited_index], (np.arange(limited_num), self.limited_index)),
+            shape=(limited_num, n)
+        )
+        s_shift = sparse.identity(period_num) - sparse.eye(period_num, k=-1)
+        inflow = delivery_matrix.copy()
+        if period_num:
+            inflow[0] += self.inventory_arr
+        row_inventory = sparse.hstack([
+            sparse.kron(sparse.identity(period_num), y_select),
+            sparse.kron(s_shift, sparse.identity(limited_num)),
+            sparse.csr_matrix(-inflow.reshape(-1, 1)),
+        ])
+        A_eq = sparse.vstack([row_tfe, row_production, row_inventory], format="csr")
+        b_eq = np.concatenate([[1], np.zeros(period_num + s_num)])
+
+        # 不等式约束
+        y_part, t_part = generate_ratio_bound_rows(
+            bounds_arr=self.input_data.material_bounds_arr, tonnage_arr=production_arr
+        )
+        row_ratio = sparse.hstack([y_part, sparse.csr_matrix((y_part.shape[0], s_num)), sparse.csr_matrix(t_part)])
+        cc_block = generate_cc_rows(
+            content=self.input_data.cc_content_matrix,
+            bounds_arr=self.input_data.cc_bounds_arr,
+            dry_factor_arr=self.input_data.dry_factor_arr,
+            h2o_index=self.input_data.h2o_index,
+        )
+        row_cc = sparse.hstack([
+            sparse.kron(sparse.identity(period_num), cc_block),
+            sparse.csr_matrix((period_num * cc_block.shape[0], s_num + 1)),
+        ])
+        A_ub = sparse.vstack([row_ratio, row_cc], format="csr")
+        b_ub = np.zeros(A_ub.shape[0])
+        return c, A_ub, b_ub, A_eq, b_eq
+
+    # endregion
+
+    def solve(self):
+        """
+        求解从 start_period 开始的剩余周期
+        """
+        st = time.time()
+        n = len(self.input_data.material_name_lt)
+        period_num = len(self.period_lt) - self.start_period
+        c, A_ub, b_ub, A_eq, b_eq = self.generate_lp()
+        build_time = time.time() - st
+        res = linprog(
+            c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=(0, None), method='highs',
+            options={"time_limit": float(self.input_data.time_limit)}
+        )
+        self.lp_res = res
+
+        if res.status == 0:
+            t = res.x[-1]
+            self.usage_matrix = res.x[:period_num * n].reshape(period_num, n) / t
+            self.end_inventory_matrix = res.x[period_num * n:-1].reshape(period_num, -1) / t
+            logging.info("Successful solution, message: {}".format(res.message))
+            logging.info("Objective: {}".format(res.fun))
+        else:
+            self.usage_matrix = np.full((period_num, n), np.nan)
+            self.end_inventory_matrix = np.full((period_num, len(self.limited_index)), np.nan)
+            logging.error("Unsuccessful solution, message: {}".format(res.message))
+        logging.info("plan of {} periods x {} materials: {} rows, {} nonzeros, build {}s, total {}s".format(
+            period_num, n, A_ub.shape[0] + A_eq.shape[0], A_ub.nnz + A_eq.nnz, build_time, time.time() - st
+        ))
+        return res
+
+    def apply_actuals(self, actual_usage_dict: Dict[str, float], actual_delivery_dict: Dict[str, float] = None):
+        """
+        录入第 start_period 个周期的实际用量 (干吨) 与实际到货 (湿吨，缺省为计划到货)，更新库存并前移一个周期
+        """
+        material_index = self.input_data.material_index
+        limited_position = {i: k for k, i in enumerate(self.limited_index)}
+        delivery_arr = self.delivery_matrix[self.start_period].copy()
+        if actual_delivery_dict is not None:
+            delivery_arr[:] = 0
+            for material_name, delivery in actual_delivery_dict.items():
+                i = material_index[material_name]
+                if i in limited_position:
+                    delivery_arr[limited_position[i]] = delivery
+        self.inventory_arr = self.inventory_arr + delivery_arr
+        for material_name, usage in actual_usage_dict.items():
+            i = material_index[material_name]
+            if i in limited_position:
+                self.inventory_arr[limited_position[i]] -= usage / self.input_data.dry_factor_arr[i]
+        self.start_period += 1
+
+    def generate_result_df(self):
+        prh = header.PlanResultHeader
+        material_name_lt = self.input_data.material_name_lt
+        n = len(material_name_lt)
+        period_lt = self.period_lt[self.start_period:]
+        production_arr = self.production_arr[self.start_period:]
+
+        end_inventory_matrix = np.full(self.usage_matrix.shape, np.nan)
+        end_inventory_matrix[:, self.limited_index] = self.end_inventory_matrix
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio_matrix = 100 * self.usage_matrix / production_arr.reshape(-1, 1)
+            objective_arr = (
+                    (self.usage_matrix @ self.input_data.dry_price_arr) / (self.usage_matrix @ self.input_data.tfe_arr)
+            )
+            tfe_arr = self.usage_matrix @ self.input_data.tfe_arr / self.usage_matrix.sum(axis=1)
+
+        plan_df = pd.DataFrame({
+            prh.period: np.repeat(period_lt, n),
+            prh.material_name: np.tile(material_name_lt, len(period_lt)),
+            prh.usage: self.usage_matrix.ravel(),
+            prh.ratio: ratio_matrix.ravel(),
+            prh.end_inventory: end_inventory_matrix.ravel(),
+        })
+        summary_df = pd.DataFrame({
+            prh.period: period_lt,
+            prh.production: production_arr,
+            prh.objective: objective_arr,
+            prh.tfe: tfe_arr,
+        })
+        return plan_df, summary_df
+
+    def write_to_excel(self, output_file: str = None):
+        output_file = output_file or "{}{}".format(self.input_data.exe_folder, field.PLAN_RESULT_FILENAME)
+        plan_df, summary_df = self.generate_result_df()
+        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+            summary_df.to_excel(writer, sheet_name=field.PLAN_SUMMARY_SHEET, index=False)
+            plan_df.to_excel(writer, sheet_name=field.PLAN_SHEET, index=False)
+        logging.info("plan written to {}".format(output_file))
@@ -0,0 +1,173 @@
+import logging
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+from .input_data import InputData
+from .multi_period import generate_cc_rows, generate_ratio_bound_rows
+from .utils import enums, field, header
+
+
+class MultiProductModel:
+    """
+    多产品配矿：产品方案表中的每个产品有自己的产量和成分表 (格式同 产品成分)，
+    各产品共用 配矿模型 中的原料配比上下限和 库存 表中的原料库存 (湿吨，库存表中没有的原料不限量)。
+    目标为所有产品合计的吨度价 (总原料成本 / 总 TFe 量)，Charnes–Cooper 变换后为一个稀疏线性规划，
+    变量为 [y_{p,i} (产品 × 原料用量), t]
+    """
+
+    def __init__(self, input_data: InputData):
+        self.input_data = input_data
+        self.product_name_lt: List[str] = []
+        self.production_arr = np.zeros(0)
+        # 产品 × enums.CHEMICAL_COMPONENT_LT × (下限, 上限)
+        self.product_cc_bounds_arr = np.zeros((0, len(enums.CHEMICAL_COMPONENT_LT), 2))
+        self.limited_index = np.zeros(0, dtype=int)
+        self.inventory_arr = np.zeros(0)
+        self.lp_res = None
+        self.usage_matrix = np.zeros((0, 0))
+
+    # region 数据
+    def load_product_data(self):
+        ph = header.ProductHeader
+        cch = header.ChemicalCompoundHeader
+        ih = header.InventoryHeader
+        cc_index = {cc_name: j for j, cc_name in enumerate(enums.CHEMICAL_COMPONENT_LT)}
+
+        product_df = self.input_data.get_sheet_df(sheet_name=field.PRODUCT_SHEET)
+        product_df = product_df.dropna(subset=[ph.product_name])
+        self.product_name_lt = product_df[ph.product_name].astype(str).tolist()
+        self.production_arr = product_df[ph.production].to_numpy(dtype=float)
+
+        # 成分表中没有的成分不限制
+        self.product_cc_bounds_arr = np.tile([0.0, 100.0], (len(self.product_name_lt), len(cc_index), 1))
+        for p, spec_sheet in enumerate(product_df[ph.spec_sheet]):
+            spec_df = self.input_data.read_chemical_compound_df(sheet_name=spec_sheet)
+            spec_df = spec_df[spec_df[cch.chemical_compound_name].isin(cc_index)]
+            j = [cc_index[cc_name] for cc_name in spec_df[cch.chemical_compound_name]]
+            self.product_cc_bounds_arr[p, j, 0] = spec_df[cch.low_bound].fillna(0).to_numpy(dtype=float)
+            self.product_cc_bounds_arr[p, j, 1] = spec_df[cch.up_bound].fillna(100).to_numpy(dtype=float)
+
+        try:
+            inventory_df = self.input_data.get_sheet_df(sheet_name=field.INVENTORY_SHEET)
+        except ValueError:
+            # 没有库存表时原料均不限量
+            inventory_df = pd.DataFrame(columns=[ih.material_name, ih.inventory])
+        material_index = self.input_data.material_index
+        inventory_df = inventory_df[inventory_df[ih.material_name].isin(material_index)]
+        self.limited_index = np.array([material_index[name] for name in inventory_df[ih.material_name]], dtype=int)
+        self.inventory_arr = inventory_df[ih.inventory].fillna(0).to_numpy(dtype=float)
+        logging.info("product data loaded: {} products, {} limited materials".format(
+            len(self.product_name_lt), len(self.limited_index)
+        ))
+
+    # endregion
+
+    # region 线性规划定义
+    def generate_lp(self):
+        n = len(self.input_data.material_name_lt)
+        product_num = len(self.product_name_lt)
+        limited_num = len(self.limited_index)
+
+        c = np.append(np.tile(self.input_data.dry_price_arr, product_num), 0)
+
+        # 等式约束：TFe · sum_p y_p = 1，sum_i y_{p,i} - T_p t = 0
+        row_tfe = sparse.csr_matrix(np.append(np.tile(self.input_data.tfe_arr, product_num), 0))
+        row_production = sparse.hstack([
+            sparse.kron(sparse.identity(product_num), np.ones((1, n))),
+            sparse.csr_matrix(-self.production_arr.reshape(-1, 1)),
+        ])
+        A_eq = sparse.vstack([row_tfe, row_production], format="csr")
+        b_eq = np.append(1, np.zeros(product_num))
+
+        # 不等式约束
+        y_part, t_part = generate_ratio_bound_rows(
+            bounds_arr=self.input_data.material_bounds_arr, tonnage_arr=self.production_arr
+        )
+        row_ratio = sparse.hstack([y_part, sparse.csr_matrix(t_part)])
+        # 各产品的成分上下限行按块对角排列
+        h2o_index = enums.CHEMICAL_COMPONENT_LT.index(enums.ChemicalCompoundName.H2O)
+        cc_blocks = [
+            generate_cc_rows(
+                content=self.input_data.assay_matrix,
+                bounds_arr=self.product_cc_bounds_arr[p],
+                dry_factor_arr=self.input_data.dry_factor_arr,
+                h2o_index=h2o_index,
+            )
+            for p in range(product_num)
+        ]
+        A_cc = sparse.block_diag(cc_blocks, format="csr")
+        row_cc = sparse.hstack([A_cc, sparse.csr_matrix((A_cc.shape[0], 1))])
+        # 共用库存：sum_p y_{p,i} / dry_factor_i - inventory_i t <= 0
+        y_select = sparse.csr_matrix(
+            (1 / self.input_data.dry_factor_arr[self.limited_index], (np.arange(limited_num), self.limited_index)),
+            shape=(limited_num, n)
+        )
+        row_inventory = sparse.hstack([
+            sparse.kron(np.ones((1, product_num)), y_select),
+            sparse.csr_matrix(-self.inventory_arr.reshape(-1, 1)),
+        ])
+        A_ub = sparse.vstack([row_ratio, row_cc, row_inventory], format="csr")
+        b_ub = np.zeros(A_ub.shape[0])
+        return c, A_ub, b_ub, A_eq, b_eq
+
+    # endregion
+
+    def run_model(self):
+        st = time.time()
+        n = len(self.input_data.material_name_lt)
+        c, A_ub, b_ub, A_eq, b_eq = self.generate_lp()
+        res = linprog(
+            c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=(0, None), method='highs',
+            options={"time_limit": float(self.input_data.time_limit)}
+        )
+        self.lp_res = res
+
+        if res.status == 0:
+            self.usage_matrix = res.x[:-1].reshape(-1, n) / res.x[-1]
+            logging.info("Successful solution, message: {}".format(res.message))
+            logging.info("Objective: {}".format(res.fun))
+        else:
+            self.usage_matrix = np.full((len(self.product_name_lt), n), np.nan)
+            logging.error("Unsuccessful solution, message: {}".format(res.message))
+        logging.info("multi product model of {} products: {} rows, {} nonzeros, time: {}s".format(
+            len(self.product_name_lt), A_ub.shape[0] + A_eq.shape[0], A_ub.nnz + A_eq.nnz, time.time() - st
+        ))
+        return res
+
+    def generate_result_df(self):
+        mph = header.MultiProductResultHeader
+        material_name_lt = self.input_data.material_name_lt
+        n = len(material_name_lt)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio_matrix = 100 * self.usage_matrix / self.production_arr.reshape(-1, 1)
+            objective_arr = (
+                    (self.usage_matrix @ self.input_data.dry_price_arr) / (self.usage_matrix @ self.input_data.tfe_arr)
+            )
+            tfe_arr = self.usage_matrix @ self.input_data.tfe_arr / self.usage_matrix.sum(axis=1)
+
+        ratio_df = pd.DataFrame({
+            mph.product_name: np.repeat(self.product_name_lt, n),
+            mph.material_name: np.tile(material_name_lt, len(self.product_name_lt)),
+            mph.usage: self.usage_matrix.ravel(),
+            mph.ratio: ratio_matrix.ravel(),
+        })
+        summary_df = pd.DataFrame({
+            mph.product_name: self.product_name_lt,
+            mph.production: self.production_arr,
+            mph.objective: objective_arr,
+            mph.tfe: tfe_arr,
+        })
+        return ratio_df, summary_df
+
+    def write_to_excel(self, output_file: str = None):
+        output_file = output_file or "{}{}".format(self.input_data.exe_folder, field.MULTI_PRODUCT_RESULT_FILENAME)
+        ratio_df, summary_df = self.generate_result_df()
+        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+            summary_df.to_excel(writer, sheet_name=field.MULTI_PRODUCT_SUMMARY_SHEET, index=False)
+            ratio_df.to_excel(writer, sheet_name=field.MULTI_PRODUCT_RATIO_SHEET, index=False)
+        logging.info("multi product results written to {}".format(output_file))
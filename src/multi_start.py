@@ -0,0 +1,143 @@
+import numpy as np
+from scipy.optimize import minimize, OptimizeResult
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import logging
+import os
+import time
+from .model import Model
+from .initial_sol import InitialSolution
+from .input_data import InputData
+
+# 子进程中的模型，由 _init_worker 在进程启动时创建一次
+_worker_model = None
+
+
+def _init_worker(input_data: InputData):
+    global _worker_model
+    _worker_model = Model(input_data=input_data, initial_x=dict())
+    _worker_model.keys = list(input_data.material_name_lt)
+    _worker_model.generate_constraints()
+
+
+def _solve_from_start(x0, tol):
+    result = minimize(
+        _worker_model.get_objective,
+        x0,
+        jac=_worker_model.get_objective_jac,
+        constraints=_worker_model.constraints,
+        bounds=_worker_model.bounds,
+        method="SLSQP",
+        tol=tol,
+    )
+    feasible = not _worker_model.get_violations(result_x=result.x, tolerance=1e-3)
+    return result.x, result.fun, feasible, result.message
+
+
+class MultiStartModel(Model):
+    """
+    从 InitialSolution 线性多面体的随机顶点出发，在进程池中并行执行多次 SLSQP 局部搜索，
+    在 time_limit 内返回最优解及所有互不相同的局部最优解
+    """
+
+    def __init__(
+            self,
+            input_data: InputData,
+            start_num: int = None,
+            max_workers: int = None,
+            seed: int = 0,
+            tol: float = 1e-6,
+            distinct_distance: float = 0.1
+    ):
+        super().__init__(input_data=input_data, initial_x=dict())
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.start_num = start_num or self.input_data.multi_start_num
+        self.seed = seed
+        self.tol = tol
+        # 两个局部最优解配比向量的欧氏距离小于该值时视为同一个解
+        self.distinct_distance = distinct_distance
+
+    def generate_start_points(self):
+        rng = np.random.default_rng(self.seed)
+        initial_sol = InitialSolution(input_data=self.input_data)
+        n = len(self.input_data.material_name_lt)
+
+        start_points = []
+        for _ in range(self.start_num):
+            x_ratio_var = initial_sol.generate_initial_x(c=rng.standard_normal(n))
+            start_points.append(np.array([x_ratio_var[key] for key in self.input_data.material_name_lt]))
+        return start_points
+
+    def get_distinct_results(self, local_results):
+        distinct_results = []
+        for x, fun in sorted(local_results, key=lambda item: item[1]):
+            if all(np.linalg.norm(x - other_x) >= self.distinct_distance for other_x, _ in distinct_results):
+                distinct_results.append((x, fun))
+        return distinct_results
+
+    @staticmethod
+    def terminate_workers(executor: ProcessPoolExecutor):
+        # shutdown 只取消未开始的局部搜索，运行中的搜索需终止工作进程，总时间才不超过运行时间限制
+        if hasattr(executor, "terminate_workers"):
+            executor.terminate_workers()
+            return
+        process_lt = list((executor._processes or dict()).values())
+        for process in process_lt:
+            process.terminate()
+        for process in process_lt:
+            process.join()
+
+    def run_model(self):
+        start_time = time.time()
+        self.keys = list(self.input_data.material_name_lt)
+        self.generate_constraints()
+        start_points = self.generate_start_points()
+
+        local_results = []
+        infeasible_num = 0
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(self.input_data,)
+        )
+        try:
+            pending = {executor.submit(_solve_from_start, x0, self.tol) for x0 in start_points}
+            while pending:
+                remaining_time = self.input_data.time_limit - (time.time() - start_time)
+                if remaining_time <= 0:
+                    logging.warning("time limit reached, {} starts not finished".format(len(pending)))
+                    break
+                done, pending = wait(pending, timeout=remaining_time, return_when=FIRST_COMPLETED)
+                for future in done:
+                    x, fun, feasible, _ = future.result()
+                    if feasible:
+                        local_results.append((x, fun))
+                    else:
+                        infeasible_num += 1
+        finally:
+            if pending:
+                self.terminate_workers(executor)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        distinct_results = self.get_distinct_results(local_results)
+        logging.info("multi start: {} starts, {} feasible, {} infeasible, {} distinct local optima".format(
+            len(start_points), len(local_results), infeasible_num, len(distinct_results)
+        ))
+
+        if distinct_results:
+            best_x, best_fun = distinct_results[0]
+            result = OptimizeResult(
+                x=best_x, fun=best_fun, success=True, message="best of {} local optima".format(len(local_results))
+            )
+            logging.info("Successful solution, message: {}".format(result.message))
+        else:
+            # 没有可行的局部解时退回第一个初始点
+            best_x = start_points[0]
+            result = OptimizeResult(
+                x=best_x, fun=self.get_objective(best_x), success=False, message="no feasible local optimum found"
+            )
+            logging.error("Unsuccessful solution, message: {}".format(result.message))
+
+        self.check_constraints(result_x=result.x)
+        logging.info("multi start solution objective: {}, time: {}s".format(result.fun, time.time() - start_time))
+        multi_results = [(x.copy(), fun) for x, fun in distinct_results] or [(result.x.copy(), result.fun)]
+        return result, multi_results
@@ -0,0 +1,122 @@
+import copy
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+from .input_data import InputData
+from .infeasibility import InfeasibilityDiagnosis
+from .sensitivity import SensitivityAnalysis
+from .solver_session import SolverSession
+from .utils import enums, field, header
+
+
+class ParetoFrontier:
+    """
+    吨度价与某一成分的帕累托前沿 (ε-约束法)：
+    从成本最优方案的成分值出发，逐步收紧该成分的下限 (TFe 等品位) 或上限 (SiO2、Al2O3、P 等杂质) 直到可达极值，
+    每个点求吨度价最低的方案。扫描复用 SensitivityAnalysis，相邻点分到同一进程并热启动
+    """
+
+    def __init__(
+            self,
+            input_data: InputData,
+            chemical_compound_name: str,
+            point_num: int = 11,
+            bound_type: str = None,
+            max_workers: int = None
+    ):
+        if chemical_compound_name not in input_data.chemical_compound_index:
+            raise ValueError("成分 {} 不在产品成分表中，无法扫描其上下限".format(chemical_compound_name))
+        if chemical_compound_name == enums.ChemicalCompoundName.H2O:
+            raise ValueError("水分按湿基计，不支持作为前沿成分")
+        self.input_data = input_data
+        self.chemical_compound_name = chemical_compound_name
+        self.point_num = point_num
+        sp = enums.SensitivityParam
+        # 默认 TFe 提高下限，其余成分降低上限
+        self.bound_type = bound_type or (
+            sp.CC_LOW_BOUND if chemical_compound_name == enums.ChemicalCompoundName.TFe else sp.CC_UP_BOUND
+        )
+        self.max_workers = max_workers
+        self.frontier_df = pd.DataFrame()
+
+    def get_compound_value(self, x):
+        j = self.input_data.chemical_compound_index[self.chemical_compound_name]
+        x = np.asarray(x, dtype=float)
+        return float(x @ self.input_data.cc_content_matrix[:, j] / x.sum())
+
+    def get_extreme_value(self):
+        """
+        去掉被扫描的那一侧界限，在其余约束下求该成分可达的最大值 (扫描下限) 或最小值 (扫描上限)
+        """
+        diagnosis = InfeasibilityDiagnosis(input_data=self.input_data)
+        diagnosis.generate_candidate_constraints()
+        row_mask = np.array([
+            not (object_name == self.chemical_compound_name and bound_type == self.bound_type)
+            for object_name, bound_type, _ in diagnosis.row_info_lt
+        ])
+
+        n = len(self.input_data.material_name_lt)
+        j = self.input_data.chemical_compound_index[self.chemical_compound_name]
+        content = self.input_data.cc_content_matrix[:, j]
+        c = -content if self.bound_type == enums.SensitivityParam.CC_LOW_BOUND else content
+        res = linprog(
+            c, A_ub=diagnosis.A[row_mask], b_ub=diagnosis.b[row_mask],
+            A_eq=sparse.csr_matrix(np.ones((1, n))), b_eq=[100], bounds=[(0, None)] * n, method='highs'
+        )
+        if res.status != 0:
+            raise ValueError("其余约束不可行，无法生成前沿: {}".format(res.message))
+        return self.get_compound_value(res.x)
+
+    def generate_bound_values(self):
+        # 起点为成本最优方案的成分值，此时该界限不起作用
+        session = SolverSession(input_data=copy.deepcopy(self.input_data))
+        result = session.solve()
+        if not result.success:
+            raise ValueError("成本最优方案求解失败: {}".format(result.message))
+        start_value = self.get_compound_value(result.x)
+        end_value = self.get_extreme_value()
+        logging.info("{} {} frontier from {} to {}".format(
+            self.chemical_compound_name, self.bound_type, start_value, end_value
+        ))
+        return np.linspace(start_value, end_value, self.point_num)
+
+    def run(self):
+        st = time.time()
+        bound_values = self.generate_bound_values()
+        param = (self.bound_type, self.chemical_compound_name)
+        sensitivity = SensitivityAnalysis(input_data=self.input_data, max_workers=self.max_workers)
+        sensitivity_df = sensitivity.run(grid={param: bound_values.tolist()})
+        self.frontier_df = self.generate_frontier_df(
+            sensitivity_df=sensitivity_df, param_column=sensitivity.get_param_column(param)
+        )
+        logging.info("pareto frontier of {} points finished in {}s".format(self.point_num, time.time() - st))
+        return self.frontier_df
+
+    def generate_frontier_df(self, sensitivity_df: pd.DataFrame, param_column: str):
+        """
+        每个点一行：界限、实际成分值、吨度价与各原料配比
+        """
+        sh = header.SensitivityHeader
+        ph = header.ParetoHeader
+        ratio_df = sensitivity_df.pivot(index=sh.point_id, columns=sh.material_name, values=sh.ratio)
+        ratio_df = ratio_df[self.input_data.material_name_lt]
+        point_df = sensitivity_df.drop_duplicates(sh.point_id).set_index(sh.point_id)
+
+        frontier_df = pd.DataFrame({
+            ph.point_id: ratio_df.index,
+            ph.bound_value: point_df.loc[ratio_df.index, param_column].to_numpy(),
+            ph.compound_value: [self.get_compound_value(x) for x in ratio_df.to_numpy()],
+            ph.objective: point_df.loc[ratio_df.index, sh.objective].to_numpy(),
+            ph.success: point_df.loc[ratio_df.index, sh.success].to_numpy(),
+        })
+        return pd.concat([frontier_df, ratio_df.reset_index(drop=True)], axis=1)
+
+    def write_to_excel(self, output_file: str = None):
+        output_file = output_file or "{}{}".format(self.input_data.exe_folder, field.PARETO_RESULT_FILENAME)
+        self.frontier_df.to_excel(output_file, sheet_name=field.PARETO_SHEET, index=False)
+        logging.info("pareto frontier written to {}".format(output_file))
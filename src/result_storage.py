@@ -1,10 +1,11 @@
 from typing import List
-import openpyxl
 import logging
+import numpy as np
 import pandas as pd
 
 from .input_data import InputData
-from .utils import field, header, functions
+from .io_backend import generate_run_id
+from .utils import field, header, timing
 
 
 class ResultStorage:
@@ -13,13 +14,25 @@ class ResultStorage:
             input_data: InputData,
             keys: List[str],
             result,
-            multi_results
+            multi_results,
+            dual_values=None
     ):
         self.input_data: InputData = input_data
         self.keys = keys
         self.result = result
         self.multi_results = multi_results
+        # (成分影子价格字典, 原料缩减成本字典)，见 Model.get_dual_values
+        self.dual_values = dual_values
+        # 非 Excel 格式按运行追加结果，以运行编号区分
+        self.io_backend = input_data.get_io_backend()
+        self.run_id = generate_run_id()
 
+    def insert_run_id(self, df: pd.DataFrame):
+        df = df.copy()
+        df.insert(0, header.RunResultHeader.run_id, self.run_id)
+        return df
+
+    @timing.record_time_decorator(task_name="write ratio")
     def write_to_excel(self):
         if not self.result.success:
             logging.error(
@@ -29,30 +42,26 @@ class ResultStorage:
             logging.info("Successful solution, message: {}".format(self.result.message))
 
         sh = header.MaterialHeader
-        # 加载当前工作簿
-        file_name = "{}{}".format(self.input_data.exe_folder, field.ROCK_FILENAME)
-        wb = openpyxl.load_workbook(file_name)
-
-        # 选择指定的 sheet
-        sheet = wb[field.MATERIAL_SHEET]  # 替换为你的 sheet 名
-        sheet_header_dict = functions.get_header_dict(sheet=sheet)
-        # 要输出的数据
-        data_to_write = dict(zip(self.keys, self.result.x))
-        data_key = [
-            cell.value
-            for cell in sheet["A"]
-            if cell.value is not None and cell.value != sh.material_name
-        ]
-        data_val = [data_to_write[key] for key in data_key]
-        # 替换为你要写入的数据
-        # 指定要写入的列（例如，第2列）
-        column_index = sheet_header_dict[sh.ratio]
-        # A=1, B=2, C=3, ...
-        # 遍历每一行
-        for row_index, value in enumerate(data_val, start=2):  # 从第1行开始
-            sheet.cell(row=row_index, column=column_index, value=value)
-        # 保存工作簿
-        wb.save(file_name)
+        rh = header.RunResultHeader
+        if self.io_backend.append_results:
+            # 不改写输入文件，配比追加到 运行结果
+            ratio_df = pd.DataFrame({
+                rh.material_name: self.keys,
+                rh.ratio: self.result.x,
+                rh.objective: self.result.fun,
+            })
+            self.io_backend.append_sheet(field.RUNNING_RESULT_SHEET, self.insert_run_id(ratio_df))
+            return
+        # 只改写 配矿模型 的干配列
+        cache_key_current = self.input_data.is_cache_key_current()
+        self.io_backend.update_column(
+            sheet_name=field.MATERIAL_SHEET,
+            key_column=sh.material_name,
+            value_column=sh.ratio,
+            value_dict=dict(zip(self.keys, self.result.x))
+        )
+        if cache_key_current:
+            self.input_data.refresh_cache_key()
 
     def generate_multi_results(self):
         data = {material_name: [] for material_name in self.keys}
@@ -62,15 +71,36 @@ class ResultStorage:
                 data[material_name].append(result_ratio[k])
             data['原材料成本'].append(result_obj)
 
-    def write_multi_results_to_excel(self):
+    def generate_multi_results_long_df(self, multi_results=None):
+        # 追加用的长表：每个方案每种原料一行，方案数量变化时列不变
+        multi_results = self.multi_results if multi_results is None else multi_results
+        rh = header.RunResultHeader
+        result_df = pd.DataFrame([
+            {
+                rh.result_index: i,
+                rh.material_name: material,
+                rh.ratio: result_ratio[k],
+                rh.objective: result_obj,
+            }
+            for i, (result_ratio, result_obj) in enumerate(multi_results)
+            for k, material in enumerate(self.keys)
+        ], columns=[rh.result_index, rh.material_name, rh.ratio, rh.objective])
+        return self.insert_run_id(result_df)
+
+    @timing.record_time_decorator(task_name="write multi results")
+    def write_multi_results_to_excel(self, multi_results=None, sheet_name: str = field.MULTI_RESULTS_SHEET):
+        """
+        multi_results 默认为 self.multi_results，也可写出其他方案集合 (如多起点求解的局部最优解) 到 sheet_name
+        """
+        multi_results = self.multi_results if multi_results is None else multi_results
         rh = header.MultiResultHeader
         # 构建列名（如：["材料名称", "结果0配比", "结果1配比"]）
-        col = [rh.material_name] + [f'结果{i}配比' for i in range(len(self.multi_results))]
+        col = [rh.material_name] + [f'结果{i}配比' for i in range(len(multi_results))]
 
         # 准备数据
         data = {material: [] for material in self.keys}
         cost_list = []
-        for result_ratio, result_obj in self.multi_results:
+        for result_ratio, result_obj in multi_results:
             for i, material in enumerate(self.keys):
                 data[material].append(result_ratio[i])
             cost_list.append(result_obj)
@@ -92,17 +122,73 @@ class ResultStorage:
         # 转换为 DataFrame
         result_df = pd.DataFrame(records, columns=col)
 
-        # 写入 Excel
-        file_name = f"{self.input_data.exe_folder}{field.ROCK_FILENAME}"
         try:
-            # 使用追加模式加载工作簿
-            with pd.ExcelWriter(file_name, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                # 如果工作表不存在则创建
-                if field.MULTI_RESULTS_SHEET not in writer.book.sheetnames:
-                    writer.book.create_sheet(field.MULTI_RESULTS_SHEET)
-                startrow = 0
-                # 写入数据（不带表头）
-                result_df.to_excel(writer, sheet_name=field.MULTI_RESULTS_SHEET, index=False, startrow=startrow,
-                                   header=True)
+            if self.io_backend.append_results:
+                self.io_backend.append_sheet(sheet_name, self.generate_multi_results_long_df(multi_results))
+            else:
+                cache_key_current = self.input_data.is_cache_key_current()
+                self.io_backend.write_sheet(sheet_name, result_df)
+                if cache_key_current:
+                    self.input_data.refresh_cache_key()
+        except Exception as e:
+            logging.error(f"写入结果失败: {e}")
+
+    def generate_dual_value_df(self):
+        dh = header.DualValueHeader
+        cc_shadow_price_dict, material_reduced_cost_dict = self.dual_values
+
+        x = np.asarray(self.result.x)
+        p_material_plan_var = x / self.input_data.dry_factor_arr
+        h2o_var = p_material_plan_var @ self.input_data.moisture_arr / p_material_plan_var.sum()
+        cc_plan_var = x @ self.input_data.cc_content_matrix / x.sum()
+        if self.input_data.h2o_index is not None:
+            cc_plan_var[self.input_data.h2o_index] = h2o_var
+
+        cc_df = pd.DataFrame({
+            dh.chemical_compound_name: self.input_data.chemical_compound_name_lt,
+            dh.plan_value: cc_plan_var,
+            dh.low_bound: self.input_data.cc_bounds_arr[:, 0],
+            dh.up_bound: self.input_data.cc_bounds_arr[:, 1],
+            dh.low_bound_shadow_price: [
+                cc_shadow_price_dict[cc_name][0] for cc_name in self.input_data.chemical_compound_name_lt
+            ],
+            dh.up_bound_shadow_price: [
+                cc_shadow_price_dict[cc_name][1] for cc_name in self.input_data.chemical_compound_name_lt
+            ],
+        })
+        material_df = pd.DataFrame({
+            dh.material_name: self.keys,
+            dh.ratio: x,
+            dh.low_bound: self.input_data.material_bounds_arr[:, 0],
+            dh.up_bound: self.input_data.material_bounds_arr[:, 1],
+            dh.reduced_cost: [material_reduced_cost_dict[material_name] for material_name in self.keys],
+        })
+        return cc_df, material_df
+
+    @timing.record_time_decorator(task_name="write dual values")
+    def write_dual_values_to_excel(self):
+        if self.dual_values is None:
+            return
+        cc_df, material_df = self.generate_dual_value_df()
+        if self.io_backend.append_results:
+            # 成分与原料两张表合并为一张，按运行追加
+            self.io_backend.append_sheet(
+                field.DUAL_VALUE_SHEET, self.insert_run_id(pd.concat([cc_df, material_df], ignore_index=True))
+            )
+            return
+
+        file_name = f"{self.input_data.exe_folder}{self.input_data.file_name}"
+        try:
+            cache_key_current = self.input_data.is_cache_key_current()
+            with pd.ExcelWriter(file_name, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
+                # 删除旧结果后写入，成分影子价格在上，空一行后是原料缩减成本
+                if field.DUAL_VALUE_SHEET in writer.book.sheetnames:
+                    writer.book.remove(writer.book[field.DUAL_VALUE_SHEET])
+                cc_df.to_excel(writer, sheet_name=field.DUAL_VALUE_SHEET, index=False, startrow=0)
+                material_df.to_excel(
+                    writer, sheet_name=field.DUAL_VALUE_SHEET, index=False, startrow=len(cc_df) + 2
+                )
+            if cache_key_current:
+                self.input_data.refresh_cache_key()
         except Exception as e:
             logging.error(f"写入 Excel 失败: {e}")
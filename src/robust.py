@@ -0,0 +1,202 @@
+import copy
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from .input_data import InputData
+from .solver_session import SolverSession
+from .utils import field, header
+
+
+class RobustBlending:
+    """
+    化验值不确定时的稳健配矿：
+    1. 从 化验标准差 表读取每种原料每个成分的标准差，一次生成 场景 × 原料 × 成分 的化验值张量
+    2. 向量化计算任意一组配比在所有场景下各成分及全部成分同时达标的概率
+    3. 将产品成分上下限按 κ × 配矿成分标准差 向内收紧后求成本最优方案，二分 κ 找到全部达标概率不低于
+       target_probability 的最小收紧量，每次收紧由 SolverSession 热启动重解
+    """
+
+    def __init__(
+            self,
+            input_data: InputData,
+            target_probability: float = 0.95,
+            scenario_num: int = 2000,
+            seed: int = 0,
+            tolerance: float = 1e-3,
+            max_iter: int = 20
+    ):
+        self.input_data = input_data
+        self.target_probability = target_probability
+        self.scenario_num = scenario_num
+        self.seed = seed
+        # κ 的二分精度
+        self.tolerance = tolerance
+        self.max_iter = max_iter
+        # 原料 × 产品成分
+        self.std_matrix = np.zeros_like(input_data.cc_content_matrix)
+        # 场景 × 原料 × 产品成分
+        self.scenario_tensor = np.zeros((0,) + input_data.cc_content_matrix.shape)
+        self.nominal_result = None
+        self.robust_result = None
+        self.back_off_arr = np.zeros(len(input_data.chemical_compound_name_lt))
+
+    # region 场景
+    def load_std_matrix(self):
+        mh = header.MaterialHeader
+        std_df = self.input_data.get_sheet_df(sheet_name=field.ASSAY_STD_SHEET)
+        std_df = std_df[std_df[mh.material_name].isin(self.input_data.material_index)]
+        row_index = [self.input_data.material_index[name] for name in std_df[mh.material_name]]
+
+        std_matrix = np.zeros_like(self.input_data.cc_content_matrix)
+        for j, cc_name in enumerate(self.input_data.chemical_compound_name_lt):
+            if cc_name in std_df:
+                std_matrix[row_index, j] = std_df[cc_name].fillna(0).to_numpy(dtype=float)
+        self.std_matrix = std_matrix
+
+    def generate_scenarios(self):
+        rng = np.random.default_rng(self.seed)
+        content = self.input_data.cc_content_matrix
+        noise = rng.standard_normal((self.scenario_num,) + content.shape)
+        # 含量不为负
+        self.scenario_tensor = np.maximum(content + self.std_matrix * noise, 0)
+
+    def get_blend_coefficient(self, x_matrix):
+        """
+        配矿成分 = sum_i coef_{k,i,j} * content_{i,j}，水分按湿基量加权，其余成分按干配加权
+        """
+        x_matrix = np.atleast_2d(np.asarray(x_matrix, dtype=float))
+        weight = np.ones_like(self.input_data.cc_content_matrix)
+        if self.input_data.h2o_index is not None:
+            weight[:, self.input_data.h2o_index] = 1 / self.input_data.dry_factor_arr
+        weighted_x = x_matrix[:, :, None] * weight[None]
+        return weighted_x / weighted_x.sum(axis=1, keepdims=True)
+
+    def get_blend_std(self, x):
+        # 各原料化验误差相互独立时配矿成分的标准差
+        coef = self.get_blend_coefficient(x)[0]
+        return np.sqrt(np.sum((coef * self.std_matrix) ** 2, axis=0))
+
+    def evaluate_probability(self, x_matrix):
+        """
+        x_matrix 为 k 组配比，返回各成分达标概率 (k × 产品成分) 与全部成分同时达标概率 (k)
+        """
+        coef = self.get_blend_coefficient(x_matrix)
+        # 按成分批量矩阵乘法：(成分, k, 原料) @ (成分, 原料, 场景) -> k × 场景 × 产品成分
+        value = np.matmul(coef.transpose(2, 0, 1), self.scenario_tensor.transpose(2, 1, 0)).transpose(1, 2, 0)
+        bounds_arr = self.input_data.cc_bounds_arr
+        satisfied = (value >= bounds_arr[:, 0] - 1e-9) & (value <= bounds_arr[:, 1] + 1e-9)
+        return satisfied.mean(axis=1), satisfied.all(axis=2).mean(axis=1)
+
+    # endregion
+
+    # region 求解
+    def solve_with_back_off(self, session: SolverSession, back_off_arr):
+        # 有效的上下限向内收紧 back_off_arr，收紧后下限超过上限时不可行
+        bounds_arr = self.input_data.cc_bounds_arr
+        low_arr = np.where(bounds_arr[:, 0] > 0, bounds_arr[:, 0] + back_off_arr, bounds_arr[:, 0])
+        up_arr = np.where(bounds_arr[:, 1] < 100, bounds_arr[:, 1] - back_off_arr, bounds_arr[:, 1])
+        if np.any(low_arr > up_arr):
+            return None
+        session.update_chemical_compound_bounds({
+            cc_name: (low_arr[j], up_arr[j]) for j, cc_name in enumerate(self.input_data.chemical_compound_name_lt)
+        })
+        result = session.resolve()
+        return result if result.success else None
+
+    def run(self):
+        st = time.time()
+        self.load_std_matrix()
+        self.generate_scenarios()
+
+        # 收紧在副本上进行，不修改原输入
+        session = SolverSession(input_data=copy.deepcopy(self.input_data))
+        self.nominal_result = session.solve()
+        self.robust_result = self.nominal_result
+        self.back_off_arr = np.zeros(len(self.input_data.chemical_compound_name_lt))
+        if not self.nominal_result.success:
+            logging.error("nominal blend not found, robust blending skipped")
+            return self.robust_result
+
+        _, joint_probability = self.evaluate_probability(self.nominal_result.x)
+        logging.info("nominal blend joint probability: {}".format(joint_probability[0]))
+        if joint_probability[0] >= self.target_probability:
+            return self.robust_result
+
+        blend_std = self.get_blend_std(self.nominal_result.x)
+        kappa_low, kappa_high = 0.0, 1.0
+        best = None
+        # 倍增找到满足目标的 κ 上界
+        for _ in range(self.max_iter):
+            result = self.solve_with_back_off(session=session, back_off_arr=kappa_high * blend_std)
+            if result is None:
+                break
+            _, joint_probability = self.evaluate_probability(result.x)
+            if joint_probability[0] >= self.target_probability:
+                best = (kappa_high, result)
+                break
+            kappa_low, kappa_high = kappa_high, 2 * kappa_high
+
+        if best is None and result is not None:
+            logging.warning("target probability {} not reached".format(self.target_probability))
+            return self.robust_result
+
+        # 二分找最小的满足目标的 κ
+        for _ in range(self.max_iter):
+            if kappa_high - kappa_low < self.tolerance:
+                break
+            kappa = (kappa_low + kappa_high) / 2
+            result = self.solve_with_back_off(session=session, back_off_arr=kappa * blend_std)
+            if result is not None and self.evaluate_probability(result.x)[1][0] >= self.target_probability:
+                best = (kappa, result)
+                kappa_high = kappa
+            elif result is None:
+                kappa_high = kappa
+            else:
+                kappa_low = kappa
+
+        if best is None:
+            logging.warning("target probability {} not reached, bounds cannot be tightened further".format(
+                self.target_probability
+            ))
+            return self.robust_result
+        kappa, self.robust_result = best
+        self.back_off_arr = kappa * blend_std
+        logging.info("robust blend objective: {}, kappa: {}, time: {}s".format(
+            self.robust_result.fun, kappa, time.time() - st
+        ))
+        return self.robust_result
+
+    # endregion
+
+    def generate_result_df(self):
+        rh = header.RobustResultHeader
+        cc_probability, joint_probability = self.evaluate_probability(
+            np.vstack([self.nominal_result.x, self.robust_result.x])
+        )
+        ratio_df = pd.DataFrame({
+            rh.material_name: self.input_data.material_name_lt,
+            rh.nominal_ratio: self.nominal_result.x,
+            rh.robust_ratio: self.robust_result.x,
+        })
+        probability_df = pd.DataFrame({
+            rh.chemical_compound_name: self.input_data.chemical_compound_name_lt + [rh.joint_probability, rh.objective],
+            rh.nominal_probability: np.concatenate(
+                [cc_probability[0], joint_probability[:1], [self.nominal_result.fun]]
+            ),
+            rh.robust_probability: np.concatenate(
+                [cc_probability[1], joint_probability[1:], [self.robust_result.fun]]
+            ),
+            rh.back_off: np.concatenate([self.back_off_arr, [np.nan, np.nan]]),
+        })
+        return ratio_df, probability_df
+
+    def write_to_excel(self, output_file: str = None):
+        output_file = output_file or "{}{}".format(self.input_data.exe_folder, field.ROBUST_RESULT_FILENAME)
+        ratio_df, probability_df = self.generate_result_df()
+        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+            probability_df.to_excel(writer, sheet_name=field.ROBUST_PROBABILITY_SHEET, index=False)
+            ratio_df.to_excel(writer, sheet_name=field.ROBUST_RATIO_SHEET, index=False)
+        logging.info("robust blending results written to {}".format(output_file))
@@ -0,0 +1,118 @@
+import copy
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .input_data import InputData
+from .solver_session import SolverSession
+from .utils import enums, field, header
+
+# 子进程中的输入数据，由 _init_worker 在进程启动时设置一次
+_worker_input_data = None
+
+
+def _init_worker(input_data: InputData):
+    global _worker_input_data
+    _worker_input_data = input_data
+
+
+def apply_point(session: SolverSession, params: List[Tuple[str, str]], values: Sequence[float]):
+    sp = enums.SensitivityParam
+    for (param_type, name), value in zip(params, values):
+        if param_type == sp.WET_PRICE:
+            session.update_wet_price({name: value})
+        elif param_type == sp.CC_LOW_BOUND:
+            up_bound = session.input_data.chemical_compound_dict[name].ratio_bounds[1]
+            session.update_chemical_compound_bounds({name: (value, up_bound)})
+        elif param_type == sp.CC_UP_BOUND:
+            low_bound = session.input_data.chemical_compound_dict[name].ratio_bounds[0]
+            session.update_chemical_compound_bounds({name: (low_bound, value)})
+        else:
+            raise ValueError("unknown sensitivity parameter: {}".format(param_type))
+
+
+def solve_points(input_data: InputData, params: List[Tuple[str, str]], points: List[Tuple[int, tuple]]):
+    """
+    按顺序求解一段网格点，相邻点只差一个参数，每个点从上一个点的最优解热启动
+    """
+    session = SolverSession(input_data=input_data)
+    session.solve()
+
+    rows = []
+    for point_id, values in points:
+        apply_point(session=session, params=params, values=values)
+        result = session.resolve()
+        rows.append((point_id, values, bool(result.success), float(result.fun), np.asarray(result.x).copy()))
+    return rows
+
+
+def _solve_points(params, points):
+    return solve_points(input_data=_worker_input_data, params=params, points=points)
+
+
+class SensitivityAnalysis:
+    def __init__(self, input_data: InputData, max_workers: int = None):
+        self.input_data = input_data
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.result_df = pd.DataFrame()
+
+    @staticmethod
+    def get_param_column(param: Tuple[str, str]):
+        return "{}_{}".format(param[0], param[1])
+
+    def run(self, grid: Dict[Tuple[str, str], Sequence[float]]):
+        """
+        grid 的键为 (enums.SensitivityParam, 原料名或成分名)，值为该参数的取值序列，
+        对所有取值组合求解，返回每个点每种原料一行的结果表
+        """
+        st = time.time()
+        params = list(grid)
+        points = list(enumerate(itertools.product(*[grid[param] for param in params])))
+        # 连续的点分到同一进程，便于沿扫描方向热启动
+        chunks = [chunk.tolist() for chunk in np.array_split(np.arange(len(points)), self.max_workers) if len(chunk)]
+
+        rows = []
+        if len(chunks) <= 1:
+            # 扫描会修改输入数据，在副本上求解
+            rows = solve_points(input_data=copy.deepcopy(self.input_data), params=params, points=points)
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=len(chunks),
+                    initializer=_init_worker,
+                    initargs=(self.input_data,)
+            ) as executor:
+                futures = [
+                    executor.submit(_solve_points, params, [points[k] for k in chunk])
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    rows.extend(future.result())
+
+        self.result_df = self.generate_result_df(params=params, rows=rows)
+        logging.info("sensitivity analysis of {} points finished in {}s".format(len(points), time.time() - st))
+        return self.result_df
+
+    def generate_result_df(self, params, rows):
+        sh = header.SensitivityHeader
+        material_name_lt = self.input_data.material_name_lt
+        n = len(material_name_lt)
+
+        data = {sh.point_id: np.repeat([row[0] for row in rows], n)}
+        for k, param in enumerate(params):
+            data[self.get_param_column(param)] = np.repeat([row[1][k] for row in rows], n)
+        data[sh.success] = np.repeat([row[2] for row in rows], n)
+        data[sh.objective] = np.repeat([row[3] for row in rows], n)
+        data[sh.material_name] = np.tile(material_name_lt, len(rows))
+        data[sh.ratio] = np.concatenate([row[4] for row in rows]) if rows else []
+        return pd.DataFrame(data)
+
+    def write_to_excel(self, output_file: str = None):
+        output_file = output_file or "{}{}".format(self.input_data.exe_folder, field.SENSITIVITY_RESULT_FILENAME)
+        self.result_df.to_excel(output_file, sheet_name=field.SENSITIVITY_SHEET, index=False)
+        logging.info("sensitivity results written to {}".format(output_file))
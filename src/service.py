@@ -0,0 +1,364 @@
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .input_data import InputData
+from .engine import create_model
+from .utils import enums, field, header
+
+
+def load_job_input_data(job: Dict) -> InputData:
+    """
+    由 JSON 配矿任务构建输入数据，任务中的 materials / chemical_compounds / params 与
+    配矿模型 / 产品成分 / 时间参数 工作表一一对应，表头相同，之后沿用工作簿的解析流程
+    """
+    mh = header.MaterialHeader
+    cch = header.ChemicalCompoundHeader
+    tph = header.TimeParamHeader
+
+    material_df = pd.DataFrame(job.get("materials", []))
+    # 未给出的化验值按 0 处理
+    for cc_name in enums.CHEMICAL_COMPONENT_LT:
+        if cc_name not in material_df:
+            material_df[cc_name] = 0.0
+    for col in [mh.material_name, mh.wet_price, mh.low_bound, mh.up_bound]:
+        if col not in material_df:
+            material_df[col] = np.nan
+    chemical_compound_df = pd.DataFrame(
+        job.get("chemical_compounds", []), columns=[cch.chemical_compound_name, cch.low_bound, cch.up_bound]
+    )
+    params = job.get("params", dict())
+    time_param_df = pd.DataFrame({tph.param_name: list(params), tph.param_value: list(params.values())})
+
+    input_data = InputData(exe_folder="", use_cache=False)
+    input_data.sheet_df_dict = {
+        field.TIME_PARAM_SHEET: time_param_df,
+        field.CHEMICAL_COMPOUND_SHEET: chemical_compound_df.fillna(value=np.nan),
+        field.MATERIAL_SHEET: material_df.fillna(value=np.nan),
+    }
+    input_data.load_time_param()
+    input_data.load_chemical_compound_dict()
+    input_data.load_material_dict()
+    input_data.build_matrix()
+    input_data.sheet_df_dict = dict()
+    return input_data
+
+
+def generate_job(input_data: InputData, job_id=None) -> Dict:
+    """
+    由已读取的输入数据生成 JSON 配矿任务，可用于把工作簿提交给服务
+    """
+    mh = header.MaterialHeader
+    cch = header.ChemicalCompoundHeader
+    tph = header.TimeParamHeader
+    materials = []
+    for i, material_name in enumerate(input_data.material_name_lt):
+        material = {
+            mh.material_name: material_name,
+            mh.wet_price: float(input_data.wet_price_arr[i]),
+            mh.low_bound: float(input_data.material_bounds_arr[i, 0]),
+            mh.up_bound: float(input_data.material_bounds_arr[i, 1]),
+        }
+        material.update(zip(enums.CHEMICAL_COMPONENT_LT, input_data.assay_matrix[i].tolist()))
+        materials.append(material)
+    return {
+        "job_id": job_id,
+        "materials": materials,
+        "chemical_compounds": [
+            {cch.chemical_compound_name: cc_name, cch.low_bound: float(low), cch.up_bound: float(up)}
+            for cc_name, (low, up) in zip(input_data.chemical_compound_name_lt, input_data.cc_bounds_arr)
+        ],
+        "params": {
+            tph.time_limit: float(input_data.time_limit),
+            tph.solver_engine: input_data.solver_engine,
+        },
+    }
+
+
+def _to_json_number(value):
+    # JSON 中没有 NaN / inf
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def solve_job(job: Dict):
+    st = time.time()
+    job_id = job.get("job_id")
+    try:
+        input_data = load_job_input_data(job)
+        model = create_model(input_data=input_data)
+        result, _ = model.run_model()
+        violations = model.get_violations(result_x=result.x)
+        return {
+            "job_id": job_id,
+            "success": bool(result.success),
+            "message": str(result.message),
+            "objective": _to_json_number(result.fun),
+            "ratio": {name: _to_json_number(x) for name, x in zip(model.keys, result.x)},
+            "violations": [
+                {"name": name, "type": constraint_type, "value": _to_json_number(value)}
+                for name, constraint_type, value in violations
+            ],
+            "elapsed_time": time.time() - st,
+        }
+    except Exception as e:
+        logging.exception("job {} failed".format(job_id))
+        return {
+            "job_id": job_id,
+            "success": False,
+            "message": "{}: {}".format(type(e).__name__, e),
+            "elapsed_time": time.time() - st,
+        }
+
+
+def _init_worker():
+    # 独立的进程组，超时终止时连同任务创建的子进程 (如多起点求解的进程池) 一起终止
+    if hasattr(os, "setsid"):
+        os.setsid()
+    # 标准输出只用于协议行，工作进程中求解器等的输出一律改写到标准错误
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+
+def _worker_main(conn):
+    # 工作进程：启动后回报进程号，之后逐个接收任务并返回结果，收到 None 时退出
+    _init_worker()
+    conn.send(os.getpid())
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        conn.send(solve_job(job))
+
+
+class _Worker:
+    """
+    一个常驻工作进程及其管道，任务超时时整个进程被终止并替换
+    """
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,))
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self):
+        # 读取启动后回报的进程号
+        if not self.ready:
+            self.conn.recv()
+            self.ready = True
+
+    def stop(self):
+        if hasattr(os, "killpg") and self.process.is_alive():
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+class OptimizationService:
+    """
+    常驻求解服务：进程常驻，scipy / pandas 等只导入一次，配矿任务以 JSON 行提交，
+    在 max_workers 个工作进程中求解。运行时间限制取 min(任务的运行时间限制, max_time_limit) 并传给求解器，
+    任务超过该限制 time_grace 秒仍未完成时终止其工作进程并换一个新进程，不占用进程池。
+    可从标准输入读取 (serve_stdin)，也可监听本地 TCP 端口 (serve_tcp)，每行一个任务，按完成顺序每行返回一个结果
+    """
+
+    def __init__(self, max_workers: int = None, max_time_limit: float = 30, time_grace: float = 1.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_time_limit = max_time_limit
+        self.time_grace = time_grace
+        self.context = multiprocessing.get_context()
+        self.worker_lt: List[_Worker] = []
+        self.idle_queue = None
+        # 在线程中等待工作进程的结果，不阻塞事件循环
+        self.wait_executor = None
+
+    async def start(self):
+        # 在运行中的事件循环内创建队列 (Python 3.9 及以前 asyncio.Queue 绑定创建时的事件循环)
+        loop = asyncio.get_running_loop()
+        self.wait_executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.worker_lt = [_Worker(self.context) for _ in range(self.max_workers)]
+        # 等待工作进程启动完成，第一个任务不承担进程创建的开销
+        for worker in self.worker_lt:
+            await loop.run_in_executor(self.wait_executor, worker.wait_ready)
+        self.idle_queue = asyncio.Queue()
+        for worker in self.worker_lt:
+            self.idle_queue.put_nowait(worker)
+        logging.info("optimization service started with {} workers".format(self.max_workers))
+
+    def shutdown(self):
+        # 运行中的任务直接终止
+        for worker in self.worker_lt:
+            worker.stop()
+        self.worker_lt = []
+        if self.wait_executor is not None:
+            self.wait_executor.shutdown(wait=False)
+            self.wait_executor = None
+
+    def replace_worker(self, worker: _Worker):
+        # 超时或异常退出的工作进程被终止，换一个新进程，进程池的容量不变
+        worker.stop()
+        new_worker = _Worker(self.context)
+        self.worker_lt[self.worker_lt.index(worker)] = new_worker
+        logging.warning("worker {} replaced by {}".format(worker.process.pid, new_worker.process.pid))
+        return new_worker
+
+    def get_time_limit(self, job: Dict):
+        tph = header.TimeParamHeader
+        time_limit = float(job.get("params", dict()).get(tph.time_limit, self.max_time_limit))
+        time_limit = min(time_limit, self.max_time_limit)
+        # 求解器本身也遵守运行时间限制
+        job.setdefault("params", dict())[tph.time_limit] = time_limit
+        return time_limit
+
+    async def handle_job(self, job: Dict):
+        job_id = job.get("job_id")
+        st = time.time()
+        try:
+            time_limit = self.get_time_limit(job)
+        except Exception as e:
+            return {
+                "job_id": job_id,
+                "success": False,
+                "message": "{}: {}".format(type(e).__name__, e),
+                "elapsed_time": time.time() - st,
+            }
+
+        worker = await self.idle_queue.get()
+        try:
+            # 替换后的新进程第一次使用时等待其启动完成
+            await asyncio.get_running_loop().run_in_executor(self.wait_executor, worker.wait_ready)
+            worker.conn.send(job)
+            # 任务在工作进程中的运行时间从发送时开始计算
+            finished = await asyncio.get_running_loop().run_in_executor(
+                self.wait_executor, worker.conn.poll, time_limit + self.time_grace
+            )
+            if finished:
+                result = worker.conn.recv()
+            else:
+                worker = self.replace_worker(worker)
+                result = {
+                    "job_id": job_id,
+                    "success": False,
+                    "message": "time limit of {}s exceeded".format(time_limit),
+                    "elapsed_time": time.time() - st,
+                }
+        except (EOFError, OSError) as e:
+            worker = self.replace_worker(worker)
+            result = {
+                "job_id": job_id,
+                "success": False,
+                "message": "worker exited: {}: {}".format(type(e).__name__, e),
+                "elapsed_time": time.time() - st,
+            }
+        finally:
+            self.idle_queue.put_nowait(worker)
+        logging.info("job {} finished in {}s, success: {}".format(job_id, time.time() - st, result["success"]))
+        return result
+
+    async def handle_line(self, line: str):
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {"job_id": None, "success": False, "message": "invalid JSON: {}".format(e)}
+        return await self.handle_job(job)
+
+    # region 标准输入
+    async def serve_stdin(self):
+        loop = asyncio.get_running_loop()
+        tasks = set()
+
+        async def respond(line):
+            result = await self.handle_line(line)
+            sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.create_task(respond(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    # endregion
+
+    # region TCP
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+
+        async def respond(line):
+            result = await self.handle_line(line)
+            writer.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+            await writer.drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.create_task(respond(line.decode("utf-8")))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        writer.close()
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = field.SERVICE_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=2 ** 24)
+        logging.info("optimization service listening on {}:{}".format(host, port))
+        async with server:
+            await server.serve_forever()
+
+    # endregion
+
+
+class ServiceClient:
+    """
+    本地客户端：一个 TCP 连接上按顺序提交任务并等待结果
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = field.SERVICE_PORT, timeout: float = None):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile("rwb")
+
+    def solve(self, job: Dict):
+        self.file.write((json.dumps(job, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
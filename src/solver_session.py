@@ -0,0 +1,187 @@
+import numpy as np
+from scipy.optimize import minimize, OptimizeResult
+import logging
+import time
+from typing import Dict, Tuple
+from .input_data import InputData
+from .engine import create_model
+from .lp_model import LinearFractionalModel
+from .milp_model import MixedIntegerModel
+from .model import Model
+
+
+class SolverSession:
+    """
+    常驻的求解会话：首次完整求解后保留模型与最优解，
+    价格、原料上下限或成分上下限变化时只修改受影响的数据并从上一次最优解热启动重新求解
+    """
+
+    def __init__(self, input_data: InputData):
+        self.input_data = input_data
+        self.model: Model = None
+        self.result: OptimizeResult = None
+        self.multi_results = []
+        # 自上次求解以来的修改
+        self.changed_price_lt = []
+        self.changed_material_bounds_lt = []
+        self.changed_cc_bounds_lt = []
+        self.changed_assay_lt = []
+
+    @property
+    def keys(self):
+        return self.model.keys
+
+    def solve(self):
+        st = time.time()
+        self.model = create_model(input_data=self.input_data)
+        self.result, self.multi_results = self.model.run_model()
+        self.clear_changes()
+        logging.info("session solve time: {}s".format(time.time() - st))
+        return self.result
+
+    # region 修改
+    def update_wet_price(self, wet_price_dict: Dict[str, float]):
+        for material_name, wet_price in wet_price_dict.items():
+            self.input_data.update_wet_price(material_name=material_name, wet_price=wet_price)
+            self.changed_price_lt.append(material_name)
+
+    def update_material_ratio_bounds(self, ratio_bounds_dict: Dict[str, Tuple[float, float]]):
+        for material_name, (low_bound, up_bound) in ratio_bounds_dict.items():
+            self.input_data.update_material_ratio_bounds(
+                material_name=material_name, low_bound=low_bound, up_bound=up_bound
+            )
+            self.changed_material_bounds_lt.append(material_name)
+
+    def update_chemical_compound_bounds(self, ratio_bounds_dict: Dict[str, Tuple[float, float]]):
+        for cc_name, (low_bound, up_bound) in ratio_bounds_dict.items():
+            self.input_data.update_chemical_compound_bounds(
+                chemical_compound_name=cc_name, low_bound=low_bound, up_bound=up_bound
+            )
+            self.changed_cc_bounds_lt.append(cc_name)
+
+    def update_assay(self, assay_dict: Dict[str, Dict[str, float]]):
+        # assay_dict 为 {原料: {成分: 化验值}}
+        for material_name, content_dict in assay_dict.items():
+            for cc_name, value in content_dict.items():
+                self.input_data.update_assay(material_name=material_name, chemical_compound_name=cc_name, value=value)
+            self.changed_assay_lt.append(material_name)
+
+    def clear_changes(self):
+        self.changed_price_lt = []
+        self.changed_material_bounds_lt = []
+        self.changed_cc_bounds_lt = []
+        self.changed_assay_lt = []
+
+    # endregion
+
+    # region 重新求解
+    def resolve_lp(self):
+        # 只修改受影响的目标系数和约束行，不重建整个线性规划
+        for material_name in self.changed_price_lt:
+            self.model.update_lp_material_price(material_name=material_name)
+        for material_name in self.changed_material_bounds_lt:
+            self.model.update_lp_material_ratio_bounds(material_name=material_name)
+        for cc_name in self.changed_cc_bounds_lt:
+            self.model.update_lp_chemical_compound_bounds(chemical_compound_name=cc_name)
+        for material_name in self.changed_assay_lt:
+            self.model.update_lp_material_assay(material_name=material_name)
+        return self.model.solve_lp()
+
+    def resolve_nlp(self):
+        # 约束函数直接读取 input_data 中的矩阵，只需更新变量边界，再从上次最优解出发做一次局部搜索
+        self.model.bounds = self.model.generate_material_ratio_bounds()
+        bounds_arr = self.input_data.material_bounds_arr
+        initial_guess = np.clip(self.result.x, bounds_arr[:, 0], bounds_arr[:, 1])
+        result = minimize(
+            self.model.get_objective,
+            initial_guess,
+            jac=self.model.get_objective_jac,
+            constraints=self.model.constraints,
+            bounds=self.model.bounds,
+            method="SLSQP",
+            tol=1e-6,
+        )
+        if not result.success:
+            logging.error("Unsuccessful solution, message: {}".format(result.message))
+        return result
+
+    def is_still_optimal(self, tolerance=1e-9):
+        """
+        只有化验值变化时的快速判断，基与对偶值不变时当前解仍最优：
+        1. 不在当前配比中的原料 (y_i = 0)：当前解仍可行 (这些列乘以 0)，只需检查这些列的缩减成本非负
+        2. 在当前配比中的原料：干基价与 TFe 不变，且系数变化的成分行对偶值为 0、修改后当前解仍满足这些行，
+           即变化只落在不起作用的成分约束上
+        其余情况 (如配比中原料的 TFe、水分或起作用成分的化验值变化) 需要重解
+        """
+        if (
+                not isinstance(self.model, LinearFractionalModel)
+                or isinstance(self.model, MixedIntegerModel)
+                or self.model.lp_res is None
+                or not self.model.lp_res.success
+                or self.changed_price_lt
+                or self.changed_material_bounds_lt
+                or self.changed_cc_bounds_lt
+        ):
+            return False
+        model = self.model
+        n = len(model.keys)
+        y = model.lp_res.x[:n]
+        cc_marginal = model.lp_res.ineqlin.marginals[2 * n:]
+        # 成分行在原料行之后，每行存储 y_1..y_n，修改前保存配比中原料的列
+        cc_block = model.A_ub.data[model.A_ub.indptr[2 * n]:].reshape(-1, n)
+        old_column_dict = dict()
+        for material_name in self.changed_assay_lt:
+            i = self.input_data.material_index[material_name]
+            if y[i] > tolerance:
+                old_column_dict[material_name] = (model.c[i], model.A_eq.data[i], cc_block[:, i].copy())
+
+        for material_name in self.changed_assay_lt:
+            model.update_lp_material_assay(material_name=material_name)
+        for material_name in self.changed_assay_lt:
+            i = self.input_data.material_index[material_name]
+            if material_name not in old_column_dict:
+                if model.get_reduced_cost(material_name=material_name) < -tolerance:
+                    return False
+                continue
+            old_c, old_tfe, old_cc_column = old_column_dict[material_name]
+            if abs(model.c[i] - old_c) > tolerance or abs(model.A_eq.data[i] - old_tfe) > tolerance:
+                return False
+            changed_row_index = np.flatnonzero(np.abs(cc_block[:, i] - old_cc_column) > tolerance)
+            if np.any(np.abs(cc_marginal[changed_row_index]) > tolerance):
+                return False
+            if np.any(cc_block[changed_row_index] @ y > tolerance):
+                return False
+        return True
+
+    def resolve_if_needed(self):
+        """
+        当前解仍最优时不重解，返回 (结果, 是否重解)
+        """
+        if self.model is not None and self.is_still_optimal():
+            self.clear_changes()
+            return self.result, False
+        return self.resolve(), True
+
+    def resolve(self):
+        """
+        应用自上次求解以来的修改并热启动重新求解，尚未求解过时执行完整求解
+        """
+        if self.model is None:
+            return self.solve()
+
+        st = time.time()
+        if isinstance(self.model, MixedIntegerModel):
+            # 混合整数规划每次按 input_data 重新生成，直接重解
+            result = self.model.solve_milp()
+        elif isinstance(self.model, LinearFractionalModel):
+            result = self.resolve_lp()
+        else:
+            result = self.resolve_nlp()
+        self.model.check_constraints(result_x=result.x)
+        self.result = result
+        self.multi_results = [(result.x.copy(), result.fun)]
+        self.clear_changes()
+        logging.info("session resolve objective: {}, time: {}s".format(result.fun, time.time() - st))
+        return self.result
+
+    # endregion
@@ -21,6 +21,38 @@ class ChemicalCompoundName:
     burning_loss = "烧损"
 
 
+class SolverEngine:
+    # Charnes–Cooper 线性规划，全局最优
+    LP = "lp"
+    # basinhopping + SLSQP 非线性求解
+    SLSQP = "slsqp"
+    # 进程池并行多起点 SLSQP
+    MULTI_START = "multi_start"
+    # 混合整数线性规划，支持原料数量上限、最小用量与强制使用
+    MILP = "milp"
+
+
+class SpecType:
+    # 合成算例的产品成分区间宽窄
+    TIGHT = "tight"
+    LOOSE = "loose"
+
+
+class SensitivityParam:
+    # 原料湿基价
+    WET_PRICE = "湿基价"
+    # 成分下限 / 上限
+    CC_LOW_BOUND = "成分下限"
+    CC_UP_BOUND = "成分上限"
+
+
+class BoundType:
+    MATERIAL_LOW_BOUND = "原料下限"
+    MATERIAL_UP_BOUND = "原料上限"
+    CC_LOW_BOUND = "成分下限"
+    CC_UP_BOUND = "成分上限"
+
+
 CHEMICAL_COMPONENT_LT = [
     ChemicalCompoundName.TFe,
     ChemicalCompoundName.CaO,
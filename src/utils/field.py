@@ -3,4 +3,60 @@ MATERIAL_SHEET = "配矿模型"
 CHEMICAL_COMPOUND_SHEET = "产品成分"
 RUNNING_RESULT_SHEET = "运行结果"
 MULTI_RESULTS_SHEET = "多个结果"
+# 多起点求解的局部最优解，同时输出备选方案时单独写出
+LOCAL_OPTIMA_SHEET = "局部最优解"
 TIME_PARAM_SHEET = "时间参数"
+DUAL_VALUE_SHEET = "影子价格"
+# 解析为模型输入的工作表，缓存键只取决于这些工作表的内容
+INPUT_SHEET_NAMES = [TIME_PARAM_SHEET, CHEMICAL_COMPOUND_SHEET, MATERIAL_SHEET]
+BATCH_RESULT_FILENAME = "批量结果.xlsx"
+BATCH_RATIO_SHEET = "配比结果"
+BATCH_SUMMARY_SHEET = "汇总"
+# 同一工作簿内的场景工作表命名为 "<工作表名>_<场景名>"
+SCENARIO_SHEET_SEP = "_"
+
+# 解析缓存，格式变化时需要更新版本号使旧缓存失效
+CACHE_VERSION = "7"
+CACHE_META_FILENAME = "meta.json"
+CACHE_ARRAY_NAMES = [
+    "wet_price_arr", "material_bounds_arr", "assay_matrix", "cc_bounds_arr", "min_usage_arr", "force_usage_arr"
+]
+CACHE_PARAM_NAMES = [
+    "time_limit", "solver_engine", "check_gradient", "multi_start_num", "diagnose_infeasibility", "max_material_num",
+    "alternative_num", "alternative_distance", "run_report", "cprofile"
+]
+INFEASIBILITY_SHEET = "不可行诊断"
+
+SENSITIVITY_RESULT_FILENAME = "灵敏度分析.xlsx"
+SENSITIVITY_SHEET = "灵敏度分析"
+
+PARETO_RESULT_FILENAME = "帕累托前沿.xlsx"
+PARETO_SHEET = "帕累托前沿"
+
+# 多周期配矿计划
+INVENTORY_SHEET = "库存"
+DELIVERY_SHEET = "到货"
+PRODUCTION_PLAN_SHEET = "生产计划"
+PLAN_RESULT_FILENAME = "配矿计划.xlsx"
+PLAN_SHEET = "配矿计划"
+PLAN_SUMMARY_SHEET = "计划汇总"
+
+# 多产品配矿
+PRODUCT_SHEET = "产品方案"
+MULTI_PRODUCT_RESULT_FILENAME = "多产品结果.xlsx"
+MULTI_PRODUCT_SUMMARY_SHEET = "产品汇总"
+MULTI_PRODUCT_RATIO_SHEET = "产品配比"
+
+# 化验不确定性，列同 配矿模型 中的成分列
+ASSAY_STD_SHEET = "化验标准差"
+ROBUST_RESULT_FILENAME = "稳健配矿.xlsx"
+ROBUST_RATIO_SHEET = "配比"
+ROBUST_PROBABILITY_SHEET = "达标概率"
+
+BENCHMARK_RESULT_FILENAME = "benchmark_results.json"
+
+# 常驻求解服务的默认本地端口
+SERVICE_PORT = 8765
+
+# 化验值流式更新的配矿推荐，每行一条 JSON
+ASSAY_STREAM_RESULT_FILENAME = "配矿推荐.jsonl"
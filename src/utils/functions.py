@@ -1,8 +1,27 @@
+import contextlib
+import hashlib
 import os
 import platform
+import sys
+import zipfile
+from xml.etree import ElementTree
 from openpyxl import load_workbook
 
 
+@contextlib.contextmanager
+def redirect_stdout_to_stderr():
+    # HiGHS 混合整数求解的部分提示直接写到标准输出的文件描述符，sys.stdout 层面的重定向无效
+    sys.stdout.flush()
+    saved_fd = os.dup(1)
+    try:
+        os.dup2(2, 1)
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+
+
 def get_header_dict(sheet):
     # 获取表头和对应列索引的字典
     header_dict = {}
@@ -11,3 +30,54 @@ def get_header_dict(sheet):
         if header:
             header_dict[header] = column
     return header_dict
+
+
+def get_file_hash(file_name, chunk_size=1 << 20):
+    # 计算文件内容的 SHA-256
+    sha256 = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_sheet_part_dict(zip_file):
+    # xlsx 压缩包中工作表名到工作表 XML 文件名的字典
+    ns = {
+        "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+        "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+    }
+    rel_attr = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+    workbook = ElementTree.fromstring(zip_file.read("xl/workbook.xml"))
+    rels = ElementTree.fromstring(zip_file.read("xl/_rels/workbook.xml.rels"))
+    target_dict = dict()
+    for rel in rels.findall("rel:Relationship", ns):
+        target = rel.get("Target")
+        target_dict[rel.get("Id")] = target.lstrip("/") if target.startswith("/") else "xl/" + target
+    return {
+        sheet.get("name"): target_dict.get(sheet.get(rel_attr))
+        for sheet in workbook.findall("main:sheets/main:sheet", ns)
+    }
+
+
+def get_sheet_hash(file_name, sheet_names):
+    """
+    xlsx 中 sheet_names 工作表内容的 SHA-256：只读取这些工作表的 XML 与共享字符串表，不解析单元格，
+    其他工作表 (如结果表) 的改动不影响结果。不是 xlsx 压缩包时退回整个文件的 SHA-256
+    """
+    try:
+        zip_file = zipfile.ZipFile(file_name)
+    except zipfile.BadZipFile:
+        return get_file_hash(file_name)
+    sha256 = hashlib.sha256()
+    with zip_file:
+        part_dict = get_sheet_part_dict(zip_file)
+        name_set = set(zip_file.namelist())
+        for sheet_name in sheet_names:
+            sha256.update(sheet_name.encode("utf-8"))
+            part = part_dict.get(sheet_name)
+            if part in name_set:
+                sha256.update(zip_file.read(part))
+        if "xl/sharedStrings.xml" in name_set:
+            sha256.update(zip_file.read("xl/sharedStrings.xml"))
+    return sha256.hexdigest()
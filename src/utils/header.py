@@ -5,6 +5,10 @@ class MaterialHeader:
     up_bound = "上限"
     low_bound = "下限"
     ratio = "干配"
+    # 以下两列可选
+    min_usage_ratio = "最小用量"
+    # 1 必须使用，0 禁止使用，空白由模型决定
+    force_usage = "强制使用"
 
 
 class ChemicalCompoundHeader:
@@ -17,8 +21,145 @@ class TimeParamHeader:
     param_name = '参数名称'
     param_value = '参数值'
     time_limit = '运行时间限制 (s)'
+    solver_engine = '求解引擎'
+    check_gradient = '梯度检查'
+    multi_start_num = '多起点数量'
+    diagnose_infeasibility = '不可行诊断'
+    max_material_num = '最大原料数'
+    alternative_num = '备选方案数量'
+    alternative_distance = '备选方案最小距离'
+    run_report = '运行报告'
+    cprofile = '性能剖析'
+    use_cache = '使用缓存'
 
 
 class MultiResultHeader:
     material_name = "存货"
     result_ratio = "结果配比"
+
+
+class RunResultHeader:
+    # 非 Excel 格式的结果按运行追加，每行带运行编号
+    run_id = "运行编号"
+    result_index = "结果编号"
+    material_name = "存货"
+    ratio = "干配"
+    objective = "吨度价"
+    record_type = "记录类型"
+
+
+class DualValueHeader:
+    chemical_compound_name = "产品"
+    material_name = "存货"
+    plan_value = "方案值"
+    ratio = "干配"
+    low_bound = "下限"
+    up_bound = "上限"
+    # 吨度价对下限 / 上限的导数
+    low_bound_shadow_price = "下限影子价格"
+    up_bound_shadow_price = "上限影子价格"
+    # 吨度价对原料配比的导数
+    reduced_cost = "缩减成本"
+
+
+class InfeasibilityHeader:
+    object_name = "对象"
+    bound_type = "约束类型"
+    bound_value = "原值"
+    relaxed_bound_value = "放宽后"
+    relaxation = "放宽量"
+    conflict_set = "冲突约束集"
+    minimum_relaxation = "最小放宽"
+
+
+class ScenarioManifestHeader:
+    scenario_name = "场景名称"
+    file_path = "文件路径"
+    sheet_suffix = "工作表后缀"
+
+
+class BatchResultHeader:
+    scenario_name = "场景名称"
+    material_name = "存货"
+    success = "是否成功"
+    objective = "吨度价"
+    violation_num = "约束违反数"
+    elapsed_time = "耗时 (s)"
+    message = "信息"
+
+
+class SensitivityHeader:
+    point_id = "点号"
+    material_name = "存货"
+    ratio = "干配"
+    objective = "吨度价"
+    success = "是否成功"
+
+
+class ParetoHeader:
+    point_id = "点号"
+    bound_value = "成分界限"
+    compound_value = "成分值"
+    objective = "吨度价"
+    success = "是否成功"
+
+
+class InventoryHeader:
+    material_name = "存货"
+    # 湿吨
+    inventory = "库存量"
+
+
+class DeliveryHeader:
+    period = "周期"
+    material_name = "存货"
+    # 湿吨
+    delivery = "到货量"
+
+
+class ProductionPlanHeader:
+    period = "周期"
+    # 干吨
+    production = "产量"
+
+
+class PlanResultHeader:
+    period = "周期"
+    material_name = "存货"
+    usage = "用量"
+    ratio = "干配"
+    end_inventory = "期末库存"
+    production = "产量"
+    objective = "吨度价"
+    tfe = "TFe"
+
+
+class ProductHeader:
+    product_name = "产品名称"
+    # 干吨
+    production = "产量"
+    # 该产品成分上下限所在的工作表，格式同 产品成分
+    spec_sheet = "成分表"
+
+
+class MultiProductResultHeader:
+    product_name = "产品名称"
+    material_name = "存货"
+    usage = "用量"
+    ratio = "干配"
+    production = "产量"
+    objective = "吨度价"
+    tfe = "TFe"
+
+
+class RobustResultHeader:
+    material_name = "存货"
+    nominal_ratio = "名义配比"
+    robust_ratio = "稳健配比"
+    chemical_compound_name = "成分"
+    nominal_probability = "名义达标概率"
+    robust_probability = "稳健达标概率"
+    back_off = "收紧量"
+    objective = "吨度价"
+    # 所有成分同时达标的概率
+    joint_probability = "全部达标"
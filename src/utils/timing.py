@@ -1,21 +1,25 @@
-import time
-import logging
+import cProfile
 import functools
+import json
+import logging
+import time
 
 # 定义全局变量用于存储任务及其相应的时间
 tasks = []
 
 
-# 函数用于添加任务及其相应的时间到全局变量中
+# 函数用于添加任务及其相应的时间到全局变量中，未开启运行报告时不记录
 def add_task(task_name: str, time_taken: float):
-    global tasks
-    tasks.append((task_name, time_taken))
+    if enabled:
+        tasks.append((task_name, time_taken))
 
 
 def record_time_decorator(task_name: str):
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
             st = time.time()
             # 调用原函数
             result = func(*args, **kwargs)
@@ -38,3 +42,100 @@ def out_profile(output_folder: str):
             file.write(f"{task}: {time_taken}\n")
 
     file.close()
+
+
+# region 运行报告
+# 只有 enable() 之后 instrument 才会包装方法、record_time_decorator 与 add_task 才会记录，关闭时热路径上没有额外开销
+enabled = False
+# 调用次数与累计耗时，键为 "类名.方法名" 或事件名
+counters = dict()
+timers = dict()
+profiler = None
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def reset():
+    global enabled, profiler
+    enabled = False
+    profiler = None
+    tasks.clear()
+    counters.clear()
+    timers.clear()
+
+
+def add_count(name: str, value: int = 1):
+    if enabled:
+        counters[name] = counters.get(name, 0) + value
+
+
+def add_time(name: str, time_taken: float):
+    if enabled:
+        timers[name] = timers.get(name, 0.0) + time_taken
+
+
+def count_calls(func, name: str):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        st = time.perf_counter()
+        result = func(*args, **kwargs)
+        timers[name] = timers.get(name, 0.0) + time.perf_counter() - st
+        counters[name] = counters.get(name, 0) + 1
+        return result
+
+    return wrapper
+
+
+def instrument(obj, method_name_lt):
+    """
+    在实例上用计数包装替换方法，未 enable 时不做任何事
+    """
+    if not enabled:
+        return
+    for method_name in method_name_lt:
+        setattr(obj, method_name, count_calls(
+            getattr(obj, method_name), "{}.{}".format(type(obj).__name__, method_name)
+        ))
+
+
+def start_profile():
+    global profiler
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+
+def stop_profile(output_folder: str):
+    global profiler
+    if profiler is None:
+        return
+    profiler.disable()
+    profiler.dump_stats("{}profile.prof".format(output_folder))
+    profiler = None
+
+
+def out_report(output_folder: str):
+    """
+    写出本次运行的 JSON 报告：各阶段耗时、调用次数与累计耗时，以及由计数推导的指标
+    """
+    report = {
+        "tasks": [{"task": task, "time": time_taken} for task, time_taken in tasks],
+        "counters": counters,
+        "timers": timers,
+    }
+    iteration = counters.get("basinhopping_iteration", 0)
+    if iteration:
+        report["basinhopping_acceptance_rate"] = counters.get("basinhopping_accepted", 0) / iteration
+    # SLSQP 每次迭代计算一次梯度，梯度之外的目标函数调用来自线搜索
+    for key in list(counters):
+        if key.endswith(".get_objective"):
+            jac_key = key + "_jac"
+            report[key.replace(".get_objective", ".line_search_evaluations")] = max(
+                counters[key] - counters.get(jac_key, 0), 0
+            )
+    with open("{}run_report.json".format(output_folder), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+# endregion
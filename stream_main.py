@@ -0,0 +1,23 @@
+from src.utils import log
+from src.input_data import InputData
+from src.assay_stream import AssayStream
+import sys
+import time
+import logging
+
+# 用法: python stream_main.py <化验结果文件.csv | .jsonl> [空闲超时 (s)]
+# 持续跟踪化验结果文件的新增记录，每条记录输出一条配矿推荐到 配矿推荐.jsonl
+if __name__ == "__main__":
+    exe_folder = "./"
+    logger = log.setup_log(log_dir=exe_folder)
+
+    st = time.time()
+    input_data = InputData(exe_folder=exe_folder)
+    input_data.read_data()
+
+    assay_stream = AssayStream(input_data=input_data, assay_file=sys.argv[1])
+    try:
+        assay_stream.run(idle_timeout=float(sys.argv[2]) if len(sys.argv) > 2 else None)
+    except KeyboardInterrupt:
+        pass
+    logging.info("total time: {}s".format(time.time() - st))
@@ -0,0 +1,53 @@
+import copy
+import os
+import shutil
+
+import openpyxl
+import pytest
+
+from src.input_data import InputData
+from src.io_backend import ExcelBackend
+from src.lp_model import LinearFractionalModel
+from src.utils import field, header
+
+DATASET_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset", field.ROCK_FILENAME)
+
+
+@pytest.fixture
+def exe_folder(tmp_path):
+    # 数据集工作簿的副本，没有 时间参数 表时补充默认参数
+    file_name = str(tmp_path / field.ROCK_FILENAME)
+    shutil.copy(DATASET_FILE, file_name)
+    wb = openpyxl.load_workbook(file_name)
+    if field.TIME_PARAM_SHEET not in wb.sheetnames:
+        tph = header.TimeParamHeader
+        sheet = wb.create_sheet(field.TIME_PARAM_SHEET)
+        sheet.append([tph.param_name, tph.param_value])
+        sheet.append([tph.time_limit, 30])
+        wb.save(file_name)
+    wb.close()
+    return str(tmp_path) + os.sep
+
+
+@pytest.fixture
+def input_data(exe_folder):
+    input_data = InputData(exe_folder=exe_folder, use_cache=False)
+    input_data.read_data()
+    return input_data
+
+
+def solve_lp(input_data: InputData):
+    # 在输入数据的副本上完整求解线性规划，不影响原数据
+    model = LinearFractionalModel(input_data=copy.deepcopy(input_data))
+    result, _ = model.run_model()
+    return model, result
+
+
+def read_with_sheets(exe_folder: str, sheet_df_dict):
+    # 在工作簿中写入额外的工作表后重新读取输入
+    io_backend = ExcelBackend(exe_folder + field.ROCK_FILENAME)
+    for sheet_name, df in sheet_df_dict.items():
+        io_backend.write_sheet(sheet_name, df)
+    input_data = InputData(exe_folder=exe_folder, use_cache=False)
+    input_data.read_data()
+    return input_data
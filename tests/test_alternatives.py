@@ -0,0 +1,48 @@
+import copy
+import itertools
+
+import numpy as np
+import pytest
+
+from src.alternatives import AlternativeGenerator
+from src.engine import create_model
+from src.utils import enums
+
+from .conftest import solve_lp
+
+
+@pytest.mark.parametrize("min_distance", [5.0, 20.0])
+def test_alternatives_are_distinct_and_ordered(input_data, min_distance):
+    _, result = solve_lp(input_data)
+    results = AlternativeGenerator(input_data=input_data, alternative_num=4, min_distance=min_distance).run(
+        best_result=result, is_global_optimum=True
+    )
+    assert len(results) == 4
+    assert results[0][1] == pytest.approx(result.fun)
+    # 吨度价从低到高，两两之间的 L1 距离不小于 min_distance
+    cost_arr = np.array([fun for _, fun in results])
+    assert np.all(np.diff(cost_arr) >= -1e-9)
+    for (x_a, _), (x_b, _) in itertools.combinations(results, 2):
+        assert np.abs(x_a - x_b).sum() >= min_distance - 1e-6
+    for x, _ in results:
+        assert x.sum() == pytest.approx(100)
+
+
+def test_worse_seed_is_replaced(input_data):
+    _, lp_result = solve_lp(input_data)
+    slsqp_input_data = copy.deepcopy(input_data)
+    slsqp_input_data.solver_engine = enums.SolverEngine.SLSQP
+    slsqp_result, _ = create_model(input_data=slsqp_input_data).run_model()
+
+    results = AlternativeGenerator(input_data=input_data, alternative_num=3).run(best_result=slsqp_result)
+    assert results[0][1] == pytest.approx(lp_result.fun)
+    assert all(fun >= results[0][1] - 1e-9 for _, fun in results)
+
+
+def test_zero_alternative_num_is_not_replaced_by_default(input_data):
+    input_data.alternative_num = 3
+    assert AlternativeGenerator(input_data=input_data, alternative_num=0).alternative_num == 0
+    _, result = solve_lp(input_data)
+    assert len(AlternativeGenerator(input_data=input_data, alternative_num=0).run(
+        best_result=result, is_global_optimum=True
+    )) == 1
@@ -0,0 +1,98 @@
+import copy
+import json
+
+import numpy as np
+import pytest
+
+from src.assay_stream import AssayStream
+from src.solver_session import SolverSession
+from src.utils import enums, header
+
+from .conftest import solve_lp
+
+
+def generate_records(input_data, record_num, seed=0):
+    # 随机原料的 TFe / SiO2 / H2O 化验值在原值附近波动
+    rng = np.random.default_rng(seed)
+    record_lt = []
+    for _ in range(record_num):
+        i = int(rng.integers(len(input_data.material_name_lt)))
+        record = {header.MaterialHeader.material_name: input_data.material_name_lt[i]}
+        for cc_name in [enums.ChemicalCompoundName.TFe, enums.ChemicalCompoundName.SiO2, enums.ChemicalCompoundName.H2O]:
+            value = input_data.assay_matrix[i, enums.CHEMICAL_COMPONENT_LT.index(cc_name)]
+            record[cc_name] = round(float(max(value * rng.uniform(0.9, 1.1), 0)), 3)
+        record_lt.append(record)
+    return record_lt
+
+
+def test_skip_decisions_match_fresh_solves(input_data, tmp_path):
+    assay_file = str(tmp_path / "assays.jsonl")
+    record_lt = generate_records(input_data, record_num=60)
+    with open(assay_file, "w", encoding="utf-8") as f:
+        for record in record_lt:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # 逐条读取并处理，每条之后与在当前化验值上的完整求解比较
+    stream = AssayStream(input_data=input_data, assay_file=assay_file, output_file=str(tmp_path / "out.jsonl"))
+    stream.session.solve()
+    skipped_num = 0
+    for line in stream.read_new_lines():
+        recommendation = stream.process_record(stream.parse_line(line))
+        _, fresh_result = solve_lp(input_data)
+        assert recommendation["objective"] == pytest.approx(fresh_result.fun, rel=1e-7)
+        skipped_num += not recommendation["resolved"]
+    assert 0 < skipped_num < len(record_lt)
+
+    with open(str(tmp_path / "out.jsonl"), encoding="utf-8") as f:
+        assert len(f.readlines()) == len(record_lt)
+
+
+def test_blended_material_on_inactive_rows(input_data):
+    # 存货21 在最优配比中，MgO 约束不起作用、SiO2 上限起作用
+    cch = enums.ChemicalCompoundName
+    session = SolverSession(input_data=input_data)
+    result = session.solve()
+    i = input_data.material_index["存货21"]
+    assert result.x[i] > 1
+
+    session.update_assay({"存货21": {cch.MgO: 0.5}})
+    result, resolved = session.resolve_if_needed()
+    assert not resolved
+    _, fresh_result = solve_lp(input_data)
+    assert result.fun == pytest.approx(fresh_result.fun, rel=1e-7)
+
+    session.update_assay({"存货21": {cch.SiO2: 4.5}})
+    result, resolved = session.resolve_if_needed()
+    assert resolved
+    _, fresh_result = solve_lp(input_data)
+    assert result.fun == pytest.approx(fresh_result.fun, rel=1e-7)
+
+
+def test_malformed_lines_are_skipped(input_data, tmp_path):
+    assay_file = str(tmp_path / "assays.csv")
+    material_name = input_data.material_name_lt[4]
+    with open(assay_file, "w", encoding="utf-8") as f:
+        f.write("存货,TFe,H2O\n")
+        f.write("{},abc,1\n".format(material_name))
+        f.write("未知存货,60,8\n")
+        f.write("{},60,nan\n".format(material_name))
+        f.write("{},61,8\n".format(material_name))
+
+    original_assay_matrix = copy.deepcopy(input_data.assay_matrix)
+    stream = AssayStream(input_data=input_data, assay_file=assay_file, output_file=str(tmp_path / "out.jsonl"))
+    stream.session.solve()
+    recommendation_lt = stream.poll()
+    # 只有最后一条有效，无效记录不部分更新化验值
+    assert len(recommendation_lt) == 1
+    assert recommendation_lt[0]["assay"] == {"TFe": 61.0, "H2O": 8.0}
+    i = input_data.material_index[material_name]
+    changed = np.flatnonzero(input_data.assay_matrix[i] != original_assay_matrix[i])
+    assert sorted(enums.CHEMICAL_COMPONENT_LT[j] for j in changed) == ["H2O", "TFe"]
+
+
+def test_invalid_json_lines_are_skipped(input_data, tmp_path):
+    stream = AssayStream(input_data=input_data, assay_file=str(tmp_path / "assays.jsonl"))
+    assert stream.parse_line("not json") is None
+    assert stream.parse_line("[1, 2]") is None
+    assert stream.parse_record({header.MaterialHeader.material_name: ["a"], "TFe": 60}) is None
+    assert stream.parse_record({header.MaterialHeader.material_name: input_data.material_name_lt[0], "TFe": "x"}) is None
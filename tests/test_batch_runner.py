@@ -0,0 +1,55 @@
+import os
+import shutil
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from src.batch_runner import BatchRunner
+from src.utils import field, header
+
+from .test_lp_model import DATASET_OPTIMUM
+
+
+@pytest.fixture
+def scenario_folder(exe_folder, tmp_path):
+    # 两个场景：数据集原样，以及最多使用 3 种原料
+    folder = tmp_path / "scenarios"
+    folder.mkdir()
+    base_file = os.path.join(exe_folder, field.ROCK_FILENAME)
+    shutil.copy(base_file, folder / "a_base.xlsx")
+    shutil.copy(base_file, folder / "b_cap.xlsx")
+    wb = openpyxl.load_workbook(folder / "b_cap.xlsx")
+    wb[field.TIME_PARAM_SHEET].append([header.TimeParamHeader.max_material_num, 3])
+    wb.save(folder / "b_cap.xlsx")
+    wb.close()
+    return folder
+
+
+def test_batch_results_in_scenario_order(input_data, scenario_folder, tmp_path):
+    output_file = str(tmp_path / field.BATCH_RESULT_FILENAME)
+    batch_runner = BatchRunner(
+        base_input_data=input_data, scenario_path=str(scenario_folder), output_file=output_file, max_workers=2
+    )
+    results = batch_runner.run()
+    assert [result["scenario_name"] for result in results] == ["a_base", "b_cap"]
+    assert all(result["success"] for result in results)
+    assert results[0]["objective"] == pytest.approx(DATASET_OPTIMUM, abs=1e-5)
+    assert results[1]["objective"] > DATASET_OPTIMUM
+    assert sum(ratio > 1e-6 for ratio in results[1]["ratio"].values()) <= 3
+
+    batch_runner.write_to_excel()
+    ratio_df = pd.read_excel(output_file, sheet_name=field.BATCH_RATIO_SHEET, index_col=0)
+    assert list(ratio_df.columns) == ["a_base", "b_cap"]
+
+
+def test_duplicate_scenario_names_rejected(input_data, scenario_folder, tmp_path):
+    smh = header.ScenarioManifestHeader
+    manifest_file = tmp_path / "manifest.csv"
+    pd.DataFrame({
+        smh.scenario_name: ["s1", "s1"],
+        smh.file_path: ["scenarios/a_base.xlsx", "scenarios/b_cap.xlsx"],
+    }).to_csv(manifest_file, index=False)
+    batch_runner = BatchRunner(base_input_data=input_data, scenario_path=str(manifest_file), max_workers=1)
+    with pytest.raises(ValueError, match="duplicate scenario names"):
+        batch_runner.run()
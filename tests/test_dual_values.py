@@ -0,0 +1,52 @@
+import copy
+
+import numpy as np
+import pytest
+
+from .conftest import solve_lp
+
+EPS = 1e-3
+
+
+def test_shadow_prices_match_finite_differences(input_data):
+    model, result = solve_lp(input_data)
+    cc_shadow_price_dict, _ = model.get_dual_values(result_x=result.x)
+
+    checked_num = 0
+    for j, cc_name in enumerate(input_data.chemical_compound_name_lt):
+        for side in (0, 1):
+            shadow_price = cc_shadow_price_dict[cc_name][side]
+            if abs(shadow_price) < 1e-9:
+                continue
+            # 上下限分别增加 EPS 后重新求解
+            bounds = input_data.cc_bounds_arr[j].tolist()
+            bounds[side] += EPS
+            changed_input_data = copy.deepcopy(input_data)
+            changed_input_data.update_chemical_compound_bounds(cc_name, *bounds)
+            _, changed_result = solve_lp(changed_input_data)
+            assert shadow_price == pytest.approx((changed_result.fun - result.fun) / EPS, rel=1e-3, abs=1e-6)
+            checked_num += 1
+    # 数据集中 TFe 下限与 SiO2、Al2O3 上限起作用
+    assert checked_num >= 3
+
+
+def test_reduced_costs_match_finite_differences(input_data):
+    model, result = solve_lp(input_data)
+    _, material_reduced_cost_dict = model.get_dual_values(result_x=result.x)
+
+    unused_lt = [name for name, x in zip(model.keys, result.x) if x < 1e-9]
+    assert unused_lt
+    for material_name in unused_lt[:5]:
+        # 强制使用 EPS 个百分点
+        up_bound = input_data.material_bounds_arr[input_data.material_index[material_name], 1]
+        changed_input_data = copy.deepcopy(input_data)
+        changed_input_data.update_material_ratio_bounds(material_name, EPS, up_bound)
+        _, changed_result = solve_lp(changed_input_data)
+        assert material_reduced_cost_dict[material_name] == pytest.approx(
+            (changed_result.fun - result.fun) / EPS, rel=1e-3, abs=1e-6
+        )
+
+    # 配比在上下限之间的原料缩减成本为 0
+    bounds_arr = input_data.material_bounds_arr
+    inner = (result.x > bounds_arr[:, 0] + 1e-6) & (result.x < bounds_arr[:, 1] - 1e-6)
+    assert np.allclose([material_reduced_cost_dict[name] for name in np.array(model.keys)[inner]], 0, atol=1e-6)
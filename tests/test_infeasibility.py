@@ -0,0 +1,56 @@
+import copy
+
+import numpy as np
+
+from src.infeasibility import InfeasibilityDiagnosis
+from src.utils import enums
+
+
+def set_bound(input_data, object_name, bound_type, value):
+    bt = enums.BoundType
+    if bound_type in (bt.CC_LOW_BOUND, bt.CC_UP_BOUND):
+        bounds = input_data.cc_bounds_arr[input_data.chemical_compound_index[object_name]].tolist()
+        bounds[0 if bound_type == bt.CC_LOW_BOUND else 1] = value
+        input_data.update_chemical_compound_bounds(object_name, *bounds)
+    else:
+        bounds = input_data.material_bounds_arr[input_data.material_index[object_name]].tolist()
+        bounds[0 if bound_type == bt.MATERIAL_LOW_BOUND else 1] = value
+        input_data.update_material_ratio_bounds(object_name, *bounds)
+
+
+def test_dataset_is_feasible(input_data):
+    diagnosis = InfeasibilityDiagnosis(input_data=input_data)
+    assert diagnosis.is_feasible()
+    conflict_row_lt, relaxation_dict = diagnosis.run()
+    assert conflict_row_lt == []
+    assert relaxation_dict == dict()
+
+
+def test_tfe_conflict(input_data):
+    bt = enums.BoundType
+    # TFe 下限高于所有可行配比能达到的品位
+    set_bound(input_data, enums.ChemicalCompoundName.TFe, bt.CC_LOW_BOUND, 70)
+    diagnosis = InfeasibilityDiagnosis(input_data=input_data)
+    assert not diagnosis.is_feasible()
+
+    conflict_row_lt, relaxation_dict = diagnosis.run()
+    conflict_lt = [diagnosis.row_info_lt[k][:2] for k in conflict_row_lt]
+    assert (enums.ChemicalCompoundName.TFe, bt.CC_LOW_BOUND) in conflict_lt
+
+    # 冲突约束集本身不可行，去掉其中任意一个约束后可行
+    active_mask = np.zeros(len(diagnosis.b), dtype=bool)
+    active_mask[conflict_row_lt] = True
+    assert not diagnosis.is_feasible(active_mask=active_mask)
+    for k in conflict_row_lt:
+        active_mask[k] = False
+        assert diagnosis.is_feasible(active_mask=active_mask)
+        active_mask[k] = True
+
+    # 按最小放宽修改约束后可行
+    assert relaxation_dict
+    relaxed_input_data = copy.deepcopy(input_data)
+    for k, (relaxed_bound_value, relaxation) in relaxation_dict.items():
+        assert relaxation > 0
+        object_name, bound_type, _ = diagnosis.row_info_lt[k]
+        set_bound(relaxed_input_data, object_name, bound_type, relaxed_bound_value)
+    assert InfeasibilityDiagnosis(input_data=relaxed_input_data).is_feasible()
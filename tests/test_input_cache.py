@@ -0,0 +1,59 @@
+import openpyxl
+
+from src.input_data import InputData
+from src.result_storage import ResultStorage
+from src.utils import field, header
+
+from .conftest import solve_lp
+
+
+def read_input_data(exe_folder, **kwargs):
+    input_data = InputData(exe_folder=exe_folder, **kwargs)
+    input_data.read_data()
+    return input_data
+
+
+def write_ratio(input_data):
+    model, result = solve_lp(input_data)
+    ResultStorage(input_data=input_data, keys=model.keys, result=result, multi_results=[]).write_to_excel()
+
+
+def edit_wet_price(exe_folder, delta):
+    file_name = exe_folder + field.ROCK_FILENAME
+    wb = openpyxl.load_workbook(file_name)
+    sheet = wb[field.MATERIAL_SHEET]
+    column = [cell.value for cell in sheet[1]].index(header.MaterialHeader.wet_price) + 1
+    sheet.cell(row=2, column=column, value=sheet.cell(row=2, column=column).value + delta)
+    wb.save(file_name)
+
+
+def test_cache_survives_result_write(exe_folder, caplog):
+    caplog.set_level("INFO")
+    write_ratio(read_input_data(exe_folder))
+    caplog.clear()
+    read_input_data(exe_folder)
+    assert "input loaded from cache" in caplog.text
+
+
+def test_input_edit_before_result_write_invalidates_cache(exe_folder):
+    input_data = read_input_data(exe_folder)
+    wet_price = input_data.wet_price_arr[0]
+    # 读取之后、写回结果之前修改输入
+    edit_wet_price(exe_folder, 100)
+    write_ratio(input_data)
+    assert read_input_data(exe_folder).wet_price_arr[0] == wet_price + 100
+
+
+def test_cache_can_be_disabled(exe_folder, caplog):
+    caplog.set_level("INFO")
+    read_input_data(exe_folder, use_cache=False)
+    read_input_data(exe_folder, use_cache=False)
+    assert "input loaded from cache" not in caplog.text
+
+    wb = openpyxl.load_workbook(exe_folder + field.ROCK_FILENAME)
+    wb[field.TIME_PARAM_SHEET].append([header.TimeParamHeader.use_cache, 0])
+    wb.save(exe_folder + field.ROCK_FILENAME)
+    input_data = read_input_data(exe_folder)
+    assert not input_data.use_cache
+    read_input_data(exe_folder)
+    assert "input loaded from cache" not in caplog.text
@@ -0,0 +1,108 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.input_data import InputData
+from src.io_backend import ExcelBackend, ParquetBackend, convert_input, create_io_backend
+from src.result_storage import ResultStorage
+from src.utils import field, header
+
+from .conftest import solve_lp
+
+
+def write_results(input_data):
+    model, result = solve_lp(input_data)
+    result_storage = ResultStorage(
+        input_data=input_data,
+        keys=model.keys,
+        result=result,
+        multi_results=[(result.x.copy(), result.fun), (result.x.copy(), result.fun)],
+        dual_values=model.get_dual_values(result_x=result.x)
+    )
+    result_storage.write_to_excel()
+    result_storage.write_multi_results_to_excel()
+    result_storage.write_dual_values_to_excel()
+    return result_storage, result
+
+
+@pytest.mark.parametrize("io_format", ["csv", "json", "parquet"])
+def test_folder_round_trip(input_data, exe_folder, io_format):
+    if io_format == "parquet":
+        pytest.importorskip("pyarrow")
+    folder_name = "{}_in".format(io_format)
+    convert_input(exe_folder + field.ROCK_FILENAME, exe_folder + folder_name, io_format)
+
+    folder_input_data = InputData(exe_folder=exe_folder, file_name=folder_name, use_cache=False)
+    folder_input_data.read_data()
+    assert folder_input_data.material_name_lt == input_data.material_name_lt
+    assert folder_input_data.chemical_compound_name_lt == input_data.chemical_compound_name_lt
+    for array_name in ["wet_price_arr", "material_bounds_arr", "assay_matrix", "cc_bounds_arr"]:
+        np.testing.assert_allclose(getattr(folder_input_data, array_name), getattr(input_data, array_name))
+    assert folder_input_data.time_limit == input_data.time_limit
+
+    # 两次运行的结果按运行编号追加，输入文件不改写
+    io_backend = create_io_backend(exe_folder + folder_name)
+    material_file = io_backend.get_sheet_path(field.MATERIAL_SHEET)
+    with open(material_file, "rb") as f:
+        material_bytes = f.read()
+    run_id_lt = []
+    for _ in range(2):
+        result_storage, result = write_results(folder_input_data)
+        run_id_lt.append(result_storage.run_id)
+    with open(material_file, "rb") as f:
+        assert f.read() == material_bytes
+    assert len(set(run_id_lt)) == 2
+
+    rh = header.RunResultHeader
+    n = len(input_data.material_name_lt)
+    sheet_df_dict = io_backend.read_sheets(
+        [field.RUNNING_RESULT_SHEET, field.MULTI_RESULTS_SHEET, field.DUAL_VALUE_SHEET]
+    )
+    ratio_df = sheet_df_dict[field.RUNNING_RESULT_SHEET]
+    assert ratio_df[rh.run_id].astype(str).tolist() == [run_id for run_id in run_id_lt for _ in range(n)]
+    for run_id in run_id_lt:
+        run_df = ratio_df[ratio_df[rh.run_id].astype(str) == run_id]
+        assert run_df[rh.material_name].tolist() == input_data.material_name_lt
+        np.testing.assert_allclose(run_df[rh.ratio].to_numpy(dtype=float), result.x, atol=1e-9)
+        np.testing.assert_allclose(run_df[rh.objective].to_numpy(dtype=float), result.fun)
+    assert len(sheet_df_dict[field.MULTI_RESULTS_SHEET]) == 2 * 2 * n
+    assert set(sheet_df_dict[field.DUAL_VALUE_SHEET][rh.run_id].astype(str)) == set(run_id_lt)
+
+
+def test_excel_writes_ratio_column(input_data, exe_folder):
+    _, result = write_results(input_data)
+    material_df = ExcelBackend(exe_folder + field.ROCK_FILENAME).read_sheets([field.MATERIAL_SHEET])[field.MATERIAL_SHEET]
+    mh = header.MaterialHeader
+    ratio_dict = dict(zip(material_df[mh.material_name], material_df[mh.ratio]))
+    np.testing.assert_allclose([ratio_dict[name] for name in input_data.material_name_lt], result.x, atol=1e-9)
+
+    # 写回结果不改变输入，重新读取的输入与原输入相同
+    reread_input_data = InputData(exe_folder=exe_folder, use_cache=False)
+    reread_input_data.read_data()
+    np.testing.assert_allclose(reread_input_data.assay_matrix, input_data.assay_matrix)
+    np.testing.assert_allclose(reread_input_data.wet_price_arr, input_data.wet_price_arr)
+
+
+def test_partitioned_parquet_input(input_data, exe_folder):
+    pytest.importorskip("pyarrow")
+    # 每张输入工作表都是 <工作表名>/ 分片文件夹，配矿模型 分为两个分片
+    folder = exe_folder + "parquet_parts"
+    parquet_backend = convert_input(exe_folder + field.ROCK_FILENAME, folder, "parquet")
+    for sheet_name in [field.TIME_PARAM_SHEET, field.CHEMICAL_COMPOUND_SHEET, field.MATERIAL_SHEET]:
+        sheet_path = parquet_backend.get_sheet_path(sheet_name)
+        df = pd.read_parquet(sheet_path)
+        os.remove(sheet_path)
+        os.makedirs(os.path.join(folder, sheet_name))
+        split_index = len(df) // 2 if sheet_name == field.MATERIAL_SHEET else len(df)
+        df.iloc[:split_index].to_parquet(os.path.join(folder, sheet_name, "0.parquet"), index=False)
+        if split_index < len(df):
+            df.iloc[split_index:].to_parquet(os.path.join(folder, sheet_name, "1.parquet"), index=False)
+
+    assert isinstance(create_io_backend(folder), ParquetBackend)
+    folder_input_data = InputData(exe_folder=exe_folder, file_name="parquet_parts", use_cache=False)
+    folder_input_data.read_data()
+    assert folder_input_data.material_name_lt == input_data.material_name_lt
+    for array_name in ["wet_price_arr", "material_bounds_arr", "assay_matrix", "cc_bounds_arr"]:
+        np.testing.assert_allclose(getattr(folder_input_data, array_name), getattr(input_data, array_name))
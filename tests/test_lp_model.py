@@ -0,0 +1,30 @@
+import copy
+
+import pytest
+
+from src.engine import create_model
+from src.utils import enums
+
+from .conftest import solve_lp
+
+# 数据集的全局最优吨度价
+DATASET_OPTIMUM = 10.761161
+
+
+def test_lp_optimum(input_data):
+    model, result = solve_lp(input_data)
+    assert result.success
+    assert result.fun == pytest.approx(DATASET_OPTIMUM, abs=1e-5)
+    assert result.x.sum() == pytest.approx(100)
+    assert not model.get_violations(result_x=result.x, tolerance=1e-6)
+    # 线性规划的目标值即原问题的吨度价
+    assert model.get_objective(result.x) == pytest.approx(result.fun)
+
+
+@pytest.mark.parametrize("solver_engine", [enums.SolverEngine.SLSQP, enums.SolverEngine.MILP])
+def test_lp_not_worse_than_other_engines(input_data, solver_engine):
+    _, lp_result = solve_lp(input_data)
+    other_input_data = copy.deepcopy(input_data)
+    other_input_data.solver_engine = solver_engine
+    other_result, _ = create_model(input_data=other_input_data).run_model()
+    assert lp_result.fun <= other_result.fun + 1e-6
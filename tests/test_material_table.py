@@ -0,0 +1,37 @@
+import copy
+
+import pytest
+
+from src.utils import enums
+
+
+def test_view_writes_update_arrays(input_data):
+    i = input_data.material_index["存货21"]
+    material = input_data.material_dict["存货21"]
+    assert material.wet_price == input_data.wet_price_arr[i]
+
+    # 视图的写入作用于输入数据共用的数组，干基价同步更新
+    material.wet_price = 500.0
+    assert input_data.wet_price_arr[i] == 500.0
+    assert input_data.dry_price_arr[i] == pytest.approx(500.0 / input_data.dry_factor_arr[i])
+    assert material.dry_price == input_data.dry_price_arr[i]
+
+    material.ratio_bounds = (5.0, 40.0)
+    assert tuple(input_data.material_bounds_arr[i]) == (5.0, 40.0)
+    assert material.ratio_bounds == (5.0, 40.0)
+
+
+def test_assay_update_refreshes_dry_price(input_data):
+    h2o = enums.ChemicalCompoundName.H2O
+    # 深拷贝后派生数组不再是化验矩阵的视图，update_assay 仍逐项同步
+    for data in [input_data, copy.deepcopy(input_data)]:
+        i = data.material_index["存货21"]
+        material = data.material_dict["存货21"]
+        old_dry_price = material.dry_price
+        data.update_assay(material_name="存货21", chemical_compound_name=h2o, value=20.0)
+        assert material.get_content(h2o) == 20.0
+        assert data.moisture_arr[i] == 20.0
+        assert material.dry_factor == pytest.approx(0.8)
+        assert material.dry_price == pytest.approx(material.wet_price / 0.8)
+        assert material.dry_price != old_dry_price
+        assert data.cc_content_matrix[i, data.h2o_index] == 20.0
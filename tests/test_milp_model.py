@@ -0,0 +1,49 @@
+import copy
+
+import numpy as np
+import pytest
+
+from src.milp_model import MixedIntegerModel
+
+from .test_lp_model import DATASET_OPTIMUM
+
+
+def solve_milp(input_data):
+    model = MixedIntegerModel(input_data=copy.deepcopy(input_data))
+    result, _ = model.run_model()
+    return model, result
+
+
+def check_used_consistent(model, result):
+    # 固定原料组合重解线性规划后，配比与 0-1 变量一致：使用的原料 z = 1，不用的原料配比为 0
+    n = len(model.keys)
+    used_arr = np.round(model.milp_res.x[n + 1:]) > 0.5
+    assert np.all(result.x[~used_arr] == 0)
+    assert np.all(used_arr[result.x > 1e-6])
+    return used_arr
+
+
+def test_material_num_cap_binding(input_data):
+    # 线性规划最优解使用 4 种原料，限制为 3 种后吨度价上升
+    input_data.max_material_num = 3
+    model, result = solve_milp(input_data)
+    assert result.success
+    used_arr = check_used_consistent(model, result)
+    assert used_arr.sum() <= 3
+    assert int(np.sum(result.x > 1e-6)) <= 3
+    assert result.fun > DATASET_OPTIMUM + 1e-6
+    assert result.x.sum() == pytest.approx(100)
+
+
+def test_min_usage_binding(input_data):
+    # 线性规划最优解中 存货42 的配比约为 5.9，强制使用且最小用量为 10 时取到最小用量
+    index = input_data.material_name_lt.index("存货42")
+    input_data.min_usage_arr[index] = 10
+    input_data.force_usage_arr[index] = 1
+    model, result = solve_milp(input_data)
+    assert result.success
+    used_arr = check_used_consistent(model, result)
+    assert used_arr[index]
+    assert result.x[index] == pytest.approx(10, abs=1e-6)
+    assert np.all(result.x[used_arr] >= input_data.min_usage_arr[used_arr] - 1e-6)
+    assert result.fun > DATASET_OPTIMUM + 1e-6
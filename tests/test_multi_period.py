@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.multi_period import MultiPeriodPlanner
+from src.utils import field, header
+
+from .conftest import read_with_sheets
+from .test_lp_model import DATASET_OPTIMUM
+
+
+def test_inventory_balance_across_periods(exe_folder):
+    # 单周期最优解中 存货21 约占 43.6%，三个周期共 900 湿吨不够用，库存约束起作用
+    ih = header.InventoryHeader
+    dh = header.DeliveryHeader
+    pph = header.ProductionPlanHeader
+    input_data = read_with_sheets(exe_folder, {
+        field.PRODUCTION_PLAN_SHEET: pd.DataFrame({pph.period: [1, 2, 3], pph.production: 1000.0}),
+        field.INVENTORY_SHEET: pd.DataFrame({ih.material_name: ["存货21"], ih.inventory: [600.0]}),
+        field.DELIVERY_SHEET: pd.DataFrame({dh.period: [2], dh.material_name: ["存货21"], dh.delivery: [300.0]}),
+    })
+    planner = MultiPeriodPlanner(input_data=input_data)
+    planner.load_plan_data()
+    res = planner.solve()
+    assert res.status == 0
+    assert res.fun > DATASET_OPTIMUM + 1e-6
+
+    i = input_data.material_index["存货21"]
+    dry_factor = input_data.dry_factor_arr[i]
+    np.testing.assert_allclose(planner.usage_matrix.sum(axis=1), 1000.0, rtol=1e-7)
+    # 期末库存 = 上期期末库存 + 到货 - 湿基用量，且不为负
+    wet_usage_arr = planner.usage_matrix[:, i] / dry_factor
+    expected_end_arr = 600.0 + np.cumsum([0.0, 300.0, 0.0] - wet_usage_arr)
+    np.testing.assert_allclose(planner.end_inventory_matrix[:, 0], expected_end_arr, atol=1e-6)
+    assert np.all(planner.end_inventory_matrix >= -1e-6)
+    assert planner.end_inventory_matrix[-1, 0] == pytest.approx(0, abs=1e-6)
+
+    # 录入第一个周期的实际用量后，剩余周期从更新后的库存开始
+    planner.apply_actuals({"存货21": 200.0})
+    res = planner.solve()
+    assert res.status == 0
+    assert planner.usage_matrix.shape[0] == 2
+    opening = 600.0 - 200.0 / dry_factor
+    wet_usage_arr = planner.usage_matrix[:, i] / dry_factor
+    np.testing.assert_allclose(
+        planner.end_inventory_matrix[:, 0], opening + np.cumsum([300.0, 0.0] - wet_usage_arr), atol=1e-6
+    )
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.multi_product import MultiProductModel
+from src.utils import enums, field, header
+
+from .conftest import read_with_sheets
+
+
+def test_shared_inventory_binds_across_products(input_data, exe_folder):
+    # 两个产品都可以大量使用 存货21，库存合计只有 400 湿吨
+    ph = header.ProductHeader
+    cch = header.ChemicalCompoundHeader
+    ih = header.InventoryHeader
+    spec_df = input_data.read_chemical_compound_df().copy()
+    spec_df.loc[spec_df[cch.chemical_compound_name] == "SiO2", cch.up_bound] = 8
+    product_df = pd.DataFrame({
+        ph.product_name: ["A", "B"],
+        ph.production: [1000.0, 500.0],
+        ph.spec_sheet: [field.CHEMICAL_COMPOUND_SHEET, "产品成分_B"],
+    })
+    input_data = read_with_sheets(exe_folder, {"产品成分_B": spec_df, field.PRODUCT_SHEET: product_df})
+    i = input_data.material_index["存货21"]
+
+    # 不限库存时两个产品合计用量超过 400 湿吨
+    free_model = MultiProductModel(input_data=input_data)
+    free_model.load_product_data()
+    assert free_model.run_model().status == 0
+    assert free_model.usage_matrix[:, i].sum() / input_data.dry_factor_arr[i] > 400.0 + 1
+
+    inventory_df = pd.DataFrame({ih.material_name: ["存货21"], ih.inventory: [400.0]})
+    input_data = read_with_sheets(exe_folder, {field.INVENTORY_SHEET: inventory_df})
+    model = MultiProductModel(input_data=input_data)
+    model.load_product_data()
+    res = model.run_model()
+    assert res.status == 0
+    np.testing.assert_allclose(model.usage_matrix.sum(axis=1), [1000.0, 500.0], rtol=1e-7)
+
+    # 库存行起作用：两个产品合计用完库存，该行对偶值不为 0，合计吨度价上升
+    wet_usage_arr = model.usage_matrix[:, i] / input_data.dry_factor_arr[i]
+    assert wet_usage_arr.sum() == pytest.approx(400.0, rel=1e-7)
+    assert res.ineqlin.marginals[-1] < -1e-9
+    assert res.fun > free_model.lp_res.fun + 1e-6
+
+    # 每个产品满足各自的成分表
+    _, summary_df = model.generate_result_df()
+    assert summary_df[header.MultiProductResultHeader.tfe].min() >= 56 - 1e-6
+    j = enums.CHEMICAL_COMPONENT_LT.index(enums.ChemicalCompoundName.SiO2)
+    sio2_arr = model.usage_matrix @ input_data.assay_matrix[:, j] / model.usage_matrix.sum(axis=1)
+    assert sio2_arr[0] <= 6 + 1e-6
+    assert sio2_arr[1] <= 8 + 1e-6
@@ -0,0 +1,30 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.pareto import ParetoFrontier
+from src.utils import header
+
+
+@pytest.mark.parametrize("chemical_compound_name, direction", [("TFe", -1), ("SiO2", 1)])
+def test_frontier_non_dominated(input_data, chemical_compound_name, direction):
+    # direction 为 1 时成分越低越好 (扫描上限)，为 -1 时越高越好 (扫描下限)
+    ph = header.ParetoHeader
+    frontier_df = ParetoFrontier(
+        input_data=input_data, chemical_compound_name=chemical_compound_name, point_num=6, max_workers=1
+    ).run()
+    assert frontier_df[ph.success].all()
+    # 每个点的成分值不超过其界限
+    assert np.all(direction * (frontier_df[ph.compound_value] - frontier_df[ph.bound_value]) <= 1e-6)
+
+    # 从成本最优方案出发，收紧界限后吨度价上升
+    assert frontier_df[ph.objective].iloc[-1] > frontier_df[ph.objective].iloc[0]
+
+    point_lt = list(zip(frontier_df[ph.objective], direction * frontier_df[ph.compound_value]))
+    for (cost_a, value_a), (cost_b, value_b) in itertools.permutations(point_lt, 2):
+        # a 不能在两个目标上都不差于 b 且至少一个严格更好
+        dominated = cost_a <= cost_b - 1e-7 and value_a <= value_b + 1e-7 or (
+                cost_a <= cost_b + 1e-7 and value_a <= value_b - 1e-7
+        )
+        assert not dominated
@@ -0,0 +1,41 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from src.robust import RobustBlending
+from src.solver_session import SolverSession
+from src.utils import field, header
+
+from .conftest import read_with_sheets
+
+
+def test_back_off_reaches_target_probability(exe_folder):
+    # 最优配比中原料的 TFe、SiO2、Al2O3 有化验误差，名义方案贴着上下限，全部达标概率低
+    mh = header.MaterialHeader
+    std_df = pd.DataFrame({
+        mh.material_name: ["存货21", "存货27", "存货31", "存货42"],
+        "TFe": 0.5,
+        "SiO2": 0.3,
+        "Al2O3": 0.1,
+    })
+    input_data = read_with_sheets(exe_folder, {field.ASSAY_STD_SHEET: std_df})
+    robust_blending = RobustBlending(input_data=input_data, target_probability=0.9)
+    robust_result = robust_blending.run()
+    assert robust_result.success
+
+    _, joint_probability = robust_blending.evaluate_probability(
+        np.vstack([robust_blending.nominal_result.x, robust_result.x])
+    )
+    assert joint_probability[0] < 0.9
+    assert joint_probability[1] >= 0.9
+    assert robust_result.fun >= robust_blending.nominal_result.fun - 1e-9
+    assert np.all(robust_blending.back_off_arr >= 0)
+    assert robust_blending.back_off_arr.max() > 0
+
+    # 收紧量减半时达不到目标概率，κ 是二分得到的最小收紧量
+    session = SolverSession(input_data=copy.deepcopy(input_data))
+    session.solve()
+    half_result = robust_blending.solve_with_back_off(session=session, back_off_arr=robust_blending.back_off_arr / 2)
+    assert half_result is not None
+    assert robust_blending.evaluate_probability(half_result.x)[1][0] < 0.9
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from src.sensitivity import SensitivityAnalysis
+from src.utils import enums, header
+
+from .test_lp_model import DATASET_OPTIMUM
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_cost_monotone_in_price(input_data, max_workers):
+    # 最优配比中 存货21 的湿基价在原价上下 20% 内扫描，吨度价随价格单调不减
+    sh = header.SensitivityHeader
+    i = input_data.material_index["存货21"]
+    wet_price = float(input_data.wet_price_arr[i])
+    param = (enums.SensitivityParam.WET_PRICE, "存货21")
+    price_arr = wet_price * np.linspace(0.8, 1.2, 9)
+    result_df = SensitivityAnalysis(input_data=input_data, max_workers=max_workers).run({param: price_arr})
+
+    point_df = result_df.drop_duplicates(sh.point_id).sort_values(sh.point_id)
+    assert point_df[sh.success].all()
+    np.testing.assert_allclose(point_df[SensitivityAnalysis.get_param_column(param)], price_arr)
+    objective_arr = point_df[sh.objective].to_numpy()
+    assert np.all(np.diff(objective_arr) >= -1e-9)
+    assert objective_arr[-1] > objective_arr[0]
+    assert objective_arr[4] == pytest.approx(DATASET_OPTIMUM, abs=1e-5)
+    # 扫描在副本上进行，不修改输入
+    assert input_data.wet_price_arr[i] == wet_price
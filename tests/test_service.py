@@ -0,0 +1,89 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from src.service import OptimizationService, ServiceClient, generate_job
+from src.utils import enums, header
+
+from .test_lp_model import DATASET_OPTIMUM
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def service_port():
+    # 在后台线程的事件循环中运行服务，测试结束时停止服务并终止工作进程
+    port = get_free_port()
+    service = OptimizationService(max_workers=1, time_grace=0.2)
+    started = threading.Event()
+    state_dict = dict()
+
+    async def serve():
+        loop = asyncio.get_running_loop()
+        state_dict["loop"] = loop
+        state_dict["stop"] = loop.create_future()
+        await service.start()
+        server_task = asyncio.create_task(service.serve_tcp(port=port))
+        started.set()
+        await state_dict["stop"]
+        server_task.cancel()
+        await asyncio.gather(server_task, return_exceptions=True)
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    assert started.wait(timeout=30)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield service, port
+    state_dict["loop"].call_soon_threadsafe(state_dict["stop"].set_result, None)
+    thread.join(timeout=10)
+    service.shutdown()
+
+
+def test_service_jobs(input_data, service_port):
+    service, port = service_port
+    tph = header.TimeParamHeader
+    with ServiceClient(port=port, timeout=60) as client:
+        result = client.solve(generate_job(input_data, job_id=1))
+        assert result["job_id"] == 1
+        assert result["success"]
+        assert result["objective"] == pytest.approx(DATASET_OPTIMUM, abs=1e-5)
+        assert sum(result["ratio"].values()) == pytest.approx(100)
+
+        # 无法解析的行与内容错误的任务都返回失败，服务继续运行
+        client.file.write(b"not json\n")
+        client.file.flush()
+        assert "invalid JSON" in json.loads(client.file.readline())["message"]
+        result = client.solve({"job_id": 2, "materials": "bad"})
+        assert result["job_id"] == 2
+        assert not result["success"]
+
+        # 超过运行时间限制的任务终止其工作进程并换一个新进程
+        worker_pid = service.worker_lt[0].process.pid
+        slow_job = generate_job(input_data, job_id=3)
+        slow_job["params"][tph.solver_engine] = enums.SolverEngine.MULTI_START
+        slow_job["params"][tph.multi_start_num] = 5000
+        slow_job["params"][tph.time_limit] = 0.1
+        st = time.time()
+        result = client.solve(slow_job)
+        assert not result["success"]
+        assert "time limit" in result["message"]
+        assert time.time() - st < 5
+        assert service.worker_lt[0].process.pid != worker_pid
+
+        # 新的工作进程继续处理任务
+        result = client.solve(generate_job(input_data, job_id=4))
+        assert result["success"]
+        assert result["objective"] == pytest.approx(DATASET_OPTIMUM, abs=1e-5)